@@ -1,143 +1,273 @@
-"""
-Django settings for shop project.
-
-Generated by 'django-admin startproject' using Django 4.2.17.
-
-For more information on this file, see
-https://docs.djangoproject.com/en/4.2/topics/settings/
-
-For the full list of settings and their values, see
-https://docs.djangoproject.com/en/4.2/ref/settings/
-"""
-
-from pathlib import Path
-
-
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-0sj86_8(tw+awxc%lik01wn4q-^hgdhdo8nyg@ijbauoelvkg5'
-
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-# Application definition
-
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    'store',
-    'phonenumber_field',
-]
-
-PHONENUMBER_DEFAULT_REGION = 'UZ'
-
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'shop.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [
-            BASE_DIR / 'templates',
-        ],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'shop.wsgi.application'
-
-# Database
-# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db (20).sqlite3',
-    }
-}
-
-# Password validation
-# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-# Internationalization
-# https://docs.djangoproject.com/en/4.2/topics/i18n/
-
-LANGUAGE_CODE = 'en-us'
-
-TIME_ZONE = 'Asia/Tashkent'
-
-USE_I18N = True
-
-USE_TZ = True
-
-# Static files (CSS, JavaScript, Images)
-# https://docs.djangoproject.com/en/4.2/howto/static-files/
-
-STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'static'
-STATICFILES_DIRS = [
-    BASE_DIR / 'store/static',
-]
-
-MEDIA_URL = '/media/'
-MEDIA_ROOT = BASE_DIR / 'media'
-
-# Default primary key field type
-# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
-
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-from django.contrib.messages import constants as messages
-
-MESSAGE_TAGS = {
-    messages.DEBUG: 'alert-secondary',
-    messages.INFO: 'alert-info',
-    messages.SUCCESS: 'alert-success',
-    messages.WARNING: 'alert-warning',
-    messages.ERROR: 'alert-danger',
-}
+"""
+Django settings for shop project.
+
+Generated by 'django-admin startproject' using Django 4.2.17.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/4.2/ref/settings/
+"""
+
+import os
+from pathlib import Path
+
+
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-0sj86_8(tw+awxc%lik01wn4q-^hgdhdo8nyg@ijbauoelvkg5'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'store',
+    'phonenumber_field',
+]
+
+PHONENUMBER_DEFAULT_REGION = 'UZ'
+
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'store.routers.ReplicaPinMiddleware',
+    'store.page_cache.PageCacheMiddleware',
+]
+
+ROOT_URLCONF = 'shop.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [
+            BASE_DIR / 'templates',
+        ],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'store.context_processors.favourites',
+                'store.context_processors.cart_summary',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'shop.wsgi.application'
+
+# Database
+# https://docs.djangoproject.com/en/4.2/ref/settings/#databases
+
+# Baza profili: STORE_DB_PROFILE=sqlite (standart, bitta server) yoki server (PostgreSQL).
+# server profilida ulanishlar so'rovlar orasida ochiq qoladi va PgBouncer (transaction pooling) orqali
+# ulanadi: gunicorn workerlari ko'p bo'lsa ham bazaga ulanishlar soni pool hajmidan oshmaydi
+DATABASE_PROFILES = {
+    'sqlite': {
+        'ENGINE': 'store.backends.sqlite3',
+        'NAME': os.environ.get('STORE_DB_NAME', BASE_DIR / 'db (20).sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    'server': {
+        'ENGINE': os.environ.get('STORE_DB_ENGINE', 'django.db.backends.postgresql'),
+        'NAME': os.environ.get('STORE_DB_NAME', 'store'),
+        'USER': os.environ.get('STORE_DB_USER', 'store'),
+        'PASSWORD': os.environ.get('STORE_DB_PASSWORD', ''),
+        'HOST': os.environ.get('STORE_DB_HOST', '127.0.0.1'),
+        'PORT': os.environ.get('STORE_DB_PORT', '6432'),
+        'CONN_MAX_AGE': int(os.environ.get('STORE_DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        # PgBouncer transaction rejimida server tomonidagi kursorlar ishlamaydi
+        'DISABLE_SERVER_SIDE_CURSORS': True,
+    },
+}
+DB_PROFILE = os.environ.get('STORE_DB_PROFILE', 'sqlite')
+
+DATABASES = {
+    'default': DATABASE_PROFILES[DB_PROFILE],
+}
+
+# Katalog o'qishlari uchun replikalar (store.routers): STORE_DB_REPLICAS="joy[=og'irlik],...",
+# sqlite profilida joy - fayl nomi (python manage.py sync_replicas bilan to'ldiriladi), server da - host
+DATABASE_REPLICAS = {}
+for number, replica in enumerate(filter(None, os.environ.get('STORE_DB_REPLICAS', '').split(',')), 1):
+    location, _, weight = replica.strip().partition('=')
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        'TEST': {'MIRROR': 'default'},
+    }
+    if DB_PROFILE == 'sqlite':
+        DATABASES[alias]['NAME'] = BASE_DIR / location
+    else:
+        DATABASES[alias]['HOST'] = location
+    DATABASE_REPLICAS[alias] = int(weight or 1)
+
+DATABASE_ROUTERS = ['store.routers.ReplicaRouter']
+# Bazaga yozgan foydalanuvchi shuncha soniya asosiy bazadan o'qiydi
+REPLICA_PIN_SECONDS = 5
+
+# SQLite ulanishi ochilganda beriladi (store.db): WAL da o'qish yozishni kutmaydi, synchronous=NORMAL
+# WAL da xavfsiz va har commit da fsync qilmaydi, busy_timeout - "database is locked" o'rniga kutish
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64000,  # KiB
+}
+
+# Cache: STORE_CACHE_BACKEND=db (standart, python manage.py createcachetable), file yoki locmem.
+# Versiyali kalitlar (menu, kartochka, sahifa) hamma workerlarda umumiy cache bo'lsagina eskiradi:
+# locmem har bir process ning o'zida, faqat bitta processli runserver uchun
+CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'store'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', BASE_DIR / 'cache'),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'store_cache'),
+}
+CACHE_BACKEND, CACHE_LOCATION = CACHE_BACKENDS[os.environ.get('STORE_CACHE_BACKEND', 'db')]
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.environ.get('STORE_CACHE_LOCATION', CACHE_LOCATION),
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# Cache hit/miss hisoblagichlari process xotirasidan cache ga shu oraliqda yoziladi (store.cache.count)
+CACHE_STATS_FLUSH_SECONDS = 10
+
+# Katalog versiyasi process da shuncha soniya eslab qolinadi: boshqa worker dagi kategoriya
+# o'zgarishi menu va kartochkalarda ko'pi bilan shuncha kechikib ko'rinadi
+CATALOG_VERSION_TTL = 5
+
+# Menu va kategoriya bo'laklari shu vaqtgacha saqlanadi (versiya o'zgarsa undan oldin yangilanadi)
+CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Anonim foydalanuvchilar uchun to'liq sahifa cache i (store.page_cache): shu view lar va GET parametrlari,
+# boshqa parametrli (filtrlar) so'rovlar cache dan o'tmaydi
+PAGE_CACHE_VIEWS = ('product_list', 'category_detail', 'product_detail', 'product_reviews')
+PAGE_CACHE_QUERY_PARAMS = ('sort', 'type', 'page', 'cursor')
+PAGE_CACHE_TIMEOUT = 60 * 60
+# Sovuq sahifani bitta worker quradi, qolganlari shuncha soniyagacha kutadi
+PAGE_CACHE_LOCK_TIMEOUT = 30
+PAGE_CACHE_LOCK_WAIT = 2
+
+# Qidiruv indeksi (SQLite FTS5), asosiy bazadan alohida fayl: python manage.py rebuild_search_index
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH', BASE_DIR / 'search_index.sqlite3')
+
+# Autocomplete indeksi (store.suggest) har bir worker ning birinchi so'rovida fonda quriladi
+SUGGEST_WARM_UP = True
+# Boshqa workerlarning o'zgarishlari autocomplete da ko'pi bilan shuncha soniya kechikib ko'rinadi
+SUGGEST_SYNC_SECONDS = 2
+
+# Password validation
+# https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/4.2/topics/i18n/
+
+LANGUAGE_CODE = 'en-us'
+
+TIME_ZONE = 'Asia/Tashkent'
+
+USE_I18N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/4.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = BASE_DIR / 'static'
+STATICFILES_DIRS = [
+    BASE_DIR / 'store/static',
+]
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Rasmlarning kichraytirilgan nusxalari (store.thumbnails): media/thumbs/ va media/placeholders/ dagi
+# fayl nomlari mazmundan olinadi va o'zgarmaydi, web serverda "Cache-Control: max-age=31536000, immutable"
+THUMBNAIL_DIRECTORY = 'thumbs'
+THUMBNAIL_WIDTHS = (160, 320, 640, 1280)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+
+# Rasmi yo'q produkt va kategoriyalar uchun lokal SVG (store.placeholders), rangi kategoriyada beriladi
+PLACEHOLDER_DIRECTORY = 'placeholders'
+PLACEHOLDER_COLOR = '#e9e6e1'
+
+# Stripe: kalit muhitdan olinadi, STRIPE_API_BASE ni lokal fake serverga qaratish mumkin
+STRIPE_SECRET_KEY = os.environ.get('STRIPE_SECRET_KEY', '')
+STRIPE_WEBHOOK_SECRET = os.environ.get('STRIPE_WEBHOOK_SECRET', '')
+STRIPE_API_BASE = os.environ.get('STRIPE_API_BASE', 'https://api.stripe.com')
+STRIPE_TIMEOUT = 10
+STRIPE_MAX_RETRIES = 2
+STRIPE_MAX_WORKERS = 8
+
+# Savatdagi produktlar shu vaqtdan keyin omborga qaytariladi (release_expired_reservations)
+CART_RESERVATION_MINUTES = 30
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+from django.contrib.messages import constants as messages
+
+MESSAGE_TAGS = {
+    messages.DEBUG: 'alert-secondary',
+    messages.INFO: 'alert-info',
+    messages.SUCCESS: 'alert-success',
+    messages.WARNING: 'alert-warning',
+    messages.ERROR: 'alert-danger',
+}
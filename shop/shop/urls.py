@@ -1,15 +1,29 @@
-
-
-from django.contrib import admin
-from django.urls import path, include
-from shop import settings
-from django.conf.urls.static import static
-
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('', include('store.urls')),
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-
+
+
+import re
+from django.contrib import admin
+from django.urls import path, re_path, include
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+from shop import settings
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('store.urls')),
+]
+
+
+# Kesilgan rasmlar va placeholderlar nomi mazmundan olinadi, ular hech qachon o'zgarmaydi
+def serve_media(request, path, document_root=None):
+    response = serve(request, path, document_root=document_root)
+    if path.startswith((f'{settings.THUMBNAIL_DIRECTORY}/', f'{settings.PLACEHOLDER_DIRECTORY}/')):
+        patch_cache_control(response, public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+    return response
+
+
+if settings.DEBUG:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media,
+                {'document_root': settings.MEDIA_ROOT}),
+    ]
+
@@ -1,43 +1,52 @@
-from django.contrib import admin
-from .models import *
-from django.utils.safestring import mark_safe
-
-
-class GalleryInline(admin.TabularInline):
-    fk_name = 'product'
-    model = Gallery
-    extra = 1
-
-
-@admin.register(Category)
-class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('title', 'parent')
-    prepopulated_fields = {'slug': ('title',)}
-
-
-@admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'category', 'quantity', 'price', 'size', 'color', 'get_photo')
-    list_editable = ('price', 'quantity', 'size', 'color')
-    list_display_links = ('title',)
-    list_filter = ('title', 'price')
-    prepopulated_fields = {'slug': ('title',)}
-    inlines = [GalleryInline]
-
-    def get_photo(self, obj):
-        if obj.images:
-            try:
-                return mark_safe(f'<img src="{obj.images.all()[0].image.url}" width="50">')
-            except:
-                return 'NO PHOTO'
-        else:
-            return 'NO PHOTO'
-
-
-admin.site.register(Gallery)
-
-admin.site.register(Customer)
-admin.site.register(Order)
-admin.site.register(OrderProduct)
-admin.site.register(ShippingAddress)
-
+from django.contrib import admin
+from .models import *
+from django.utils.safestring import mark_safe
+
+
+class GalleryInline(admin.TabularInline):
+    fk_name = 'product'
+    model = Gallery
+    fields = ('image', 'position')
+    extra = 1
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('title', 'parent', 'placeholder_color')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'category', 'quantity', 'price', 'size', 'color', 'get_photo')
+    list_editable = ('price', 'quantity', 'size', 'color')
+    list_display_links = ('title',)
+    list_filter = ('title', 'price')
+    prepopulated_fields = {'slug': ('title',)}
+    inlines = [GalleryInline]
+    list_select_related = ('category', 'primary_image')  # har bir qator uchun alohida so'rov yo'q
+
+    def get_photo(self, obj):
+        image = obj.get_first_image()
+        if image:
+            return mark_safe(f'<img src="{image.get_thumbnail_url(160)}" width="50">')
+        return 'NO PHOTO'
+
+
+@admin.register(Gallery)
+class GalleryAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'product', 'position', 'image_hash')
+    list_editable = ('position',)
+    list_select_related = ('product',)
+
+admin.site.register(Customer)
+admin.site.register(Order)
+admin.site.register(OrderProduct)
+admin.site.register(ShippingAddress)
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'status', 'attempts', 'created_at', 'processed_at')
+    list_filter = ('status', 'type')
+    search_fields = ('event_id',)
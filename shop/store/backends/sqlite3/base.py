@@ -0,0 +1,20 @@
+from django.db.backends.sqlite3 import base
+
+
+# Django ning SQLite backendi, tranzaksiya turini OPTIONS['transaction_mode'] bilan berish mumkin
+# (Django 5.1 dagi kabi). IMMEDIATE da yozish qulfi BEGIN da olinadi: parallel processlar busy_timeout
+# bo'yicha navbat kutadi. Oddiy BEGIN da o'qishdan yozishga o'tayotgan tranzaksiya kutmasdan
+# "database is locked" bilan tushadi
+class DatabaseWrapper(base.DatabaseWrapper):
+    transaction_mode = None
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.transaction_mode = params.pop('transaction_mode', None)
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute(f'BEGIN {self.transaction_mode}')
+        else:
+            super()._start_transaction_under_autocommit()
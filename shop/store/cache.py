@@ -0,0 +1,126 @@
+import threading
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from .routers import pin_primary
+
+VERSION_KEY = 'store:catalog-version'
+STATS_KEY = 'store:stats:{name}:{event}'
+STATS_NAMES_KEY = 'store:stats:names'
+MISSING = object()
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+_stats_flushed_at = time.monotonic()
+
+_version = None
+_version_read_at = 0.0
+_fragments = {}
+
+
+# Katalog versiyasi: hamma kalitlar shu raqam bilan yoziladi. Category o'zgarsa versiya
+# yangilanadi (signals.py) va eski yozuvlar o'z-o'zidan ishlatilmay qoladi. Qiymat time_ns
+# (page_cache teglari kabi): db cache MAX_ENTRIES da kalitni o'chirib yuborsa ham yangi
+# qiymat eskisidan katta, versiya orqaga qaytmaydi. Process da CATALOG_VERSION_TTL soniya
+# eslab qolinadi, har bir menu/kartochka uchun cache ga so'rov bo'lmasin
+def get_catalog_version():
+    global _version, _version_read_at
+    now = time.monotonic()
+    if _version is not None and now - _version_read_at < settings.CATALOG_VERSION_TTL:
+        return _version
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY) or time.time_ns()
+    _version, _version_read_at = version, now
+    return version
+
+
+def bump_catalog_version():
+    global _version, _version_read_at
+    version = time.time_ns()
+    cache.set(VERSION_KEY, version, None)
+    _version, _version_read_at = version, time.monotonic()
+    return version
+
+
+@receiver(setting_changed)
+def reset_catalog_version(setting, **kwargs):
+    global _version
+    if setting in ('CACHES', 'CATALOG_VERSION_TTL'):
+        _version = None
+        _fragments.clear()
+
+
+# Hisoblagichlar avval process xotirasida yig'iladi va CACHE_STATS_FLUSH_SECONDS da bir marta
+# cache ga qo'shiladi: db cache backendida har bir hit bazaga yozuv bo'lib qolmasin
+def count(name, event, amount=1):
+    if not amount:
+        return
+    with _stats_lock:
+        _stats[name, event] += amount
+        due = time.monotonic() - _stats_flushed_at >= settings.CACHE_STATS_FLUSH_SECONDS
+    if due:
+        flush_stats()
+
+
+def flush_stats():
+    global _stats_flushed_at
+    with _stats_lock:
+        pending = dict(_stats)
+        _stats.clear()
+        _stats_flushed_at = time.monotonic()
+    if not pending:
+        return
+
+    names = cache.get(STATS_NAMES_KEY, set())
+    if not {name for name, event in pending} <= names:
+        cache.set(STATS_NAMES_KEY, names | {name for name, event in pending}, None)
+    for (name, event), amount in pending.items():
+        key = STATS_KEY.format(name=name, event=event)
+        if not cache.add(key, amount, None):
+            try:
+                cache.incr(key, amount)
+            except ValueError:
+                cache.set(key, amount, None)
+
+
+# Hit/miss hisoblagichlari: {'nav_menu': {'hit': 120, 'miss': 2}, ...}. Boshqa workerlarning
+# oxirgi CACHE_STATS_FLUSH_SECONDS dagi hisobi hali qo'shilmagan bo'lishi mumkin
+def get_stats():
+    flush_stats()
+    names = sorted(cache.get(STATS_NAMES_KEY, set()))
+    keys = {STATS_KEY.format(name=name, event=event): (name, event)
+            for name in names for event in ('hit', 'miss')}
+    values = cache.get_many(list(keys))
+    stats = {name: {'hit': 0, 'miss': 0} for name in names}
+    for key, value in values.items():
+        name, event = keys[key]
+        stats[name][event] = value
+    return stats
+
+
+# Versiyalangan kalit bilan cache dan oladi, bo'lmasa builder() ni chaqirib yozib qo'yadi.
+# Oxirgi qiymat process da ham turadi (kategoriya daraxti kabi): versiya o'zgarmaguncha
+# menu cache ga ham bormaydi
+def get_or_build(name, builder, timeout=None):
+    key = f'store:{name}:v{get_catalog_version()}'
+    local = _fragments.get(name)
+    if local is not None and local[0] == key:
+        count(name, 'hit')
+        return local[1]
+
+    value = cache.get(key, MISSING)
+    if value is MISSING:
+        count(name, 'miss')
+        with pin_primary():
+            value = builder()
+        cache.set(key, value, timeout or settings.CATALOG_CACHE_TIMEOUT)
+    else:
+        count(name, 'hit')
+    _fragments[name] = (key, value)
+    return value
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from .cache import get_catalog_version, count
+
+CARD_TEMPLATE = 'store/components/_product_card.html'
+CARD_KEY = 'store:card:{pk}:{version}:v{catalog_version}'
+# Kartochka shu belgi bilan render qilinadi, keyin har bir foydalanuvchi uchun yurak rangiga almashtiriladi
+FAVOURITE_MARK = '__favourite_fill__'
+FAVOURITE_FILL = {True: '#000000', False: 'none'}
+
+
+# Kalitda produktning versiyasi (narx, ombor, rasm o'zgarsa oshadi) va katalog versiyasi (kategoriya
+# rangi, placeholder) bor: eski kartochka o'chirilmaydi, shunchaki boshqa kalit bilan o'qilmay qoladi
+def get_card_key(product, catalog_version):
+    return CARD_KEY.format(pk=product.pk, version=product.version, catalog_version=catalog_version)
+
+
+def render_card(product):
+    return render_to_string(CARD_TEMPLATE, {'product': product, 'favourite_fill': FAVOURITE_MARK})
+
+
+# Hamma kartochkalar bitta get_many bilan olinadi, yo'qlari render qilinib bitta set_many bilan yoziladi
+def render_cards(products, favourite_ids=()):
+    return render_card_lists([products], favourite_ids)[0]
+
+
+# Bir nechta ro'yxat (bosh sahifadagi har bir bo'lim) uchun ham bitta get_many, ro'yxatlar tartibida
+def render_card_lists(product_lists, favourite_ids=()):
+    catalog_version = get_catalog_version()
+    lists = [[(get_card_key(product, catalog_version), product) for product in products]
+             for products in product_lists]
+    keys = [key for cards in lists for key, product in cards]
+    html = cache.get_many(keys)
+    missing = {key: render_card(product) for cards in lists for key, product in cards if key not in html}
+    if missing:
+        cache.set_many(missing, settings.CATALOG_CACHE_TIMEOUT)
+        html.update(missing)
+    count('product_card', 'hit', len(keys) - len(missing))
+    count('product_card', 'miss', len(missing))
+    return [mark_safe(''.join(html[key].replace(FAVOURITE_MARK, FAVOURITE_FILL[product.pk in favourite_ids])
+                              for key, product in cards))
+            for cards in lists]
@@ -0,0 +1,95 @@
+import math
+from decimal import Decimal, InvalidOperation
+from django.db.models import Count, Min, Max
+
+# Kategoriya sahifasidagi saralashlar. Faqat shu yerdagi qiymatlar order_by ga tushadi,
+# har biriga (category, maydon) indeksi bor
+SORTERS = [
+    {
+        'title': 'Price',
+        'sorters': [
+            ('price', 'Cheap'),
+            ('-price', 'Expensive'),
+        ]
+    },
+    {
+        'title': 'Color',
+        'sorters': [
+            ('color', 'A - Z'),
+            ('-color', 'Z - A'),
+        ]
+    },
+    {
+        'title': 'Size',
+        'sorters': [
+            ('size', 'Small'),
+            ('-size', 'Large'),
+        ]
+    }
+]
+
+ALLOWED_SORTS = {value for group in SORTERS for value, title in group['sorters']}
+
+# Filtrlar: ?price_min= ?price_max= ?size_min= ?size_max= ?color=...&color=...
+RANGE_FILTERS = {
+    'price': Decimal,
+    'size': float,
+}
+
+
+# Saralash maydoni + pk (bir xil qiymatli produktlar tartibi uchun)
+def get_ordering(sort):
+    if sort in ALLOWED_SORTS:
+        direction = '-' if sort.startswith('-') else ''
+        return [sort, direction + 'pk']
+    return ['pk']
+
+
+# "nan", "inf" ham son bo'lib o'qiladi, ular ham noto'g'ri qiymat sifatida tashlab yuboriladi
+def parse_number(value, number_type):
+    try:
+        number = number_type(value)
+        return number if math.isfinite(number) else None
+    except (TypeError, ValueError, InvalidOperation):  # sNaN ham shu yerda
+        return None
+
+
+def get_filters(params):
+    filters = {}
+    for field, number_type in RANGE_FILTERS.items():
+        low = parse_number(params.get(f'{field}_min'), number_type)
+        high = parse_number(params.get(f'{field}_max'), number_type)
+        if low is not None:
+            filters[f'{field}__gte'] = low
+        if high is not None:
+            filters[f'{field}__lte'] = high
+
+    colors = [color for color in params.getlist('color') if color]
+    if colors:
+        filters['color__in'] = colors
+    return filters
+
+
+def filter_products(products, params):
+    return products.filter(**get_filters(params))
+
+
+# Sidebar uchun facetlar: har bir facet bitta GROUP BY (yoki aggregate) so'rov.
+# Rang facetida tanlangan ranglar hisobga olinmaydi, shunda boshqa rangni ham qo'shish mumkin
+def get_facets(products, params):
+    filters = get_filters(params)
+    without_color = {key: value for key, value in filters.items() if key != 'color__in'}
+
+    colors = products.filter(**without_color).order_by('color').values('color').annotate(count=Count('pk'))
+    types = products.filter(**filters).order_by('category__title').values(
+        'category__slug', 'category__title').annotate(count=Count('pk'))
+    ranges = products.aggregate(price_min=Min('price'), price_max=Max('price'),
+                                size_min=Min('size'), size_max=Max('size'))
+
+    selected = params.getlist('color')
+    return {
+        'colors': [dict(row, selected=row['color'] in selected) for row in colors],
+        'selected_colors': selected,
+        'types': list(types),
+        'ranges': ranges,
+    }
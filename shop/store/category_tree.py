@@ -0,0 +1,61 @@
+import threading
+from .cache import get_catalog_version, count
+from .models import Category
+from .routers import pin_primary
+
+_snapshot = None
+_snapshot_version = None
+_lock = threading.Lock()
+
+
+# Butun kategoriya daraxtining xotiradagi nusxasi. Bir marta yuklanadi (bitta so'rov),
+# keyin menu va breadcrumbs bazaga bormaydi. Category o'zgarsa signal orqali tozalanadi,
+# boshqa workerlar esa katalog versiyasi o'zgarganini ko'rib qayta yuklaydi
+class CategoryTree:
+    def __init__(self, categories):
+        self.by_id = {category.pk: category for category in categories}
+        self.children = {}
+        for category in categories:
+            self.children.setdefault(category.parent_id, []).append(category)
+
+    @property
+    def roots(self):
+        return self.children.get(None, [])
+
+    def get_children(self, category_id):
+        return self.children.get(category_id, [])
+
+    def get_descendants(self, category_id):
+        result = []
+        for child in self.get_children(category_id):
+            result.append(child)
+            result.extend(self.get_descendants(child.pk))
+        return result
+
+    def get_ancestors(self, category_id):
+        category = self.by_id.get(category_id)
+        if category is None:
+            return []
+        return [self.by_id[int(pk)] for pk in category.path.split('/') if pk and int(pk) in self.by_id]
+
+
+def get_tree():
+    global _snapshot, _snapshot_version
+    version = get_catalog_version()
+    snapshot = _snapshot
+    if snapshot is None or _snapshot_version != version:
+        with _lock:
+            if _snapshot is None or _snapshot_version != version:
+                count('category_tree', 'miss')
+                with pin_primary():  # versiya oshgan, replika hali yetib olmagan bo'lishi mumkin
+                    _snapshot = CategoryTree(list(Category.objects.order_by('pk')))
+                _snapshot_version = version
+            snapshot = _snapshot
+    else:
+        count('category_tree', 'hit')
+    return snapshot
+
+
+def invalidate(**kwargs):
+    global _snapshot
+    _snapshot = None
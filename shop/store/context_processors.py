@@ -0,0 +1,16 @@
+from django.utils.functional import SimpleLazyObject
+from .utils import get_favourite_ids, get_cart_summary
+
+
+# Like bosilgan produktlar id lari, shablonda birinchi kerak bolganda bir marta yuklanadi
+def favourites(request):
+    return {
+        'favourite_ids': SimpleLazyObject(lambda: get_favourite_ids(request))
+    }
+
+
+# Headerdagi savat belgisi uchun: soni va summasi, bitta indeksli so'rov
+def cart_summary(request):
+    return {
+        'cart_summary': SimpleLazyObject(lambda: get_cart_summary(request.user))
+    }
@@ -0,0 +1,71 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from store.cache import bump_catalog_version
+from store.cards import render_card, render_cards
+from store.models import Category, Product, Gallery
+from store.utils import get_home_page_categories
+
+
+class Command(BaseCommand):
+    help = 'Renders a home page with synthetic product cards cold and warm (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cards', type=int, default=200)
+        parser.add_argument('--categories', type=int, default=4)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        client = Client(HTTP_HOST='localhost')
+        home_page = reverse('product_list')
+
+        with transaction.atomic():
+            self.create_catalog(options['cards'], options['categories'])
+            products = [product for category in get_home_page_categories()
+                        for subcategory in category.subcategories.all() for product in subcategory.products.all()]
+            favourite_ids = frozenset(product.pk for product in products[::3])
+            self.stdout.write(f'{len(products)} cards on the home page')
+
+            # Keshsiz: har bir kartochka include qilingandek alohida render qilinadi
+            rows = [('cards, no cache', self.measure(options['repeat'], lambda: [
+                render_card(product) for product in products]))]
+            # Sovuq: katalog versiyasi oshiriladi, hamma kalitlar yangi bo'ladi
+            rows.append(('cards, cold', self.measure(options['repeat'], lambda: render_cards(
+                products, favourite_ids), before=bump_catalog_version)))
+            rows.append(('cards, warm', self.measure(options['repeat'], lambda: render_cards(products, favourite_ids))))
+            rows.append(('page, cold', self.measure(options['repeat'], lambda: client.get(home_page),
+                                                    before=bump_catalog_version)))
+            rows.append(('page, warm', self.measure(options['repeat'], lambda: client.get(home_page))))
+            for name, timing in rows:
+                self.stdout.write(f'{name:>16}: {timing * 1000:8.2f} ms')
+            transaction.set_rollback(True)
+
+    def create_catalog(self, total, categories):
+        parent = Category.objects.create(title='Benchmark', slug='bench-cards')
+        for number in range(categories):
+            category = Category.objects.create(title=f'Benchmark {number}', slug=f'bench-cards-{number}', parent=parent)
+            products = Product.objects.bulk_create([
+                Product(title=f'Bench card {number} {i}', slug=f'bench-cards-{number}-{i}', category=category,
+                        description='A synthetic product used to measure card rendering ' * 3,
+                        price=i % 997, quantity=i % 4, size=i % 50, color=f'color{i % 13}')
+                for i in range(total // categories)
+            ])
+            Gallery.objects.bulk_create([
+                Gallery(product=product, image=f'products/bench-{product.pk}.jpg', image_hash=f'{product.pk:040x}',
+                        preview_color='#c0c0c0')
+                for product in products
+            ])
+        Product.refresh_primary_images(Product.objects.filter(category__parent=parent))
+
+    def measure(self, repeat, call, before=None):
+        timings = []
+        for i in range(repeat):
+            if before:
+                before()
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+from store import payments
+from store.models import Order
+from store.stripe_fake import FakeStripeServer
+
+
+class Command(BaseCommand):
+    help = 'Measures checkout session throughput against a local fake Stripe server (no network)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--latency-ms', type=float, default=50, help='Simulated Stripe response time')
+        parser.add_argument('--retries', type=int, default=1, help='Times every order is submitted')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        # Saqlanmagan orderlar yetarli: gateway faqat pk, summa va updated_at ni ishlatadi
+        orders = [Order(pk=i, total_price=Decimal('99.90'), updated_at=now) for i in range(options['requests'])]
+        jobs = [order for order in orders for attempt in range(options['retries'])]
+
+        with FakeStripeServer(latency=options['latency_ms'] / 1000) as fake, \
+                override_settings(STRIPE_API_BASE=fake.url, STRIPE_SECRET_KEY='sk_test_fake',
+                                  STRIPE_MAX_WORKERS=options['concurrency']):
+            latencies = []
+
+            # Checkout view kabi: gateway pool i orqali, natija event loop da kutiladi
+            async def call(order, limit):
+                async with limit:
+                    started = time.perf_counter()
+                    await payments.acreate_checkout_session(order, 'http://testserver/', 'http://testserver/checkout/')
+                    latencies.append(time.perf_counter() - started)
+
+            async def run():
+                limit = asyncio.Semaphore(options['concurrency'])
+                await asyncio.gather(*(call(order, limit) for order in jobs))
+
+            started = time.perf_counter()
+            asyncio.run(run())
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f'calls: {len(jobs)}, sessions created: {len(fake.sessions)}')
+        self.stdout.write(f'throughput: {len(jobs) / elapsed:.1f} sessions/s')
+        self.stdout.write(f'p50: {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+                          f'p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms')
@@ -0,0 +1,126 @@
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections, OperationalError
+from django.test import override_settings
+from store import stock
+from store.models import Category, Product, Customer, Order, OrderProduct
+
+# Django ning standart SQLite sozlamalari (rollback journal, har commit da fsync, oddiy BEGIN)
+BASELINE_PRAGMAS = {
+    'journal_mode': 'delete',
+    'synchronous': 'full',
+}
+
+
+# Bitta worker (gunicorn workeri o'rniga alohida process): o'z savatiga produkt qo'shib-olib turadi
+def run_worker(order_id, product_ids, seconds, seed):
+    rnd = random.Random(seed)
+    order = Order.objects.get(pk=order_id)
+    operations = errors = 0
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        product_id = rnd.choice(product_ids)
+        started = time.perf_counter()
+        try:
+            if stock.reserve(order, product_id):
+                stock.release(order, product_id)
+            operations += 2
+        except OperationalError:  # database is locked
+            errors += 1
+        latencies.append(time.perf_counter() - started)
+    connections.close_all()
+    return operations, errors, latencies
+
+
+class Command(BaseCommand):
+    help = 'Measures cart write throughput from concurrent worker processes on the configured database profile'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--products', type=int, default=50)
+        parser.add_argument('--baseline', action='store_true', help='SQLite without the tuned pragmas')
+
+    def handle(self, *args, **options):
+        pragmas = BASELINE_PRAGMAS if options['baseline'] else settings.SQLITE_PRAGMAS
+        with override_settings(SQLITE_PRAGMAS=pragmas), self.bench_database(options['baseline']):
+            self.bench(options)
+
+    # SQLite da o'lchov vaqtinchalik (migratsiya qilingan) faylda: ishlab turgan baza va uning cache jadvaliga
+    # yozilmaydi. Ulanish sozlamalari nusxada almashtiriladi, fork qilingan workerlar ham shuni oladi
+    @contextmanager
+    def bench_database(self, baseline):
+        if connection.vendor != 'sqlite':
+            yield
+            return
+        original = connection.settings_dict
+        with tempfile.TemporaryDirectory() as directory:
+            connections.close_all()
+            connection.settings_dict = {**original, 'NAME': os.path.join(directory, 'bench.sqlite3'),
+                                        'OPTIONS': dict(original['OPTIONS'])}
+            if baseline:
+                connection.settings_dict['OPTIONS'].pop('transaction_mode', None)
+            try:
+                call_command('migrate', verbosity=0)
+                call_command('createcachetable', verbosity=0)
+                yield
+            finally:
+                connections.close_all()
+                connection.settings_dict = original
+
+    def bench(self, options):
+        connections.close_all()  # pragmalar yangi ulanishlarda beriladi
+        category, product_ids, order_ids = self.create_data(options['workers'], options['products'])
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                pragmas = {name: cursor.execute(f'PRAGMA {name}').fetchone()[0] for name in settings.SQLITE_PRAGMAS}
+            self.stdout.write(f'{settings.DB_PROFILE} profile, pragmas {pragmas}, '
+                              f'transaction mode {connection.transaction_mode or "DEFERRED"}')
+        else:
+            self.stdout.write(f'{settings.DB_PROFILE} profile, {connection.vendor}')
+        connections.close_all()  # fork qilinadigan processlarga ochiq ulanish o'tmasin
+
+        try:
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+                results = list(pool.map(run_worker, order_ids, [product_ids] * len(order_ids),
+                                        [options['seconds']] * len(order_ids), range(len(order_ids))))
+            elapsed = time.perf_counter() - started
+        finally:
+            self.delete_data(category, order_ids)
+
+        operations = sum(result[0] for result in results)
+        errors = sum(result[1] for result in results)
+        latencies = sorted(latency for result in results for latency in result[2])
+        self.stdout.write(f'{options["workers"]} workers, {operations} cart updates, {errors} lock errors')
+        self.stdout.write(f'throughput: {operations / elapsed:.1f} updates/s')
+        if latencies:
+            self.stdout.write(f'p50: {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+                              f'p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms')
+
+    def create_data(self, workers, products):
+        category = Category.objects.create(title='Benchmark', slug='bench-db-writes')
+        product_objects = Product.objects.bulk_create([
+            Product(title=f'Bench {i}', slug=f'bench-db-writes-{i}', category=category, price=10,
+                    quantity=10 ** 9, size=1, color='black')
+            for i in range(products)
+        ])
+        users = User.objects.bulk_create([User(username=f'bench-db-writes-{i}') for i in range(workers)])
+        customers = Customer.objects.bulk_create([Customer(user=user, name=user.username) for user in users])
+        orders = Order.objects.bulk_create([Order(customer=customer) for customer in customers])
+        return category, [product.pk for product in product_objects], [order.pk for order in orders]
+
+    def delete_data(self, category, order_ids):
+        OrderProduct.objects.filter(order_id__in=order_ids).delete()  # order o'chsa SET_NULL bo'lib qoladi
+        Order.objects.filter(pk__in=order_ids).delete()
+        User.objects.filter(username__startswith='bench-db-writes-').delete()
+        category.delete()
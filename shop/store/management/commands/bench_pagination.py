@@ -0,0 +1,59 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.db import transaction
+from store.models import Category, Product
+from store.pagination import paginate_keyset, encode_cursor
+
+
+class Command(BaseCommand):
+    help = 'Compares OFFSET and keyset pagination latency on a synthetic category (changes are rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=12)
+        parser.add_argument('--pages', type=int, nargs='+', default=[1, 100, 10000])
+        parser.add_argument('--sort', default='price')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        total = max(options['pages']) * per_page
+        ordering = [options['sort'], ('-' if options['sort'].startswith('-') else '') + 'pk']
+
+        with transaction.atomic():
+            products = self.create_catalog(total)
+
+            self.stdout.write(f'{total} products, {per_page} per page, ordering {ordering}')
+            for number in options['pages']:
+                offset_time = self.measure(options['repeat'], lambda: list(
+                    Paginator(products.order_by(*ordering), per_page).page(number).object_list))
+
+                cursor = None
+                if number > 1:
+                    previous = products.order_by(*ordering)[(number - 1) * per_page - 1]
+                    cursor = encode_cursor([getattr(previous, field.lstrip('-')) for field in ordering])
+                keyset_time = self.measure(options['repeat'], lambda: paginate_keyset(
+                    products, ordering, cursor=cursor, per_page=per_page).object_list)
+
+                self.stdout.write(f'page {number:>6}: offset {offset_time * 1000:8.2f} ms   '
+                                  f'keyset {keyset_time * 1000:8.2f} ms')
+            transaction.set_rollback(True)
+
+    def create_catalog(self, total):
+        parent = Category.objects.create(title='Benchmark', slug='bench-pagination-parent')
+        category = Category.objects.create(title='Benchmark items', slug='bench-pagination', parent=parent)
+        Product.objects.bulk_create([
+            Product(title=f'Bench {i}', slug=f'bench-pagination-{i}', category=category, price=i % 997,
+                    quantity=1, size=i % 50, color=f'color{i % 13}')
+            for i in range(total)
+        ], batch_size=5000)
+        return Product.objects.filter(category__in=parent.subcategories.all())
+
+    def measure(self, repeat, call):
+        timings = []
+        for i in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
@@ -0,0 +1,110 @@
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from store.models import Category, Product
+from store.search import SearchIndex
+
+WORDS = ('gold silver steel leather classic sport diver chrono automatic quartz bracelet chain ring '
+         'earring watch pearl diamond rose black white blue green vintage modern slim luxury').split()
+LETTERS = 'abdefghiklmnoprstuvyz'
+COLORS = ('black', 'gold', 'silver', 'white', 'blue', 'brown', 'green', 'red')
+CATEGORIES = ('Watches Automatic', 'Watches Quartz', 'Rings Gold', 'Chains', 'Bracelets', 'Earrings')
+
+
+class Command(BaseCommand):
+    help = ('Builds a synthetic full-text index and reports search and autocomplete latency, '
+            'then the /search/ view latency (products are written to the database and rolled back)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1000000)
+        parser.add_argument('--vocabulary', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=2000)
+        parser.add_argument('--view-queries', type=int, default=200, help='Requests to /search/, 0 to skip')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        # View natija sahifasini bazadagi produktlardan chizadi: ular indeks bilan bir xil pk larda
+        # yoziladi va oxirida hammasi orqaga qaytariladi
+        with transaction.atomic():
+            self.bench(options)
+            transaction.set_rollback(True)
+
+    def bench(self, options):
+        rnd = random.Random(options['seed'])
+        # Haqiqiy katalogdagidek: bir nechta juda ko'p uchraydigan so'z va uzun "dum" (Zipf taqsimoti)
+        words = WORDS + [''.join(rnd.choices(LETTERS, k=rnd.randint(4, 9))) for i in range(options['vocabulary'])]
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        category = None
+        if options['view_queries']:
+            category = Category.objects.create(title='Bench search', slug=f'bench-search-{time.time_ns()}')
+        with tempfile.TemporaryDirectory() as directory:
+            index = SearchIndex(os.path.join(directory, 'bench.sqlite3'))
+
+            started = time.perf_counter()
+            batch = []
+            for number in range(1, options['products'] + 1):
+                title = ' '.join(rnd.choices(words, cum_weights=weights, k=3)) + f' {number}'
+                description = ' '.join(rnd.choices(words, cum_weights=weights, k=20))
+                batch.append((number, title, description, rnd.choice(COLORS), rnd.choice(CATEGORIES)))
+                if len(batch) == 50000:
+                    index.index(self.save(batch, category), replace=False)
+                    batch = []
+            if batch:
+                index.index(self.save(batch, category), replace=False)
+            index.optimize()
+            self.stdout.write(f'indexed {options["products"]} products in {time.perf_counter() - started:.1f} s, '
+                              f'{os.path.getsize(index.path) / 2 ** 20:.0f} MB')
+
+            queries = [' '.join(rnd.choices(words, cum_weights=weights, k=rnd.randint(1, 3)))
+                       for i in range(options['queries'])]
+            prefixes = [rnd.choices(words, cum_weights=weights)[0][:rnd.randint(1, 6)] for i in range(options['queries'])]
+            # So'rovlar ham Zipf bo'yicha takrorlanadi; birinchi marta kelganlari alohida ko'rsatiladi
+            self.run('search', index.search, queries, 12)
+            self.run('autocomplete', index.autocomplete, prefixes, 8)
+
+            if options['view_queries']:
+                client = Client(HTTP_HOST='localhost')
+                url = reverse('search')
+
+                def get_page(query, limit):
+                    response = client.get(url, {'q': query})
+                    assert response.status_code == 200, response.status_code
+
+                with override_settings(SEARCH_INDEX_PATH=index.path):
+                    self.run('/search/ view', get_page, queries[:options['view_queries']], None)
+
+    # Indeks qatorlariga bazadagi pk lar qo'yiladi (category bo'lmasa bazaga yozilmaydi)
+    def save(self, batch, category):
+        if category is None:
+            return batch
+        products = Product.objects.bulk_create([
+            Product(title=title, description=description, color=color, category=category, price=10, quantity=1,
+                    size=40, slug=f'{category.slug}-{number}')
+            for number, title, description, color, _ in batch
+        ])
+        return [(product.pk, *row[1:]) for product, row in zip(products, batch)]
+
+    def run(self, name, call, queries, limit):
+        timings, cold, seen = [], [], set()
+        for query in queries:
+            started = time.perf_counter()
+            call(query, limit)
+            timings.append(time.perf_counter() - started)
+            if query not in seen:
+                seen.add(query)
+                cold.append(timings[-1])
+        self.report(name, timings)
+        self.report(f'{name} (cold)', cold)
+
+    def report(self, name, timings):
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(f'{name:>19}: median {statistics.median(timings) * 1000:.2f} ms, '
+                          f'p95 {p95 * 1000:.2f} ms, max {timings[-1] * 1000:.2f} ms')
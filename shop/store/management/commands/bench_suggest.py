@@ -0,0 +1,59 @@
+import itertools
+import random
+import statistics
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from store.management.commands.bench_search import WORDS, LETTERS
+from store.suggest import SuggestIndex, product_item, category_item
+
+
+class Command(BaseCommand):
+    help = 'Builds a synthetic autocomplete index and reports its memory and lookup latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=300000)
+        parser.add_argument('--vocabulary', type=int, default=20000)
+        parser.add_argument('--queries', type=int, default=20000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        words = WORDS + [''.join(rnd.choices(LETTERS, k=rnd.randint(4, 9))) for i in range(options['vocabulary'])]
+        weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+        titles = [' '.join(rnd.choices(words, cum_weights=weights, k=rnd.randint(2, 5))).title()
+                  for i in range(options['titles'])]
+        items = [category_item(pk, title, f'c-{pk}', 1) for pk, title in enumerate(titles[:200], 1)]
+        items += [product_item(pk, title, f'p-{pk}', pk % 5) for pk, title in enumerate(titles, 1)]
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        index = SuggestIndex().build(items)
+        build_time = time.perf_counter() - started
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        self.stdout.write(f'built {len(index)} titles in {build_time:.1f} s, '
+                          f'{memory / 2 ** 20 / len(index) * 100000:.1f} MB per 100k titles')
+
+        # Foydalanuvchi yozayotgan nomdan tasodifiy so'z boshi va 1-8 harf
+        queries = []
+        for i in range(options['queries']):
+            title = rnd.choice(titles).lower().split()
+            start = rnd.randrange(len(title))
+            queries.append(' '.join(title[start:])[:rnd.randint(1, 8)])
+        self.report('lookup', [self.measure(index.lookup, query) for query in queries])
+
+        changes = [(pk, rnd.choice(titles)) for pk in rnd.sample(range(1, len(titles) + 1), 500)]
+        self.report('update', [self.measure(index.add, *product_item(pk, title, f'p-{pk}', 1)) for pk, title in changes])
+        self.report('remove', [self.measure(index.remove, pk * 2) for pk, title in changes])
+
+    def measure(self, call, *args):
+        started = time.perf_counter()
+        call(*args)
+        return time.perf_counter() - started
+
+    def report(self, name, timings):
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        self.stdout.write(f'{name:>8}: median {statistics.median(timings) * 1000:.3f} ms, '
+                          f'p99 {p99 * 1000:.3f} ms, max {timings[-1] * 1000:.3f} ms')
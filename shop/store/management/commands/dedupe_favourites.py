@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from store.models import FavouriteProducts
+
+
+class Command(BaseCommand):
+    help = 'Deletes duplicate favourite rows, keeping the first one for each user and product'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only count the duplicates')
+
+    def handle(self, *args, **options):
+        duplicates = FavouriteProducts.get_duplicates()
+        if options['dry_run']:
+            self.stdout.write(f'{duplicates.count()} duplicate favourites found')
+            return
+        deleted, _ = duplicates.delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} duplicate favourites'))
@@ -0,0 +1,38 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+from store.models import Gallery, Category
+from store.thumbnails import create_thumbnails, save_hash
+
+
+class Command(BaseCommand):
+    help = 'Creates missing thumbnails for product and category images on all CPU cores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Check images that already have thumbnails too')
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+
+    def handle(self, *args, **options):
+        jobs = []
+        for model in (Gallery, Category):
+            images = model.objects.exclude(image='').exclude(image__isnull=True)
+            if not options['all']:
+                images = images.filter(Q(image_hash='') | Q(preview_color=''))
+            jobs += [(model, pk, name) for pk, name in images.values_list('pk', 'image')]
+
+        # Rasmlar alohida processlarda kesiladi (Pillow CPU ni band qiladi), bazaga faqat shu process yozadi
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            futures = {pool.submit(create_thumbnails, name): (model, pk, name) for model, pk, name in jobs}
+            for future in as_completed(futures):
+                model, pk, name = futures[future]
+                try:
+                    save_hash(model, pk, name, *future.result())
+                    done += 1
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Thumbnails ready for {done} images, {failed} failed'))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from store import payments
+
+
+class Command(BaseCommand):
+    help = 'Processes queued Stripe webhook events (run with --loop as a background worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling the queue')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--batch', type=int, default=100)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = payments.process_payment_events(limit=options['batch'])
+            if processed:
+                self.stdout.write(f'Processed {processed} payment events')
+            if not options['loop']:
+                break
+            if not processed:
+                time.sleep(options['sleep'])
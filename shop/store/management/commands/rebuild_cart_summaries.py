@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from store.models import Order
+from store.stock import refresh_cart_summary
+
+
+class Command(BaseCommand):
+    help = 'Recalculates the stored quantity and price of every cart from its lines'
+
+    def handle(self, *args, **options):
+        updated = refresh_cart_summary(Order.objects.all())
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {updated} cart summaries'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from store import search
+from store.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text product search index from the database'
+
+    def handle(self, *args, **options):
+        search.rebuild(Product.objects.order_by('pk'))
+        self.stdout.write(self.style.SUCCESS(f'Indexed {Product.objects.count()} products'))
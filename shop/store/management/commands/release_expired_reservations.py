@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from store import stock
+
+
+class Command(BaseCommand):
+    help = 'Returns products from abandoned carts back to stock'
+
+    def handle(self, *args, **options):
+        released = stock.release_expired()
+        self.stdout.write(self.style.SUCCESS(f'Released {released} reserved products'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from store import payments
+from store.models import PaymentEvent
+
+
+class Command(BaseCommand):
+    help = 'Puts stored Stripe webhook events back into the processing queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument('event_ids', nargs='*', help='Stripe event ids to replay')
+        parser.add_argument('--failed', action='store_true', help='Replay every failed event')
+        parser.add_argument('--stuck', action='store_true', help='Replay events left in processing by a dead worker')
+        parser.add_argument('--process', action='store_true', help='Process the replayed events right away')
+
+    def handle(self, *args, **options):
+        statuses = []
+        if options['failed']:
+            statuses.append(PaymentEvent.FAILED)
+        if options['stuck']:
+            statuses.append(PaymentEvent.PROCESSING)
+        if not options['event_ids'] and not statuses:
+            raise CommandError('Give event ids, --failed or --stuck')
+
+        events = PaymentEvent.objects.none()
+        if options['event_ids']:
+            events = events | PaymentEvent.objects.filter(event_id__in=options['event_ids'])
+        if statuses:
+            events = events | PaymentEvent.objects.filter(status__in=statuses)
+
+        replayed = payments.replay_payment_events(events)
+        self.stdout.write(self.style.SUCCESS(f'Replayed {replayed} payment events'))
+        if options['process']:
+            processed = payments.process_payment_events(limit=replayed or 1)
+            self.stdout.write(f'Processed {processed} payment events')
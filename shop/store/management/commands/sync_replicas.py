@@ -0,0 +1,39 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = 'Copies the primary SQLite database into the replica files (a local stand-in for replication)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Repeat every N seconds (replication lag); by default copies once')
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('The replication stand-in only works with the sqlite profile')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('STORE_DB_REPLICAS is not set')
+
+        while True:
+            started = time.perf_counter()
+            for alias in settings.DATABASE_REPLICAS:
+                self.copy(settings.DATABASES['default']['NAME'], settings.DATABASES[alias]['NAME'])
+            self.stdout.write(f'{len(settings.DATABASE_REPLICAS)} replicas synced '
+                              f'in {(time.perf_counter() - started) * 1000:.0f} ms')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
+
+    # SQLite backup API: asosiy baza yozilayotgan paytda ham izchil nusxa oladi
+    def copy(self, source_name, target_name):
+        source = sqlite3.connect(source_name)
+        target = sqlite3.connect(target_name)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
@@ -0,0 +1,71 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+from store.stripe_fake import sign_payload, make_checkout_completed_event
+
+
+class Command(BaseCommand):
+    help = 'Sends a burst of signed checkout.session.completed events to the Stripe webhook'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=1000)
+        parser.add_argument('--duplicates', type=int, default=2, help='Times every event is delivered')
+        parser.add_argument('--url', help='Webhook URL of a running server; by default an in-process '
+                                          'client is used and all writes are rolled back')
+        parser.add_argument('--concurrency', type=int, default=16, help='Only used with --url')
+        parser.add_argument('--order-id', type=int, default=0, help='Order referenced by the events')
+
+    def handle(self, *args, **options):
+        secret = settings.STRIPE_WEBHOOK_SECRET
+        if not secret:
+            raise CommandError('STRIPE_WEBHOOK_SECRET is not set')
+
+        payloads = [make_checkout_completed_event(options['order_id']) for i in range(options['events'])]
+        deliveries = [payload for payload in payloads for attempt in range(options['duplicates'])]
+
+        started = time.perf_counter()
+        if options['url']:
+            latencies, statuses = self.send_over_http(options['url'], deliveries, secret, options['concurrency'])
+        else:
+            latencies, statuses = self.send_in_process(deliveries, secret)
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        self.stdout.write(f'deliveries: {len(deliveries)}, statuses: {sorted(set(statuses))}')
+        self.stdout.write(f'throughput: {len(deliveries) / elapsed:.1f} events/s')
+        self.stdout.write(f'p50: {latencies[len(latencies) // 2] * 1000:.2f} ms, '
+                          f'p99: {latencies[int(len(latencies) * 0.99) - 1] * 1000:.2f} ms')
+
+    def send_in_process(self, deliveries, secret):
+        client = Client(HTTP_HOST='localhost')
+        url = reverse('stripe_webhook')
+        latencies, statuses = [], []
+        with transaction.atomic():
+            for payload in deliveries:
+                started = time.perf_counter()
+                response = client.post(url, payload, content_type='application/json',
+                                       HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret))
+                latencies.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+            transaction.set_rollback(True)
+        return latencies, statuses
+
+    def send_over_http(self, url, deliveries, secret, concurrency):
+        import requests
+        session = requests.Session()
+
+        def send(payload):
+            started = time.perf_counter()
+            response = session.post(url, data=payload, headers={
+                'Content-Type': 'application/json',
+                'Stripe-Signature': sign_payload(payload, secret),
+            })
+            return time.perf_counter() - started, response.status_code
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(send, deliveries))
+        return [r[0] for r in results], [r[1] for r in results]
@@ -1,59 +1,59 @@
-# Generated by Django 4.2.17 on 2024-12-05 09:38
-
-from django.db import migrations, models
-import django.db.models.deletion
-
-
-class Migration(migrations.Migration):
-
-    initial = True
-
-    dependencies = [
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='Category',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('title', models.CharField(max_length=150, verbose_name='Name of category')),
-                ('image', models.ImageField(blank=True, null=True, upload_to='categories/', verbose_name='Pictures')),
-                ('slug', models.SlugField(null=True, unique=True)),
-                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subcategories', to='store.category', verbose_name='Category')),
-            ],
-            options={
-                'verbose_name': 'Category',
-                'verbose_name_plural': 'Categories',
-            },
-        ),
-        migrations.CreateModel(
-            name='Product',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('title', models.CharField(max_length=150, verbose_name='Name of product')),
-                ('price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Price')),
-                ('quantity', models.IntegerField(default=0, verbose_name='Quantity')),
-                ('description', models.TextField(default='Soon...', verbose_name='Content')),
-                ('slug', models.SlugField(null=True, unique=True)),
-                ('size', models.FloatField(verbose_name='Size')),
-                ('color', models.CharField(max_length=40, verbose_name='Color')),
-                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='store.category', verbose_name='Category')),
-            ],
-            options={
-                'verbose_name': 'Product',
-                'verbose_name_plural': 'Products',
-            },
-        ),
-        migrations.CreateModel(
-            name='Gallery',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('image', models.ImageField(upload_to='products/', verbose_name='Images')),
-                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='store.product')),
-            ],
-            options={
-                'verbose_name': 'Picture',
-                'verbose_name_plural': 'Pictures',
-            },
-        ),
-    ]
+# Generated by Django 4.2.17 on 2024-12-05 09:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150, verbose_name='Name of category')),
+                ('image', models.ImageField(blank=True, null=True, upload_to='categories/', verbose_name='Pictures')),
+                ('slug', models.SlugField(null=True, unique=True)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subcategories', to='store.category', verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Category',
+                'verbose_name_plural': 'Categories',
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('title', models.CharField(max_length=150, verbose_name='Name of product')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Price')),
+                ('quantity', models.IntegerField(default=0, verbose_name='Quantity')),
+                ('description', models.TextField(default='Soon...', verbose_name='Content')),
+                ('slug', models.SlugField(null=True, unique=True)),
+                ('size', models.FloatField(verbose_name='Size')),
+                ('color', models.CharField(max_length=40, verbose_name='Color')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='store.category', verbose_name='Category')),
+            ],
+            options={
+                'verbose_name': 'Product',
+                'verbose_name_plural': 'Products',
+            },
+        ),
+        migrations.CreateModel(
+            name='Gallery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ImageField(upload_to='products/', verbose_name='Images')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='store.product')),
+            ],
+            options={
+                'verbose_name': 'Picture',
+                'verbose_name_plural': 'Pictures',
+            },
+        ),
+    ]
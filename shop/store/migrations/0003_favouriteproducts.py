@@ -1,28 +1,28 @@
-# Generated by Django 4.2.17 on 2025-01-09 09:20
-
-from django.conf import settings
-from django.db import migrations, models
-import django.db.models.deletion
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-        ('store', '0002_review'),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='FavouriteProducts',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.product', verbose_name='Product')),
-                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Person')),
-            ],
-            options={
-                'verbose_name': 'Favourite product',
-                'verbose_name_plural': 'Favourite products',
-            },
-        ),
-    ]
+# Generated by Django 4.2.17 on 2025-01-09 09:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0002_review'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FavouriteProducts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='store.product', verbose_name='Product')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='Person')),
+            ],
+            options={
+                'verbose_name': 'Favourite product',
+                'verbose_name_plural': 'Favourite products',
+            },
+        ),
+    ]
@@ -1,74 +1,74 @@
-# Generated by Django 4.2.17 on 2025-01-16 09:23
-
-from django.conf import settings
-from django.db import migrations, models
-import django.db.models.deletion
-import phonenumber_field.modelfields
-
-
-class Migration(migrations.Migration):
-
-    dependencies = [
-        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
-        ('store', '0003_favouriteproducts'),
-    ]
-
-    operations = [
-        migrations.CreateModel(
-            name='Customer',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('name', models.CharField(max_length=200, verbose_name='Name of customer')),
-                ('email', models.EmailField(max_length=254, verbose_name='Email of customer')),
-                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Customer')),
-            ],
-            options={
-                'verbose_name': 'Customer',
-                'verbose_name_plural': 'Customers',
-            },
-        ),
-        migrations.CreateModel(
-            name='Order',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date of order')),
-                ('shipping', models.BooleanField(default=True, verbose_name='Shipping')),
-                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.customer', verbose_name='Customer')),
-            ],
-            options={
-                'verbose_name': 'Order',
-                'verbose_name_plural': 'Orders',
-            },
-        ),
-        migrations.CreateModel(
-            name='ShippingAddress',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('address', models.CharField(max_length=200)),
-                ('city', models.CharField(max_length=200)),
-                ('region', models.CharField(max_length=200)),
-                ('phone', phonenumber_field.modelfields.PhoneNumberField(max_length=200, region=None, verbose_name='Phone number')),
-                ('created_at', models.DateTimeField(auto_now_add=True)),
-                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.customer')),
-                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.order')),
-            ],
-            options={
-                'verbose_name': 'Address of shipping',
-                'verbose_name_plural': 'Address of shippings',
-            },
-        ),
-        migrations.CreateModel(
-            name='OrderProduct',
-            fields=[
-                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                ('quantity', models.IntegerField(blank=True, default=0, null=True, verbose_name='Quantity')),
-                ('added_at', models.DateTimeField(auto_now_add=True)),
-                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.order', verbose_name='Order')),
-                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.product', verbose_name='Product')),
-            ],
-            options={
-                'verbose_name': 'Product in order',
-                'verbose_name_plural': 'Product in orders',
-            },
-        ),
-    ]
+# Generated by Django 4.2.17 on 2025-01-16 09:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import phonenumber_field.modelfields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('store', '0003_favouriteproducts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Customer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='Name of customer')),
+                ('email', models.EmailField(max_length=254, verbose_name='Email of customer')),
+                ('user', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Customer',
+                'verbose_name_plural': 'Customers',
+            },
+        ),
+        migrations.CreateModel(
+            name='Order',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Date of order')),
+                ('shipping', models.BooleanField(default=True, verbose_name='Shipping')),
+                ('customer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.customer', verbose_name='Customer')),
+            ],
+            options={
+                'verbose_name': 'Order',
+                'verbose_name_plural': 'Orders',
+            },
+        ),
+        migrations.CreateModel(
+            name='ShippingAddress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address', models.CharField(max_length=200)),
+                ('city', models.CharField(max_length=200)),
+                ('region', models.CharField(max_length=200)),
+                ('phone', phonenumber_field.modelfields.PhoneNumberField(max_length=200, region=None, verbose_name='Phone number')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('customer', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.customer')),
+                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.order')),
+            ],
+            options={
+                'verbose_name': 'Address of shipping',
+                'verbose_name_plural': 'Address of shippings',
+            },
+        ),
+        migrations.CreateModel(
+            name='OrderProduct',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(blank=True, default=0, null=True, verbose_name='Quantity')),
+                ('added_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.order', verbose_name='Order')),
+                ('product', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to='store.product', verbose_name='Product')),
+            ],
+            options={
+                'verbose_name': 'Product in order',
+                'verbose_name_plural': 'Product in orders',
+            },
+        ),
+    ]
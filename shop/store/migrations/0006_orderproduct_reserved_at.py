@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_remove_customer_email_customer_last_name_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderproduct',
+            name='reserved_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Reserved at'),
+        ),
+    ]
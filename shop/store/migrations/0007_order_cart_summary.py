@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:39
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_cart_summaries(apps, schema_editor):
+    Order = apps.get_model('store', 'Order')
+    OrderProduct = apps.get_model('store', 'OrderProduct')
+    totals = OrderProduct.objects.filter(order__isnull=False).values('order').annotate(
+        total_quantity=Sum('quantity'),
+        total_price=Sum(F('quantity') * F('product__price'), output_field=models.DecimalField(max_digits=14, decimal_places=2))
+    )
+    for row in totals:
+        Order.objects.filter(pk=row['order']).update(total_quantity=row['total_quantity'] or 0,
+                                                     total_price=row['total_price'] or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_orderproduct_reserved_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='total_price',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Cart price'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total_quantity',
+            field=models.IntegerField(default=0, verbose_name='Products in cart'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Last change of cart'),
+        ),
+        migrations.RunPython(fill_cart_summaries, migrations.RunPython.noop),
+    ]
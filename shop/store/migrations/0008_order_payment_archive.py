@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_order_cart_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='is_paid',
+            field=models.BooleanField(default=False, verbose_name='Paid'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='paid_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date of payment'),
+        ),
+        migrations.AddField(
+            model_name='orderproduct',
+            name='price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True, verbose_name='Price'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'is_paid'], name='store_order_custome_80131b_idx'),
+        ),
+    ]
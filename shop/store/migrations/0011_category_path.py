@@ -0,0 +1,37 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+def fill_category_paths(apps, schema_editor):
+    Category = apps.get_model('store', 'Category')
+    level = list(Category.objects.filter(parent=None))
+    paths = {}
+    depth = 0
+    while level:
+        for category in level:
+            paths[category.pk] = f'{paths.get(category.parent_id, "")}{category.pk}/'
+            Category.objects.filter(pk=category.pk).update(path=paths[category.pk], depth=depth)
+        level = list(Category.objects.filter(parent__in=level))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_product_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_category_paths, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_category_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='image_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+    ]
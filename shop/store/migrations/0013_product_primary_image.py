@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:26
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+
+# Mavjud produktlarga birinchi rasmini yozadi (position hamma joyda 0, tartib pk bo'yicha qoladi)
+def fill_primary_images(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Gallery = apps.get_model('store', 'Gallery')
+    first_image = Gallery.objects.filter(product=OuterRef('pk')).order_by('position', 'pk').values('pk')[:1]
+    Product.objects.update(primary_image=Subquery(first_image))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_image_hash'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='gallery',
+            options={'ordering': ('position', 'pk'), 'verbose_name': 'Picture', 'verbose_name_plural': 'Pictures'},
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='position',
+            field=models.PositiveIntegerField(default=0, verbose_name='Order'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='primary_image',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='store.gallery', verbose_name='Main picture'),
+        ),
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['product', 'position'], name='store_galle_product_811d69_idx'),
+        ),
+        migrations.RunPython(fill_primary_images, migrations.RunPython.noop),
+    ]
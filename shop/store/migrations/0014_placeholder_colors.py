@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:29
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_product_primary_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='placeholder_color',
+            field=models.CharField(blank=True, default='', help_text='#rrggbb', max_length=7, validators=[django.core.validators.RegexValidator('^#[0-9a-fA-F]{6}$')], verbose_name='Placeholder color'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='preview_color',
+            field=models.CharField(blank=True, default='', editable=False, max_length=7),
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='preview_color',
+            field=models.CharField(blank=True, default='', editable=False, max_length=7),
+        ),
+    ]
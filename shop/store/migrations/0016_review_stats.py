@@ -0,0 +1,41 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:36
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Mavjud sharhlar sonini va oxirgi sharh vaqtini produktlarga yozadi
+def fill_review_stats(apps, schema_editor):
+    Product = apps.get_model('store', 'Product')
+    Review = apps.get_model('store', 'Review')
+    reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+    Product.objects.update(
+        review_count=Coalesce(Subquery(reviews.annotate(total=Count('pk')).values('total')), 0),
+        last_review_at=Subquery(reviews.annotate(last=Max('created_at')).values('last'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0015_product_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='last_review_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Last review'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Reviews'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', 'created_at'], name='store_revie_product_275c2b_idx'),
+        ),
+        migrations.RunPython(fill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:38
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+# Unique indeksdan oldin takroriy qatorlar o'chiriladi (birinchi bosilgani qoladi)
+def remove_duplicates(apps, schema_editor):
+    FavouriteProducts = apps.get_model('store', 'FavouriteProducts')
+    earlier = FavouriteProducts.objects.filter(user=OuterRef('user'), product=OuterRef('product'), pk__lt=OuterRef('pk'))
+    FavouriteProducts.objects.filter(Exists(earlier)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0016_review_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='favouriteproducts',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_favourite_product'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 15:44
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0017_unique_favourites'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favouriteproducts',
+            name='added_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Favourited at'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='favouriteproducts',
+            index=models.Index(fields=['user', 'added_at'], name='store_favou_user_id_28e931_idx'),
+        ),
+    ]
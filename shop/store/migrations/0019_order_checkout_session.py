@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0018_favourite_added_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='checkout_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True, verbose_name='Checkout amount'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='checkout_session_id',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Checkout session'),
+        ),
+    ]
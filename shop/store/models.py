@@ -1,181 +1,388 @@
-from django.db import models
-from django.urls import reverse
-from django.contrib.auth.models import User
-from phonenumber_field.modelfields import PhoneNumberField
-
-
-class Category(models.Model):
-    title = models.CharField(max_length=150, verbose_name='Name of category')
-    image = models.ImageField(upload_to='categories/', null=True, blank=True, verbose_name='Pictures')
-    slug = models.SlugField(unique=True, null=True)
-    parent = models.ForeignKey('self',
-                               on_delete=models.CASCADE,
-                               null=True, blank=True,
-                               verbose_name='Category',
-                               related_name='subcategories')
-
-    def get_absolute_url(self):
-        return reverse('category_detail', kwargs={'slug': self.slug})
-
-    def get_image(self):
-        if self.image:
-            return self.image.url
-        else:
-            return 'https://cdn1.ozone.ru/s3/multimedia-0/6073071648.jpg'
-
-    def __str__(self):
-        return self.title
-
-    def __repr__(self):
-        return f'Category: pk={self.pk}, title={self.title}'
-
-    class Meta:
-        verbose_name = 'Category'
-        verbose_name_plural = 'Categories'
-
-
-class Product(models.Model):
-    title = models.CharField(max_length=150, verbose_name='Name of product')
-    price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Price')
-    quantity = models.IntegerField(default=0, verbose_name='Quantity')
-    description = models.TextField(default='Soon...', verbose_name='Content')
-    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Category', related_name='products')
-    slug = models.SlugField(unique=True, null=True)
-    size = models.FloatField(verbose_name='Size')
-    color = models.CharField(max_length=40, verbose_name='Color')
-
-    def get_absolute_url(self):
-        return reverse('product_detail', kwargs={'slug': self.slug})
-
-    def get_first_photo(self):
-        if self.images:
-            try:
-                return self.images.first().image.url
-            except:
-                return 'https://cdn1.ozone.ru/s3/multimedia-0/6073071648.jpg'
-        else:
-            return 'https://cdn1.ozone.ru/s3/multimedia-0/6073071648.jpg'
-
-    def __str__(self):
-        return self.title
-
-    def __repr__(self):
-        return f'Product: pk={self.pk}, title={self.title}, price={self.price}'
-
-    class Meta:
-        verbose_name = 'Product'
-        verbose_name_plural = 'Products'
-
-
-class Gallery(models.Model):
-    image = models.ImageField(upload_to='products/', verbose_name='Images')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
-
-    class Meta:
-        verbose_name = 'Picture'
-        verbose_name_plural = 'Pictures'
-
-
-class Review(models.Model):
-    text = models.TextField(verbose_name='Typing')
-    author = models.ForeignKey(User, on_delete=models.CASCADE)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
-    created_at = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return self.author.username
-
-    class Meta:
-        verbose_name = 'Comment'
-        verbose_name_plural = 'Comments'
-
-
-# Produktga like bosish
-class FavouriteProducts(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Person')
-    product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name='Product')
-
-    def __str__(self):
-        return self.product.title
-
-    class Meta:
-        verbose_name = 'Favourite product'
-        verbose_name_plural = 'Favourite products'
-
-
-class Customer(models.Model):
-    user = models.OneToOneField(User, on_delete=models.SET_NULL, blank=True, null=True, verbose_name='Customer')
-    name = models.CharField(max_length=200, verbose_name='Name of customer')
-    user_name = models.CharField(max_length=200, verbose_name='Name of customer', default='')
-    last_name = models.CharField(max_length=200, verbose_name='Lastname of customer', default='')
-
-    def __str__(self):
-        return self.name
-
-    class Meta:
-        verbose_name = 'Customer'
-        verbose_name_plural = 'Customers'
-
-
-class Order(models.Model):
-    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, blank=True, null=True, verbose_name='Customer')
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Date of order')
-    shipping = models.BooleanField(default=True, verbose_name='Shipping')
-
-    def __str__(self):
-        return str(self.pk) + ' '
-
-    class Meta:
-        verbose_name = 'Order'
-        verbose_name_plural = 'Orders'
-
-    # Zakazga chiqqan produktlarni pulini xisoblidi
-    @property
-    def get_cart_total_price(self):
-        order_products = self.orderproduct_set.all()
-        total_price = sum([product.get_total_price for product in order_products])  # Produktlar summasi umumiysi
-        return total_price
-
-    # Zakazga chiqqan produktlarni sonini xisoblidi
-    @property
-    def get_cart_total_quantity(self):
-        order_products = self.orderproduct_set.all()
-        total_quantity = sum([product.quantity for product in order_products])  # Produktlar sonini umumiysi
-        return total_quantity
-
-
-class OrderProduct(models.Model):
-    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, verbose_name='Product')
-    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, verbose_name='Order')
-    quantity = models.IntegerField(default=0, null=True, blank=True, verbose_name='Quantity')
-    added_at = models.DateTimeField(auto_now_add=True)
-
-    class Meta:
-        verbose_name = 'Product in order'
-        verbose_name_plural = 'Product in orders'
-
-    @property
-    def get_total_price(self):
-        total_price = self.product.price * self.quantity
-        return total_price
-
-
-class ShippingAddress(models.Model):
-    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True)
-    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True)
-    address = models.CharField(max_length=200)
-    city = models.CharField(max_length=200)
-    region = models.CharField(max_length=200)
-    phone = PhoneNumberField(max_length=200, verbose_name='Phone number')
-    created_at = models.DateTimeField(auto_now_add=True)
-
-
-    def __str__(self):
-        return self.address
-
-    class Meta:
-        verbose_name = 'Address of shipping'
-        verbose_name_plural = 'Address of shippings'
-
-
-
+from django.db import models, router, transaction
+from django.db.models import Sum, F, Value, OuterRef, Subquery, Exists
+from django.db.models.functions import Coalesce, Concat, Substr
+from django.utils.functional import cached_property
+from django.urls import reverse
+from django.core.files.storage import default_storage
+from django.contrib.auth.models import User
+from phonenumber_field.modelfields import PhoneNumberField
+from django.core.validators import RegexValidator
+from .thumbnails import get_thumbnail_name, get_srcset
+from .placeholders import get_placeholder_url, get_category_color
+
+
+# Kichraytirilgan nusxalari bor rasm (image maydoni bor modellar uchun). image_hash kesilgan
+# nusxalar tayyor bo'lgach yoziladi, unga qadar asl rasm ko'rsatiladi
+class ThumbnailedImage(models.Model):
+    image_hash = models.CharField(max_length=40, blank=True, default='', editable=False)
+    # Rasmning o'rtacha rangi: rasm yuklanguncha uning o'rnida ko'rinadi
+    preview_color = models.CharField(max_length=7, blank=True, default='', editable=False)
+
+    class Meta:
+        abstract = True
+
+    def get_thumbnail_url(self, width=320, extension='jpeg'):
+        if self.image_hash:
+            return default_storage.url(get_thumbnail_name(self.image_hash, width, extension))
+        return self.image.url
+
+    @property
+    def webp_srcset(self):
+        return get_srcset(self.image_hash, 'webp') if self.image_hash else ''
+
+    @property
+    def jpeg_srcset(self):
+        return get_srcset(self.image_hash, 'jpeg') if self.image_hash else ''
+
+
+class Category(ThumbnailedImage):
+    title = models.CharField(max_length=150, verbose_name='Name of category')
+    image = models.ImageField(upload_to='categories/', null=True, blank=True, verbose_name='Pictures')
+    slug = models.SlugField(unique=True, null=True)
+    parent = models.ForeignKey('self',
+                               on_delete=models.CASCADE,
+                               null=True, blank=True,
+                               verbose_name='Category',
+                               related_name='subcategories')
+    # Materiallashgan yo'l: "1/4/9/" (ota-bobolar pk lari). Save da yangilanadi,
+    # barcha avlodlar path__startswith bilan bitta so'rovda topiladi
+    path = models.CharField(max_length=255, default='', editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    # Rasmi yo'q produkt va kategoriyalar shu rangdagi placeholder bilan chiqadi (bo'sh bo'lsa ota kategoriyaniki)
+    placeholder_color = models.CharField(max_length=7, blank=True, default='', verbose_name='Placeholder color',
+                                         validators=[RegexValidator(r'^#[0-9a-fA-F]{6}$')],
+                                         help_text='#rrggbb')
+
+    # path yozuv bilan bitta tranzaksiyada va post_save dan oldin yoziladi: signal qabul
+    # qiluvchilar (suggest, qidiruv) bo'sh path ko'rmaydi
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using') or router.db_for_write(Category, instance=self)):
+            super().save(*args, **kwargs)
+
+    def _save_table(self, raw=False, *args, **kwargs):
+        updated = super()._save_table(raw, *args, **kwargs)
+        if not raw:  # loaddata path ni fixture dan oladi
+            self.update_path()
+        return updated
+
+    # Ota yo'li yozilayotgan bazadan o'qiladi: replika hali eski yo'lni berishi mumkin
+    def update_path(self):
+        categories = Category.objects.using(self._state.db)
+        parent_path = ''
+        if self.parent_id:
+            parent_path = categories.filter(pk=self.parent_id).values_list('path', flat=True).get()
+        path = f'{parent_path}{self.pk}/'
+        if path == self.path:
+            return
+
+        old_path, old_depth = self.path, self.depth
+        self.path, self.depth = path, path.count('/') - 1
+        categories.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        if old_path:  # butun shox (avlodlar) bilan birga ko'chadi
+            categories.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (self.depth - old_depth)
+            )
+
+    # Shu kategoriya va uning barcha avlodlaridagi produktlar, bitta so'rov
+    def get_descendant_products(self):
+        if not self.path:  # saqlanmagan kategoriya: bo'sh prefiks butun katalogga mos keladi
+            return Product.objects.none()
+        return Product.objects.filter(category__path__startswith=self.path)
+
+    # Breadcrumbs uchun ota-bobolar (o'zi ham), ildizdan boshlab, bitta so'rov
+    def get_ancestors(self):
+        ids = [int(pk) for pk in self.path.split('/') if pk]
+        return Category.objects.filter(pk__in=ids).order_by('depth')
+
+    def get_absolute_url(self):
+        return reverse('category_detail', kwargs={'slug': self.slug})
+
+    def get_image(self):
+        if self.image:
+            return self.get_thumbnail_url(640)
+        else:
+            return get_placeholder_url(get_category_color(self.pk), 640, 400)
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f'Category: pk={self.pk}, title={self.title}'
+
+    class Meta:
+        verbose_name = 'Category'
+        verbose_name_plural = 'Categories'
+
+
+class Product(models.Model):
+    title = models.CharField(max_length=150, verbose_name='Name of product')
+    price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name='Price')
+    quantity = models.IntegerField(default=0, verbose_name='Quantity')
+    description = models.TextField(default='Soon...', verbose_name='Content')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, verbose_name='Category', related_name='products')
+    slug = models.SlugField(unique=True, null=True)
+    size = models.FloatField(verbose_name='Size')
+    color = models.CharField(max_length=40, verbose_name='Color')
+    # Birinchi rasm (Gallery.position bo'yicha), Gallery saqlansa/o'chirilsa signal orqali yangilanadi.
+    # select_related('primary_image') bilan kartochka va savat rasm uchun alohida so'rov qilmaydi
+    primary_image = models.ForeignKey('Gallery', on_delete=models.SET_NULL, null=True, blank=True,
+                                      editable=False, related_name='+', verbose_name='Main picture')
+    # Kartochkada ko'rinadigan narsa (narx, ombor, rasm...) o'zgarsa oshadi: cache dagi kartochka kaliti
+    # shu raqam bilan (store.cards). Queryset.update qiladigan joylar ham F('version') + 1 yozadi
+    version = models.PositiveIntegerField(default=1, editable=False)
+    # Sharhlar soni va oxirgisi vaqti: save_review yangilaydi, sahifada COUNT(*) qilinmaydi
+    review_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='Reviews')
+    last_review_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Last review')
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    def get_absolute_url(self):
+        return reverse('product_detail', kwargs={'slug': self.slug})
+
+    def get_first_image(self):
+        return self.primary_image if self.primary_image_id else None
+
+    # Berilgan produktlarning primary_image ini bitta UPDATE bilan qayta hisoblaydi
+    @classmethod
+    def refresh_primary_images(cls, products):
+        first_image = Gallery.objects.filter(product=OuterRef('pk')).order_by('position', 'pk').values('pk')[:1]
+        products.update(primary_image=Subquery(first_image), version=F('version') + 1)
+
+    # Sharhlar soni va oxirgi sharh vaqtini qatorlardan qayta hisoblaydi (sharh o'chirilganda, migratsiyada)
+    @classmethod
+    def refresh_review_stats(cls, products):
+        reviews = Review.objects.filter(product=OuterRef('pk')).order_by().values('product')
+        products.update(
+            review_count=Coalesce(Subquery(reviews.annotate(total=models.Count('pk')).values('total')), 0),
+            last_review_at=Subquery(reviews.annotate(last=models.Max('created_at')).values('last'))
+        )
+
+    def get_first_photo(self):
+        image = self.get_first_image()
+        if image:
+            return image.get_thumbnail_url()
+        else:
+            return get_placeholder_url(get_category_color(self.category_id), 320, 320)
+
+    def __str__(self):
+        return self.title
+
+    def __repr__(self):
+        return f'Product: pk={self.pk}, title={self.title}, price={self.price}'
+
+    class Meta:
+        verbose_name = 'Product'
+        verbose_name_plural = 'Products'
+        # Kategoriya sahifasidagi saralash va filtrlar uchun (store.catalog.SORTERS)
+        indexes = [
+            models.Index(fields=['category', 'price']),
+            models.Index(fields=['category', 'size']),
+            models.Index(fields=['category', 'color']),
+        ]
+
+
+class Gallery(ThumbnailedImage):
+    image = models.ImageField(upload_to='products/', verbose_name='Images')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
+    position = models.PositiveIntegerField(default=0, verbose_name='Order')
+
+    class Meta:
+        verbose_name = 'Picture'
+        verbose_name_plural = 'Pictures'
+        ordering = ('position', 'pk')
+        indexes = [
+            models.Index(fields=['product', 'position']),
+        ]
+
+
+class Review(models.Model):
+    text = models.TextField(verbose_name='Typing')
+    author = models.ForeignKey(User, on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.author.username
+
+    class Meta:
+        verbose_name = 'Comment'
+        verbose_name_plural = 'Comments'
+        # Produkt sahifasidagi sharhlar: yangisidan eskisiga, kursor bilan (store.views.REVIEW_ORDERING)
+        indexes = [
+            models.Index(fields=['product', 'created_at']),
+        ]
+
+
+# Produktga like bosish
+class FavouriteProducts(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='Person')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, verbose_name='Product')
+    added_at = models.DateTimeField(auto_now_add=True, verbose_name='Favourited at')
+
+    def __str__(self):
+        return self.product.title
+
+    # Like ni almashtiradi va yangi holatni qaytaradi: bor bo'lsa bitta DELETE, bo'lmasa bitta INSERT.
+    # Ikki marta tez bosilsa ham unique indeks ikkinchi qatorga yo'l qo'ymaydi (ignore_conflicts)
+    @classmethod
+    def toggle(cls, user, product_id):
+        deleted, _ = cls.objects.filter(user=user, product_id=product_id).delete()
+        if deleted:
+            return False
+        cls.objects.bulk_create([cls(user=user, product_id=product_id)], ignore_conflicts=True)
+        return True
+
+    # Bir xil (user, product) qatorlaridan birinchisidan keyingilari
+    @classmethod
+    def get_duplicates(cls):
+        earlier = cls.objects.filter(user=OuterRef('user'), product=OuterRef('product'), pk__lt=OuterRef('pk'))
+        return cls.objects.filter(Exists(earlier))
+
+    class Meta:
+        verbose_name = 'Favourite product'
+        verbose_name_plural = 'Favourite products'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_favourite_product'),
+        ]
+        # Sevimlilar sahifasi: oxirgi like bosilganidan boshlab, kursor bilan
+        indexes = [
+            models.Index(fields=['user', 'added_at']),
+        ]
+
+
+class Customer(models.Model):
+    user = models.OneToOneField(User, on_delete=models.SET_NULL, blank=True, null=True, verbose_name='Customer')
+    name = models.CharField(max_length=200, verbose_name='Name of customer')
+    user_name = models.CharField(max_length=200, verbose_name='Name of customer', default='')
+    last_name = models.CharField(max_length=200, verbose_name='Lastname of customer', default='')
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = 'Customer'
+        verbose_name_plural = 'Customers'
+
+
+class Order(models.Model):
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, blank=True, null=True, verbose_name='Customer')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Date of order')
+    shipping = models.BooleanField(default=True, verbose_name='Shipping')
+    # Savat xulosasi (header uchun), stock.reserve/release bilan birga yangilanadi
+    total_quantity = models.IntegerField(default=0, verbose_name='Products in cart')
+    total_price = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Cart price')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Last change of cart')
+    # Tolangan zakazlar o'chirilmaydi, tarix sifatida qoladi
+    is_paid = models.BooleanField(default=False, verbose_name='Paid')
+    paid_at = models.DateTimeField(null=True, blank=True, verbose_name='Date of payment')
+    # Oxirgi Stripe sessiyasi va undagi summa: webhook to'langan summani hozirgi narxlar bilan emas, shu bilan solishtiradi
+    checkout_session_id = models.CharField(max_length=255, blank=True, verbose_name='Checkout session')
+    checkout_amount = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True,
+                                          verbose_name='Checkout amount')
+
+    def __str__(self):
+        return str(self.pk) + ' '
+
+    class Meta:
+        verbose_name = 'Order'
+        verbose_name_plural = 'Orders'
+        indexes = [
+            models.Index(fields=['customer', 'is_paid']),
+        ]
+
+    # Savatdagi produktlar summasi va sonini bitta aggregate so'rov bilan xisoblidi,
+    # natija shu order obyektida saqlanadi (cart va checkout qayta xisoblamaydi)
+    @cached_property
+    def cart_totals(self):
+        totals = self.orderproduct_set.aggregate(
+            total_price=Sum(F('quantity') * Coalesce('price', 'product__price'),
+                            output_field=models.DecimalField(max_digits=14, decimal_places=2)),
+            total_quantity=Sum('quantity')
+        )
+        return {
+            'total_price': totals['total_price'] or 0,
+            'total_quantity': totals['total_quantity'] or 0
+        }
+
+    # Zakazga chiqqan produktlarni pulini xisoblidi
+    @property
+    def get_cart_total_price(self):
+        return self.cart_totals['total_price']
+
+    # Zakazga chiqqan produktlarni sonini xisoblidi
+    @property
+    def get_cart_total_quantity(self):
+        return self.cart_totals['total_quantity']
+
+
+class OrderProduct(models.Model):
+    product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, verbose_name='Product')
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True, verbose_name='Order')
+    quantity = models.IntegerField(default=0, null=True, blank=True, verbose_name='Quantity')
+    added_at = models.DateTimeField(auto_now_add=True)
+    reserved_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='Reserved at')
+    # Tolov paytidagi narx, keyin produkt narxi o'zgarsa ham zakaz summasi o'zgarmaydi
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, verbose_name='Price')
+
+    class Meta:
+        verbose_name = 'Product in order'
+        verbose_name_plural = 'Product in orders'
+
+    @property
+    def get_total_price(self):
+        price = self.price if self.price is not None else self.product.price
+        total_price = price * self.quantity
+        return total_price
+
+
+class ShippingAddress(models.Model):
+    customer = models.ForeignKey(Customer, on_delete=models.SET_NULL, null=True)
+    order = models.ForeignKey(Order, on_delete=models.SET_NULL, null=True)
+    address = models.CharField(max_length=200)
+    city = models.CharField(max_length=200)
+    region = models.CharField(max_length=200)
+    phone = PhoneNumberField(max_length=200, verbose_name='Phone number')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+    def __str__(self):
+        return self.address
+
+    class Meta:
+        verbose_name = 'Address of shipping'
+        verbose_name_plural = 'Address of shippings'
+
+
+# Stripe webhook hodisalari: event_id unikal (takroriy hodisalar saqlanmaydi),
+# jadvalning o'zi fon worker uchun navbat (process_payment_events)
+class PaymentEvent(models.Model):
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    event_id = models.CharField(max_length=255, unique=True, verbose_name='Stripe event')
+    type = models.CharField(max_length=100, verbose_name='Type')
+    payload = models.JSONField(verbose_name='Payload')
+    status = models.CharField(max_length=20, choices=STATUSES, default=PENDING, db_index=True, verbose_name='Status')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='Attempts')
+    error = models.TextField(blank=True, verbose_name='Error')
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.type} {self.event_id}'
+
+    class Meta:
+        verbose_name = 'Payment event'
+        verbose_name_plural = 'Payment events'
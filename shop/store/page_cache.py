@@ -0,0 +1,171 @@
+import hashlib
+import time
+import zlib
+from asgiref.sync import async_to_sync, iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from .cache import get_catalog_version, count
+from .routers import pin_primary
+
+PAGE_KEY = 'store:page:{view}:{digest}:v{catalog_version}'
+TAG_KEY = 'store:page-tag:{tag}'
+
+
+# Sahifa qaysi obyektlarga bog'liqligini view o'zi aytadi (masalan product:5, category:2).
+# Obyekt o'zgarsa faqat shu teg yangilanadi va uni o'z ichiga olgan sahifalar eskiradi
+def add_tags(request, *tags):
+    request.page_cache_tags = getattr(request, 'page_cache_tags', set()) | set(tags)
+
+
+# Teg qiymati vaqt (ns): cache dan tushib ketsa ham eski qiymatga qaytmaydi
+def invalidate(*tags):
+    if tags:
+        cache.set_many({TAG_KEY.format(tag=tag): time.time_ns() for tag in tags}, None)
+
+
+# Produkt bosh sahifada, o'z sahifasida, kategoriyasi va ota kategoriyalari sahifalarida,
+# shu kategoriyadagi boshqa produktlarning "You may also like" blokida ko'rinadi
+def get_product_tags(product_id, category_id):
+    from .category_tree import get_tree
+    tags = {'home', f'product:{product_id}'}
+    tags.update(f'category:{category.pk}' for category in get_tree().get_ancestors(category_id))
+    return tags
+
+
+def invalidate_products(product_ids):
+    from .models import Product
+    tags = set()
+    for product_id, category_id in Product.objects.filter(pk__in=product_ids).values_list('pk', 'category_id'):
+        tags |= get_product_tags(product_id, category_id)
+    invalidate(*tags)
+
+
+def get_tokens(tags, started):
+    keys = [TAG_KEY.format(tag=tag) for tag in tags]
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, started, None)
+            tokens[key] = cache.get(key, started)
+    return {tag: tokens[key] for tag, key in zip(tags, keys)}
+
+
+# Anonim foydalanuvchilar uchun katalog sahifalarining to'liq cache i. Kalit: view, ruxsat etilgan
+# GET parametrlari va katalog versiyasi. Sahifa siqilgan holda saqlanadi, teglari o'zgargan bo'lsa
+# eskirgan hisoblanadi. Sovuq kalitni faqat bitta worker quradi, qolganlari eski nusxani beradi yoki kutadi
+class PageCacheMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request, self.get_response)
+
+    # ASGI: POST (to'lov, sharh, like) to'g'ridan-to'g'ri async view ga o'tadi,
+    # cache lanadigan GET lar esa sinxron yo'l bilan threadda ishlanadi
+    async def __acall__(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return await self.get_response(request)
+        return await sync_to_async(self.handle)(request, async_to_sync(self.get_response))
+
+    def handle(self, request, get_response):
+        key = self.get_key(request)
+        if key is None:
+            return get_response(request)
+
+        entry = cache.get(key)
+        if entry is not None and self.is_fresh(entry):
+            count('page', 'hit')
+            return self.respond(request, entry, 'hit')
+
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT):
+            if entry is not None:  # boshqa worker yangilayapti
+                count('page', 'stale')
+                return self.respond(request, entry, 'stale')
+            entry = self.wait(key)
+            if entry is not None:
+                count('page', 'hit')
+                return self.respond(request, entry, 'hit')
+            return get_response(request)
+
+        try:
+            count('page', 'miss')
+            started = time.time_ns()
+            with pin_primary():  # keyingi o'zgarishgacha beriladi, replikadagi eski holat yozilmasin
+                response = get_response(request)
+            if self.can_store(request, response):
+                entry = self.store(key, request, response, started)
+                if entry is not None:
+                    return self.respond(request, entry, 'miss')
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    def get_key(self, request):
+        if request.method not in ('GET', 'HEAD') or request.user.is_authenticated or len(get_messages(request)):
+            return None
+        try:
+            view = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if view.url_name not in settings.PAGE_CACHE_VIEWS:
+            return None
+        if set(request.GET) - set(settings.PAGE_CACHE_QUERY_PARAMS):
+            return None  # filtrlar (rang, narx...) cache ga yozilmaydi
+        query = sorted((field, request.GET[field]) for field in request.GET)
+        digest = hashlib.md5(f'{request.path_info}?{query}'.encode()).hexdigest()
+        return PAGE_KEY.format(view=view.url_name, digest=digest, catalog_version=get_catalog_version())
+
+    def is_fresh(self, entry):
+        keys = {TAG_KEY.format(tag=tag): token for tag, token in entry['tags'].items()}
+        return cache.get_many(list(keys)) == keys
+
+    def wait(self, key):
+        deadline = time.monotonic() + settings.PAGE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None and self.is_fresh(entry):
+                return entry
+        return None
+
+    def can_store(self, request, response):
+        return (response.status_code == 200 and not response.streaming and not response.cookies
+                and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+    def store(self, key, request, response, started):
+        tags = sorted(getattr(request, 'page_cache_tags', ()))
+        tokens = get_tokens(tags, started)
+        if any(token > started for token in tokens.values()):
+            return None  # sahifa render bo'layotganda obyekt o'zgargan
+        entry = {
+            'content': zlib.compress(response.content),
+            'content_type': response['Content-Type'],
+            'etag': f'"{hashlib.md5(response.content).hexdigest()}"',
+            'last_modified': int(time.time()),
+            'tags': tokens,
+        }
+        cache.set(key, entry, settings.PAGE_CACHE_TIMEOUT)
+        return entry
+
+    def respond(self, request, entry, state):
+        response = get_conditional_response(request, etag=entry['etag'], last_modified=entry['last_modified'])
+        if response is None:
+            response = HttpResponse(zlib.decompress(entry['content']), content_type=entry['content_type'])
+        response['ETag'] = entry['etag']
+        response['Last-Modified'] = http_date(entry['last_modified'])
+        response['X-Page-Cache'] = state
+        patch_cache_control(response, no_cache=True)
+        return response
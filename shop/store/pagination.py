@@ -0,0 +1,153 @@
+import base64
+import datetime
+import json
+import math
+from functools import reduce
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+PAGE_SIZE = 12
+PAGE_SIZE_MIN = 4
+PAGE_SIZE_MAX = 48
+APPROXIMATE_COUNT_LIMIT = 1000
+
+
+# DjangoJSONEncoder vaqtni millisekundgacha qisqartiradi, shunda bir millisekund ichidagi
+# qatorlar kursor chegarasidan tushib qoladi. Kursorda vaqt mikrosekundlari bilan yoziladi
+class CursorEncoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+# Kursor - oxirgi ko'rsatilgan qatorning saralash qiymatlari, foydalanuvchiga ochiq emas (base64)
+def encode_cursor(values, direction='next'):
+    data = json.dumps({'d': direction, 'v': values}, cls=CursorEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return data['d'], list(data['v'])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+# Kursor foydalanuvchidan keladi: qiymatlar saralash maydonlari turiga o'tkaziladi
+# (annotatsiya bo'lsa uning output_field i). Buzilgan kursorda None - birinchi sahifa
+def clean_cursor(queryset, ordering, direction, values):
+    if direction not in ('next', 'prev') or len(values) != len(ordering):
+        return None
+    cleaned = []
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        try:
+            if name in queryset.query.annotations:
+                model_field = queryset.query.annotations[name].output_field
+            else:
+                model_field = queryset.model._meta.pk if name == 'pk' else queryset.model._meta.get_field(name)
+            value = model_field.to_python(value)
+        except (ValidationError, FieldDoesNotExist, TypeError, ValueError):
+            return None
+        if value is None or isinstance(value, float) and not math.isfinite(value):
+            return None
+        cleaned.append(value)
+    return direction, cleaned
+
+
+# Joriy GET parametrlari saqlangan holda kursorli havola (?sort=...&cursor=...)
+def get_cursor_url(request, cursor):
+    if not cursor:
+        return None
+    query = request.GET.copy()
+    query.pop('page', None)
+    query['cursor'] = cursor
+    return '?' + query.urlencode()
+
+
+def get_page_size(value, default=PAGE_SIZE):
+    try:
+        return min(max(int(value), PAGE_SIZE_MIN), PAGE_SIZE_MAX)
+    except (TypeError, ValueError):
+        return default
+
+
+# ordering ['-price', '-pk'] va qiymatlar [10, 5] uchun "keyingi" qatorlar sharti:
+# price <= 10 AND (price < 10 OR (price = 10 AND pk < 5)). Birinchi shart ortiqcha ko'rinadi,
+# lekin usiz SQLite indeksni kursordan emas, boshidan o'qiydi (OR ichidagi diapazonni ishlatmaydi)
+def keyset_filter(ordering, values, reverse=False):
+    conditions = []
+    for i, field in enumerate(ordering):
+        name = field.lstrip('-')
+        descending = field.startswith('-') != reverse
+        condition = Q(**{f'{name}__{"lt" if descending else "gt"}': values[i]})
+        for previous, value in zip(ordering[:i], values):
+            condition &= Q(**{previous.lstrip('-'): value})
+        conditions.append(condition)
+    first = ordering[0].lstrip('-')
+    bound = Q(**{f'{first}__{"lte" if ordering[0].startswith("-") != reverse else "gte"}': values[0]})
+    return bound & reduce(lambda a, b: a | b, conditions)
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else '-' + field for field in ordering]
+
+
+class KeysetPage:
+    def __init__(self, object_list, ordering, has_next, has_previous, count=None):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.count = count
+
+    # Taxminiy son: APPROXIMATE_COUNT_LIMIT dan ko'p bo'lsa aniq sanalmaydi
+    @property
+    def count_label(self):
+        if self.count is None:
+            return ''
+        if self.count > APPROXIMATE_COUNT_LIMIT:
+            return f'{APPROXIMATE_COUNT_LIMIT}+'
+        return str(self.count)
+
+    def get_values(self, item):
+        return [getattr(item, field.lstrip('-')) for field in self.ordering]
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(self.get_values(self.object_list[-1]), 'next')
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(self.get_values(self.object_list[0]), 'prev')
+
+
+# OFFSET va COUNT(*) siz sahifalash: har bir sahifa indeks bo'yicha bitta qidiruv,
+# 10 000-sahifa ham 1-sahifa kabi tez. ordering oxirida unikal maydon (pk) bo'lishi kerak
+def paginate_keyset(queryset, ordering, cursor=None, per_page=PAGE_SIZE, with_count=False):
+    decoded = decode_cursor(cursor) if cursor else None
+    if decoded:
+        decoded = clean_cursor(queryset, ordering, *decoded)
+
+    count = None
+    if with_count:
+        count = queryset.order_by()[:APPROXIMATE_COUNT_LIMIT + 1].count()
+
+    if decoded is None:
+        items = list(queryset.order_by(*ordering)[:per_page + 1])
+        return KeysetPage(items[:per_page], ordering, len(items) > per_page, False, count)
+
+    direction, values = decoded
+    if direction == 'prev':
+        items = list(queryset.filter(keyset_filter(ordering, values, reverse=True))
+                     .order_by(*reverse_ordering(ordering))[:per_page + 1])
+        has_previous = len(items) > per_page
+        return KeysetPage(items[:per_page][::-1], ordering, True, has_previous, count)
+
+    items = list(queryset.filter(keyset_filter(ordering, values)).order_by(*ordering)[:per_page + 1])
+    return KeysetPage(items[:per_page], ordering, len(items) > per_page, True, count)
@@ -0,0 +1,172 @@
+import asyncio
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils import timezone
+from . import stock
+from .models import Order, PaymentEvent
+
+# Zakazni yopadigan hodisalar
+PAID_EVENTS = ('checkout.session.completed', 'checkout.session.async_payment_succeeded')
+
+CURRENCY = 'USD'
+
+_executor = None
+_configured = False
+
+
+class PaymentMismatch(Exception):
+    pass
+
+
+# Stripe sozlamalari bir marta o'rnatiladi: RequestsClient ichidagi requests.Session
+# ulanishlarni qayta ishlatadi (keep-alive), timeout esa workerni uzoq ushlab turmaydi
+def configure_stripe():
+    global _configured
+    if not _configured:
+        stripe.api_key = settings.STRIPE_SECRET_KEY
+        stripe.api_base = settings.STRIPE_API_BASE
+        stripe.max_network_retries = settings.STRIPE_MAX_RETRIES
+        stripe.default_http_client = stripe.RequestsClient(timeout=settings.STRIPE_TIMEOUT)
+        _configured = True
+
+
+@receiver(setting_changed)
+def reset_stripe(setting, **kwargs):
+    global _configured, _executor
+    if setting.startswith('STRIPE_'):
+        _configured = False
+        if setting == 'STRIPE_MAX_WORKERS' and _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.STRIPE_MAX_WORKERS, thread_name_prefix='stripe')
+    return _executor
+
+
+# Bir xil savat holati uchun bir xil kalit: qayta yuborilgan so'rov yangi sessiya yaratmaydi,
+# savat o'zgarsa (updated_at, summa) yangi kalit chiqadi
+def get_idempotency_key(order):
+    state = f'{order.pk}:{order.total_price}:{order.updated_at.timestamp() if order.updated_at else ""}'
+    return 'checkout-' + hashlib.sha256(state.encode()).hexdigest()[:32]
+
+
+def get_session_params(order, success_url, cancel_url):
+    return {
+        'line_items': [{
+            'price_data': {
+                'currency': CURRENCY,
+                'product_data': {
+                    'name': 'PRODUCT in TOTEMBO'
+                },
+                'unit_amount': int(order.total_price * 100)  # Stripe summani sentda oladi
+            },
+            'quantity': 1,
+        }],
+        'mode': 'payment',
+        'client_reference_id': str(order.pk),
+        'metadata': {'order_id': str(order.pk)},
+        'success_url': success_url,
+        'cancel_url': cancel_url
+    }
+
+
+def create_checkout_session(order, success_url, cancel_url):
+    configure_stripe()
+    return stripe.checkout.Session.create(
+        idempotency_key=get_idempotency_key(order),
+        **get_session_params(order, success_url, cancel_url)
+    )
+
+
+# Sessiyani thread pool da yaratadi va Future qaytaradi
+def submit_checkout_session(order, success_url, cancel_url):
+    return get_executor().submit(create_checkout_session, order, success_url, cancel_url)
+
+
+# Async view uchun: Stripe javobini kutayotganda event loop boshqa so'rovlarga xizmat qiladi,
+# worker band bo'lmaydi. STRIPE_TIMEOUT dan oshsa asyncio.TimeoutError
+async def acreate_checkout_session(order, success_url, cancel_url):
+    future = submit_checkout_session(order, success_url, cancel_url)
+    return await asyncio.wait_for(asyncio.wrap_future(future), settings.STRIPE_TIMEOUT)
+
+
+# Yaratilgan sessiyani zakazga yozadi (view, Stripe javobidan keyin)
+def remember_checkout_session(order, session):
+    return Order.objects.filter(pk=order.pk).update(checkout_session_id=session['id'],
+                                                    checkout_amount=Decimal(session['amount_total']) / 100)
+
+
+# Webhook: imzoni tekshiradi va hodisani navbatga yozadi. Takroriy event_id bitta
+# INSERT ... ON CONFLICT DO NOTHING bilan tashlab yuboriladi. Noto'g'ri imzoda None qaytaradi
+def receive_webhook(payload, signature):
+    try:
+        event = stripe.Webhook.construct_event(payload, signature, settings.STRIPE_WEBHOOK_SECRET)
+    except (ValueError, stripe.error.SignatureVerificationError):
+        return None
+
+    PaymentEvent.objects.bulk_create([
+        PaymentEvent(event_id=event['id'], type=event['type'], payload=json.loads(payload))
+    ], ignore_conflicts=True)
+    return event['id']
+
+
+def handle_payment_event(payment_event):
+    if payment_event.type not in PAID_EVENTS:
+        return
+    session = payment_event.payload['data']['object']
+    if session.get('payment_status') != 'paid':
+        return  # async to'lov hali tushmagan, async_payment_succeeded keyin keladi
+    order_id = session.get('client_reference_id') or session.get('metadata', {}).get('order_id')
+    if not order_id:
+        return
+
+    # Eski sessiya arzonroq savat uchun to'langan bo'lishi mumkin: sessiya, summa va valyuta zakazga
+    # yozilgan oxirgi sessiyaga mos kelmasa zakaz yopilmaydi, hodisa FAILED bo'lib qoladi
+    currency = (session.get('currency') or '').upper()
+    amount = Decimal(session.get('amount_total') or 0) / 100
+    if currency != CURRENCY:
+        raise PaymentMismatch(f'Order {order_id}: paid in {currency or "unknown currency"}, expected {CURRENCY}')
+    if not stock.finalize_order(Order(pk=int(order_id)), session_id=session.get('id'), amount=amount):
+        if not Order.objects.filter(pk=order_id, is_paid=True).exists():  # takroriy hodisa emas
+            raise PaymentMismatch(f'Order {order_id}: paid {amount} {currency} in {session.get("id")}, '
+                                  f'which is not the open checkout')
+
+
+# Navbatdagi hodisalarni qayta ishlaydi. Har bir hodisa shartli UPDATE bilan olinadi,
+# shuning uchun bir nechta worker bitta hodisani ikki marta bajarmaydi
+def process_payment_events(limit=100):
+    processed = 0
+    pending = PaymentEvent.objects.filter(status=PaymentEvent.PENDING).order_by('pk').values_list('pk', flat=True)
+    for pk in list(pending[:limit]):
+        claimed = PaymentEvent.objects.filter(pk=pk, status=PaymentEvent.PENDING).update(
+            status=PaymentEvent.PROCESSING, attempts=F('attempts') + 1
+        )
+        if not claimed:
+            continue
+
+        payment_event = PaymentEvent.objects.get(pk=pk)
+        try:
+            handle_payment_event(payment_event)
+        except Exception as error:
+            PaymentEvent.objects.filter(pk=pk).update(status=PaymentEvent.FAILED, error=repr(error))
+        else:
+            PaymentEvent.objects.filter(pk=pk).update(status=PaymentEvent.DONE, error='',
+                                                      processed_at=timezone.now())
+        processed += 1
+    return processed
+
+
+# Hodisalarni qaytadan navbatga qo'yadi (replay_payment_events komandasi)
+def replay_payment_events(events):
+    return events.update(status=PaymentEvent.PENDING, processed_at=None)
@@ -0,0 +1,35 @@
+import threading
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+SVG = ('<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+       '<rect width="100%" height="100%" fill="{color}"/></svg>')
+
+_created = set()
+_lock = threading.Lock()
+
+
+# Rasmi yo'q produkt/kategoriya uchun rangli SVG (o'lchami bilan, sahifa "sakramaydi").
+# Fayl nomi rang va o'lchamdan iborat, mazmuni o'zgarmaydi: bir marta yoziladi, cache da cheksiz turadi
+def get_placeholder_url(color, width, height):
+    color = (color or settings.PLACEHOLDER_COLOR).lstrip('#').lower()
+    name = f'{settings.PLACEHOLDER_DIRECTORY}/{color}-{width}x{height}.svg'
+    if name not in _created:
+        with _lock:
+            if name not in _created and not default_storage.exists(name):
+                content = SVG.format(width=width, height=height, color=f'#{color}')
+                saved_name = default_storage.save(name, ContentFile(content.encode()))
+                if saved_name != name:  # boshqa process oldinroq yozgan
+                    default_storage.delete(saved_name)
+            _created.add(name)
+    return default_storage.url(name)
+
+
+# Kategoriyaning o'zi yoki eng yaqin ota kategoriyasida berilgan rang (daraxt nusxasidan, so'rovsiz)
+def get_category_color(category_id):
+    from .category_tree import get_tree
+    for category in reversed(get_tree().get_ancestors(category_id)):
+        if category.placeholder_color:
+            return category.placeholder_color
+    return settings.PLACEHOLDER_COLOR
@@ -0,0 +1,105 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Replikadan o'qiladigan modellar: katalog va sharhlar. Savat, zakaz, like, foydalanuvchi va
+# sessiyalar har doim asosiy bazada (o'qish ham), ular o'zgargan zahoti o'qiladi
+REPLICA_MODELS = {'store.category', 'store.product', 'store.gallery', 'store.review'}
+PIN_COOKIE = 'store_primary_until'
+
+_pinned = ContextVar('store_primary_pinned', default=False)
+# None - so'rovdan tashqarida (komanda, thread, test): yozuv keyingi o'qishlarni bog'lab qo'ymaydi
+_written = ContextVar('store_primary_written', default=None)
+
+
+# Blok ichidagi hamma o'qishlar asosiy bazadan. Versiyali cache (menu, daraxt, sahifa) shu bilan
+# quriladi: orqada qolgan replikadan olingan eski ma'lumot yangi versiya kaliti bilan yozilmasin
+@contextmanager
+def pin_primary():
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+# settings.DATABASE_REPLICAS: {'replica1': 2, 'replica2': 1} - og'irligi bo'yicha tasodifiy tanlanadi
+def get_replica():
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    return random.choices(list(replicas), weights=list(replicas.values()))[0]
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        label = f'{model._meta.app_label}.{model._meta.model_name}'  # db cache modelida label_lower yo'q
+        if (label not in REPLICA_MODELS or _pinned.get() or _written.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return get_replica()
+
+    def db_for_write(self, model, **hints):
+        # db cache backendi ham router orqali yozadi, u hisobga olinmaydi
+        if _written.get() is False and model._meta.app_label != 'django_cache':
+            _written.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # hamma bazada bir xil ma'lumot
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS  # replikalar asosiy bazaning nusxasi
+
+
+# Read-your-writes: so'rov bazaga yozsa, shu so'rovning qolgan o'qishlari va foydalanuvchining keyingi
+# REPLICA_PIN_SECONDS soniyadagi so'rovlari asosiy bazadan o'qiydi (replika yetib olguncha)
+class ReplicaPinMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tokens = self.start(request)
+        try:
+            return self.finish(self.get_response(request))
+        finally:
+            self.reset(tokens)
+
+    async def __acall__(self, request):
+        tokens = self.start(request)
+        try:
+            return self.finish(await self.get_response(request))
+        finally:
+            self.reset(tokens)
+
+    def start(self, request):
+        return _pinned.set(self.is_pinned(request)), _written.set(False)
+
+    def finish(self, response):
+        if _written.get():
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, str(int(time.time() + seconds)), max_age=seconds,
+                                httponly=True, samesite='Lax')
+        return response
+
+    def reset(self, tokens):
+        pinned, written = tokens
+        _pinned.reset(pinned)
+        _written.reset(written)
+
+    def is_pinned(self, request):
+        try:
+            return int(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
@@ -0,0 +1,193 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# title ustuni eng og'ir, keyin kategoriya, rang va tavsif (BM25 og'irliklari)
+WEIGHTS = (10.0, 1.0, 2.0, 4.0)
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# So'rov so'zlari jami shuncha hujjatdan ko'pida uchrasa BM25 o'rniga tezkor tartib ishlatiladi
+BM25_MAX_DOCUMENTS = 30000
+# Har bir thread oxirgi shuncha natijani eslab qoladi (mashhur so'rovlar qayta hisoblanmaydi)
+RESULT_CACHE_SIZE = 1024
+
+_index = None
+
+
+# Produktlar uchun SQLite FTS5 teskari indeksi. Asosiy bazadan alohida faylda turadi,
+# shuning uchun asosiy baza PostgreSQL bo'lsa ham ishlaydi. Har bir thread o'z ulanishiga ega.
+# titles jadvali faqat nomlardan iborat: autocomplete uchun kichik va tez
+class SearchIndex:
+    def __init__(self, path):
+        self.path = str(path)
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS products USING fts5("
+                "title, description, color, category, tokenize='unicode61 remove_diacritics 2')"
+            )
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5("
+                "title, tokenize='unicode61 remove_diacritics 2', prefix='1 2 3 4')"
+            )
+            self.local.connection = connection
+            self.local.results = OrderedDict()
+            self.local.data_version = None
+        return connection
+
+    def index(self, rows, replace=True):
+        rows = list(rows)
+        with self.connection as connection:
+            if replace:
+                self.delete(connection, [row[0] for row in rows])
+            connection.executemany(
+                'INSERT INTO products (rowid, title, description, color, category) VALUES (?, ?, ?, ?, ?)', rows
+            )
+            connection.executemany('INSERT INTO titles (rowid, title) VALUES (?, ?)', [row[:2] for row in rows])
+        self.local.results.clear()
+
+    def remove(self, ids):
+        with self.connection as connection:
+            self.delete(connection, ids)
+        self.local.results.clear()
+
+    def delete(self, connection, ids):
+        for table in ('products', 'titles'):
+            connection.executemany(f'DELETE FROM {table} WHERE rowid = ?', [(pk,) for pk in ids])
+
+    def clear(self):
+        with self.connection as connection:
+            connection.execute('DELETE FROM products')
+            connection.execute('DELETE FROM titles')
+        self.local.results.clear()
+
+    def optimize(self):
+        with self.connection as connection:
+            connection.execute("INSERT INTO products (products) VALUES ('optimize')")
+            connection.execute("INSERT INTO titles (titles) VALUES ('optimize')")
+
+    # BM25 bo'yicha tartiblangan produkt id lari. Qidiruvda butun so'zlar, autocomplete da esa
+    # oxirgi so'z prefiks sifatida (titles jadvalida) qidiriladi
+    def search(self, query, limit=20, offset=0):
+        phrases = build_phrases(query, prefix=False)
+        if not phrases:
+            return []
+        return self.cached(('search', *phrases, limit, offset), lambda: [
+            row[0] for row in self.ranked('products', WEIGHTS, phrases, limit, offset)
+        ])
+
+    def autocomplete(self, prefix, limit=8):
+        phrases = build_phrases(prefix)
+        if not phrases:
+            return []
+        return self.cached(('autocomplete', *phrases, limit), lambda: [
+            {'id': pk, 'title': title} for pk, title in self.ranked('titles', (), phrases, limit, 0, 'rowid, title')
+        ])
+
+    # bm25() har bir so'z uchun uning butun ro'yxatini o'qiydi (IDF), "gold" kabi deyarli hamma
+    # produktda bor so'zda bu 1M katalogda 50+ ms. Bunday keng so'rovlarda IDF deyarli 0, shuning uchun
+    # ular nomida topilganlar birinchi, keyin qolganlari tartibida (eng yangilari oldin) qaytariladi
+    def ranked(self, table, weights, phrases, limit, offset, columns='rowid'):
+        match = ' '.join(phrases)
+        if sum(self.count_documents(table, phrase) for phrase in phrases) <= BM25_MAX_DOCUMENTS:
+            score = ', '.join([table, *map(str, weights)])
+            return self.connection.execute(
+                f'SELECT {columns} FROM {table} WHERE {table} MATCH ? ORDER BY bm25({score}) LIMIT ? OFFSET ?',
+                (match, limit, offset)
+            ).fetchall()
+
+        rows = []
+        for part in ([f'title : ({match})'] if weights else []) + [match]:
+            rows += self.connection.execute(
+                f'SELECT {columns} FROM {table} WHERE {table} MATCH ? ORDER BY rowid DESC LIMIT ?',
+                (part, offset + limit + len(rows))
+            ).fetchall()
+        return list(dict.fromkeys(rows))[offset:offset + limit]
+
+    # Nechta hujjatda borligi (BM25_MAX_DOCUMENTS + 1 gacha sanaladi, undan ko'pi farqsiz)
+    def count_documents(self, table, phrase):
+        return self.cached(('count', table, phrase), lambda: self.connection.execute(
+            f'SELECT count(*) FROM (SELECT 1 FROM {table} WHERE {table} MATCH ? LIMIT ?)',
+            (phrase, BM25_MAX_DOCUMENTS + 1)
+        ).fetchone()[0])
+
+    # Natijalar eslab qolinadi. PRAGMA data_version boshqa ulanish (boshqa process) indeksni
+    # o'zgartirganda o'zgaradi, o'z yozuvlarimizda esa results.clear() chaqiriladi
+    def cached(self, key, build):
+        local = self.local
+        data_version = self.connection.execute('PRAGMA data_version').fetchone()[0]
+        if data_version != local.data_version:
+            local.results.clear()
+            local.data_version = data_version
+        if key in local.results:
+            local.results.move_to_end(key)
+            return local.results[key]
+        value = local.results[key] = build()
+        if len(local.results) > RESULT_CACHE_SIZE:
+            local.results.popitem(last=False)
+        return value
+
+
+# "rolex gol" -> ['"rolex"', '"gol"*'] (foydalanuvchi matni FTS sintaksisiga tushmaydi)
+def build_phrases(query, prefix=True):
+    tokens = TOKEN_RE.findall((query or '').lower())[:10]
+    phrases = [f'"{token}"' for token in tokens]
+    if phrases and prefix:
+        phrases[-1] += '*'
+    return phrases
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = SearchIndex(settings.SEARCH_INDEX_PATH)
+    return _index
+
+
+@receiver(setting_changed)
+def reset_index(setting, **kwargs):
+    global _index
+    if setting == 'SEARCH_INDEX_PATH':
+        _index = None
+
+
+# Indeks qatorlari: kategoriya nomiga ota kategoriyalar nomi ham qo'shiladi (daraxt nusxasidan)
+def get_rows(products):
+    from .category_tree import get_tree
+    tree = get_tree()
+    for pk, title, description, color, category_id in products.values_list(
+            'pk', 'title', 'description', 'color', 'category_id').iterator():
+        category = ' '.join(item.title for item in tree.get_ancestors(category_id))
+        yield pk, title, description, color, category
+
+
+def index_products(products):
+    get_index().index(get_rows(products))
+
+
+def remove_products(ids):
+    get_index().remove(ids)
+
+
+def rebuild(products, batch_size=5000):
+    index = get_index()
+    index.clear()
+    batch = []
+    for row in get_rows(products):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            index.index(batch, replace=False)
+            batch = []
+    if batch:
+        index.index(batch, replace=False)
+    index.optimize()
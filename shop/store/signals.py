@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from . import category_tree, search, suggest, thumbnails, page_cache
+from .cache import bump_catalog_version
+from .models import Category, Product, Gallery, Review
+
+
+# Daraxt va versiya tranzaksiyadan keyin yangilanadi (path ham yozilgan bo'ladi): aks holda boshqa
+# worker yangi versiya bilan hali eski qatorlardan menu va kartochkalarni qurib qo'yadi
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, **kwargs):
+    transaction.on_commit(catalog_changed)
+
+
+def catalog_changed():
+    bump_catalog_version()
+    category_tree.invalidate()
+
+
+# Qidiruv indeksi tranzaksiya muvaffaqiyatli tugagandan keyin yangilanadi
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search.index_products(Product.objects.filter(pk=instance.pk)))
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    pk = instance.pk  # delete() dan keyin instance.pk None bo'ladi
+    transaction.on_commit(lambda: search.remove_products([pk]))
+
+
+# Kategoriya nomi o'zgarsa uning produktlari qayta indekslanadi
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: search.index_products(instance.get_descendant_products()))
+
+
+# Autocomplete indeksi uchun o'zgarishlar jurnali (har bir worker o'zi qo'llaydi)
+@receiver(post_save, sender=Product)
+def product_suggest_saved(sender, instance, **kwargs):
+    item = suggest.product_item(instance.pk, instance.title, instance.slug, instance.quantity)
+    transaction.on_commit(lambda: suggest.record(('add', *item)))
+
+
+@receiver(post_save, sender=Category)
+def category_suggest_saved(sender, instance, **kwargs):
+    item = suggest.category_item(instance.pk, instance.title, instance.slug, instance.depth)
+    transaction.on_commit(lambda: suggest.record(('add', *item)))
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def suggest_deleted(sender, instance, **kwargs):
+    ref = instance.pk * 2 + (suggest.CATEGORY if sender is Category else suggest.PRODUCT)
+    transaction.on_commit(lambda: suggest.record(('remove', ref)))
+
+
+# Rasm almashtirilsa eski hash o'chiriladi, yangi nusxalar tranzaksiyadan keyin fonda kesiladi.
+# Eski qator yoziladigan bazadan o'qiladi (replika orqada qolgan bo'lishi mumkin)
+@receiver(pre_save, sender=Gallery)
+@receiver(pre_save, sender=Category)
+def image_changing(sender, instance, using, **kwargs):
+    if instance.image_hash and instance.pk:
+        old_image = sender.objects.using(using).filter(pk=instance.pk).values_list('image', flat=True).first()
+        if old_image != instance.image.name:
+            instance.image_hash = ''
+
+
+@receiver(post_save, sender=Gallery)
+@receiver(post_save, sender=Category)
+def image_saved(sender, instance, **kwargs):
+    if instance.image and not instance.image_hash:
+        transaction.on_commit(lambda: thumbnails.schedule(instance))
+
+
+# Produktning asosiy rasmi: rasm qo'shilsa, o'chirilsa, tartibi yoki produkti o'zgarsa qayta hisoblanadi
+@receiver([post_save, post_delete], sender=Gallery)
+def gallery_changed(sender, instance, **kwargs):
+    Product.refresh_primary_images(
+        Product.objects.filter(Q(pk=instance.product_id) | Q(primary_image_id=instance.pk))
+    )
+
+
+# To'liq sahifa cache i: faqat o'zgargan produkt ko'rinadigan sahifalar eskiradi (kategoriya
+# o'zgarsa menu hamma sahifada o'zgaradi, u katalog versiyasi orqali yangilanadi)
+@receiver(pre_save, sender=Product)
+def product_moving(sender, instance, using, **kwargs):
+    if instance.pk:
+        instance.old_category_id = sender.objects.using(using).filter(pk=instance.pk).values_list(
+            'category_id', flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_page_changed(sender, instance, **kwargs):
+    tags = page_cache.get_product_tags(instance.pk, instance.category_id)
+    if getattr(instance, 'old_category_id', None) not in (None, instance.category_id):
+        tags |= page_cache.get_product_tags(instance.pk, instance.old_category_id)
+    transaction.on_commit(lambda: page_cache.invalidate(*tags))
+
+
+@receiver([post_save, post_delete], sender=Gallery)
+def gallery_page_changed(sender, instance, **kwargs):
+    product_id = instance.product_id
+    transaction.on_commit(lambda: page_cache.invalidate_products([product_id]))
+
+
+@receiver([post_save, post_delete], sender=Review)
+def review_page_changed(sender, instance, **kwargs):
+    tags = {f'product:{instance.product_id}'}
+    transaction.on_commit(lambda: page_cache.invalidate(*tags))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    Product.refresh_review_stats(Product.objects.filter(pk=instance.product_id))
@@ -48,3 +48,58 @@ $('.stop').on('click',function(){
 })
 
 
+// Qidiruv takliflari (search/suggest/), tanlangan taklif sahifasiga o'tadi
+var suggestions = {};
+$('.header_search-input').on('input', function () {
+    var input = $(this);
+    var option = suggestions[input.val()];
+    if (option) {
+        window.location = option.url;
+        return;
+    }
+    $.getJSON(input.data('url'), {q: input.val()}, function (data) {
+        var list = $('#search-suggestions').empty();
+        suggestions = {};
+        $.each(data.suggestions, function (i, item) {
+            suggestions[item.title] = item;
+            list.append($('<option>').val(item.title));
+        });
+    });
+});
+
+
+// Keyingi sharhlar (reviews/<id>/?cursor=...), slayder oxiriga qo'shiladi
+$('.customer_reviews-more').on('click', function () {
+    var button = $(this);
+    $.getJSON(button.data('url'), function (data) {
+        var slider = $('.customer_reviews-slider');
+        $(data.html).filter('.customer_reviews-slider_block').each(function () {
+            slider.trigger('add.owl.carousel', [this]);
+        });
+        slider.trigger('refresh.owl.carousel');
+        if (data.next_url) {
+            button.data('url', data.next_url);
+        } else {
+            button.remove();
+        }
+    });
+});
+
+
+// Like: sahifani qayta yuklamasdan (favourite/<slug>/toggle/), xato bo'lsa oddiy havola ishlaydi
+function getCookie(name) {
+    var match = document.cookie.match('(^|;)\\s*' + name + '=([^;]*)');
+    return match ? decodeURIComponent(match[2]) : '';
+}
+
+$(document).on('click', '.basket_icon[data-url]', function (event) {
+    var link = $(this);
+    event.preventDefault();
+    $.ajax({url: link.data('url'), method: 'POST', headers: {'X-CSRFToken': getCookie('csrftoken')}})
+        .done(function (data) {
+            link.find('svg').attr('fill', data.favourite ? '#000000' : 'none');
+        })
+        .fail(function () {
+            window.location = link.attr('href');
+        });
+});
@@ -1,7 +1,7 @@
-
-
-$("").on("click", function (event) {
-    event.preventDefault(); // Sahifani qayta yuklanishini oldini oladi
-    alert("jQuery funksiyasi ishladi!");
-});
-
+
+
+$("").on("click", function (event) {
+    event.preventDefault(); // Sahifani qayta yuklanishini oldini oladi
+    alert("jQuery funksiyasi ishladi!");
+});
+
@@ -0,0 +1,146 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum, OuterRef, Subquery, Value, DecimalField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .models import Product, Order, OrderProduct
+from . import page_cache, suggest
+
+
+# Omborni band qilish: produkt soni faqat yetarli bolsa bitta UPDATE bilan kamayadi,
+# shuning uchun ikki parallel so'rov oxirgi produktni ikki marta sotolmaydi
+def reserve(order, product_id, quantity=1):
+    if quantity <= 0:
+        return False
+
+    with transaction.atomic():
+        # Bitta savatga parallel yozuvlarni ketma-ket qiladi; to'langan zakazga produkt qo'shilmaydi
+        if not Order.objects.select_for_update().filter(pk=order.pk, is_paid=False).exists():
+            return False
+        taken = Product.objects.filter(pk=product_id, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity, version=F('version') + 1
+        )
+        if not taken:
+            return False
+        stock_changed({product_id: quantity})
+
+        updated = OrderProduct.objects.filter(order=order, product_id=product_id).update(
+            quantity=F('quantity') + quantity,
+            reserved_at=timezone.now()
+        )
+        if not updated:
+            OrderProduct.objects.create(order=order, product_id=product_id,
+                                        quantity=quantity, reserved_at=timezone.now())
+        refresh_cart_summary(Order.objects.filter(pk=order.pk))
+    return True
+
+
+# Savatdan produktni qaytaradi, savatdagi son hech qachon 0 dan pastga tushmaydi
+def release(order, product_id, quantity=1):
+    with transaction.atomic():
+        order_product = OrderProduct.objects.select_for_update().filter(
+            order=order, product_id=product_id
+        ).first()
+        if order_product is None:
+            return 0
+
+        quantity = min(quantity, order_product.quantity or 0)
+        updated = OrderProduct.objects.filter(pk=order_product.pk, quantity__gte=quantity).update(
+            quantity=F('quantity') - quantity
+        )
+        if not updated:
+            return 0
+
+        Product.objects.filter(pk=product_id).update(quantity=F('quantity') + quantity, version=F('version') + 1)
+        stock_changed({product_id: quantity})
+        OrderProduct.objects.filter(pk=order_product.pk, quantity__lte=0).delete()
+        refresh_cart_summary(Order.objects.filter(pk=order.pk))
+    return quantity
+
+
+# Eskirgan (tashlab ketilgan) savatlardagi produktlarni omborga qaytaradi
+def release_expired(now=None):
+    now = now or timezone.now()
+    cutoff = now - timedelta(minutes=settings.CART_RESERVATION_MINUTES)
+    expired = OrderProduct.objects.filter(reserved_at__lt=cutoff, order__is_paid=False).values_list('pk', flat=True)
+
+    released = 0
+    for pk in list(expired):
+        with transaction.atomic():
+            # Qator qulflanib qayta o'qiladi: shu orada release() sonini kamaytirgan yoki
+            # reserve() reserved_at ni yangilagan bo'lishi mumkin, omborga faqat o'chirilgan son qaytadi
+            line = OrderProduct.objects.select_for_update().filter(pk=pk, reserved_at__lt=cutoff).values_list(
+                'order_id', 'product_id', 'quantity'
+            ).first()
+            if line is None:
+                continue
+            order_id, product_id, quantity = line
+            deleted, _ = OrderProduct.objects.filter(pk=pk).delete()
+            if deleted and product_id and quantity:
+                Product.objects.filter(pk=product_id).update(quantity=F('quantity') + quantity,
+                                                             version=F('version') + 1)
+                stock_changed({product_id: quantity})
+                refresh_cart_summary(Order.objects.filter(pk=order_id))
+                released += quantity
+    return released
+
+
+# Ombordagi soni o'zgargan produktlarning ({pk: necha dona}) sahifalari cache dan chiqariladi va
+# autocomplete reytingi yangilanadi (tranzaksiyadan keyin)
+def stock_changed(quantities):
+    def changed():
+        page_cache.invalidate_products(list(quantities))
+        suggest.record_stock(quantities)
+    transaction.on_commit(changed)
+
+
+# Savat xulosasini (soni, summasi) qatorlardan qayta xisoblaydi, bitta UPDATE so'rov.
+# Mutatsiyalar ichida va rebuild_cart_summaries komandasida ishlatiladi
+def refresh_cart_summary(orders):
+    lines = OrderProduct.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    total_quantity = lines.annotate(total=Sum('quantity')).values('total')
+    total_price = lines.annotate(
+        total=Sum(F('quantity') * Coalesce('price', 'product__price'),
+                  output_field=DecimalField(max_digits=14, decimal_places=2))
+    ).values('total')
+
+    return orders.update(
+        total_quantity=Coalesce(Subquery(total_quantity), 0),
+        total_price=Coalesce(Subquery(total_price), Value(0), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        updated_at=timezone.now()
+    )
+
+
+# Tolovdan keyin zakazni yopadi: tolangan deb belgilaydi, narxlarni qatorlarga yozib qo'yadi
+# va band qilingan produktlarni sotilgan deb qoldiradi. Hammasi bitta tranzaksiyada,
+# qatorlar boyicha sikl yo'q. Qayta chaqirilsa hech narsa qilmaydi. session_id berilsa zakaz
+# faqat shu sessiya oxirgisi bo'lsa va to'langan summa sessiya yaratilgandagiga teng bo'lsa yopiladi
+# (keyin narx o'zgargan bo'lsa ham to'lov haqiqiy)
+def finalize_order(order, session_id=None, amount=None):
+    with transaction.atomic():
+        orders = Order.objects.filter(pk=order.pk, is_paid=False)
+        if session_id is not None:
+            orders = orders.filter(checkout_session_id=session_id, checkout_amount=amount)
+        paid = orders.update(is_paid=True, paid_at=timezone.now())
+        if not paid:
+            return False
+
+        price = Product.objects.filter(pk=OuterRef('product_id')).values('price')[:1]
+        OrderProduct.objects.filter(order_id=order.pk).update(price=Subquery(price), reserved_at=None)
+        refresh_cart_summary(Order.objects.filter(pk=order.pk))
+    return True
+
+
+# Savatni tozalaydi: hamma produktlarni omborga qaytaradi va qatorlarni bitta DELETE bilan o'chiradi
+def release_all(order):
+    with transaction.atomic():
+        Order.objects.select_for_update().only('pk').get(pk=order.pk)
+        reserved = OrderProduct.objects.filter(order_id=order.pk, product_id=OuterRef('pk')).order_by().values(
+            'product_id').annotate(total=Sum('quantity')).values('total')
+        products = Product.objects.filter(orderproduct__order_id=order.pk)
+        stock_changed(dict(OrderProduct.objects.filter(order_id=order.pk).order_by().values('product_id').annotate(
+            total=Sum('quantity')).values_list('product_id', 'total')))
+        products.update(quantity=F('quantity') + Coalesce(Subquery(reserved), 0), version=F('version') + 1)
+        OrderProduct.objects.filter(order_id=order.pk).delete()
+        refresh_cart_summary(Order.objects.filter(pk=order.pk))
@@ -0,0 +1,129 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+# Testlar va benchmarklar uchun Stripe API ning kichik lokal nusxasi (tarmoqsiz).
+# Faqat checkout sessiya yaratishni biladi va Idempotency-Key ni hurmat qiladi:
+#
+#     with FakeStripeServer(latency=0.05) as fake:
+#         settings.STRIPE_API_BASE = fake.url
+class FakeStripeServer:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.sessions = {}
+        self.idempotent_responses = {}
+        self.requests_count = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.get_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def create_session(self, params):
+        session_id = 'cs_test_' + uuid.uuid4().hex
+        session = {
+            'id': session_id,
+            'object': 'checkout.session',
+            'url': f'{self.url}/pay/{session_id}',
+            'mode': params.get('mode'),
+            'payment_status': 'unpaid',
+            'client_reference_id': params.get('client_reference_id'),
+            'metadata': {key[9:-1]: value for key, value in params.items() if key.startswith('metadata[')},
+            'amount_total': int(params.get('line_items[0][price_data][unit_amount]', 0)) * int(
+                params.get('line_items[0][quantity]', 1)),
+            'currency': params.get('line_items[0][price_data][currency]', 'usd').lower(),
+        }
+        self.sessions[session_id] = session
+        return session
+
+    def get_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                params = dict(parse_qsl(self.rfile.read(length).decode()))
+                if fake.latency:
+                    time.sleep(fake.latency)
+
+                if self.path != '/v1/checkout/sessions':
+                    return self.send_json(404, {'error': {'type': 'invalid_request_error', 'message': 'Not found'}})
+
+                key = self.headers.get('Idempotency-Key')
+                with fake.lock:
+                    fake.requests_count += 1
+                    if key and key in fake.idempotent_responses:
+                        session = fake.idempotent_responses[key]
+                    else:
+                        session = fake.create_session(params)
+                        if key:
+                            fake.idempotent_responses[key] = session
+                self.send_json(200, session)
+
+            def send_json(self, status, data):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+# Stripe webhook imzosi: "t=<vaqt>,v1=<HMAC-SHA256(secret, "<vaqt>.<payload>")>"
+def sign_payload(payload, secret, timestamp=None):
+    timestamp = int(timestamp or time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+def make_checkout_completed_event(order_id, event_id=None, payment_status='paid', amount_total=0, currency='usd',
+                                  session_id=None):
+    return json.dumps({
+        'id': event_id or 'evt_test_' + uuid.uuid4().hex,
+        'object': 'event',
+        'type': 'checkout.session.completed',
+        'created': int(time.time()),
+        'data': {
+            'object': {
+                'id': session_id or 'cs_test_' + uuid.uuid4().hex,
+                'object': 'checkout.session',
+                'client_reference_id': str(order_id),
+                'metadata': {'order_id': str(order_id)},
+                'payment_status': payment_status,
+                'amount_total': amount_total,
+                'currency': currency,
+            }
+        }
+    })
@@ -0,0 +1,279 @@
+import heapq
+import os
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_started
+from django.dispatch import receiver
+from django.urls import reverse
+from .models import Category, Product
+from .routers import pin_primary
+
+PRODUCT, CATEGORY = 0, 1
+TOP_K = 8
+# Diapazoni shundan katta prefikslarning (trie tugunlarining) bolalari uchun top-k oldindan
+# tayyorlanadi, qolgan prefikslarda esa diapazon shundan oshmaydi va to'g'ridan-to'g'ri ko'riladi
+HEAVY_RANGE = 256
+# Har bir nomdagi shuncha so'z boshidan qidiriladi ("div" -> "Rolex diver")
+MAX_WORDS = 8
+WORD_RE = re.compile(r'\w+')
+
+POSITION_KEY = 'store:suggest:position'
+LOG_KEY = 'store:suggest:log:{position}'
+# Worker shuncha o'zgarishdan ko'proq orqada qolsa indeksni qaytadan quradi
+LOG_SIZE = 1000
+
+_index = None
+_lock = threading.RLock()
+_warmed_pid = None
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall(text.casefold()))[:255]
+
+
+# Mahsulot va kategoriya nomlari bo'yicha xotiradagi prefiks indeksi. Har bir nomning so'z boshidan
+# boshlanadigan qismlari ("rolex diver", "diver") saralangan massivda turadi, qidiruv bisect bilan.
+# Yozuv = slot << 8 | so'z boshi, shuning uchun bitta yozuv 8 bayt, matnlar esa bir marta saqlanadi
+class SuggestIndex:
+    def __init__(self, position=0):
+        self.position = position  # o'zgarishlar jurnalining shu joyigacha qo'llangan
+        self.synced_at = time.monotonic()
+        self.texts = []  # "normallashtirilgan nom\tnom\tslug" (slot bo'yicha, bitta satr)
+        self.refs = array('q')  # pk * 2 + tur
+        self.scores = array('q')
+        self.slots = {}  # ref -> slot
+        self.free = []
+        self.entries = array('Q')
+        self.top = {}  # qisqa prefiks -> eng yaxshi slotlar
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def suffix(self, entry):
+        text = self.texts[entry >> 8]
+        return text[entry & 255:text.find('\t')]
+
+    def offsets(self, slot):
+        key = self.texts[slot].partition('\t')[0]
+        starts = [0] + [i + 1 for i, char in enumerate(key) if char == ' ']
+        return starts[:MAX_WORDS]
+
+    def build(self, items):
+        entries = []
+        for item in items:
+            slot = self.store(*item)
+            entries.extend(slot << 8 | offset for offset in self.offsets(slot))
+        entries.sort(key=self.suffix)
+        self.entries = array('Q', entries)
+
+        nodes = [('', 0, len(self.entries))]
+        while nodes:
+            prefix, start, stop = nodes.pop()
+            length = len(prefix) + 1
+            while start < stop:
+                child = self.suffix(self.entries[start])[:length]
+                end = bisect_right(self.entries, child, start, stop, key=lambda entry: self.suffix(entry)[:length])
+                if len(child) == length:
+                    self.top[child] = self.best({entry >> 8 for entry in self.entries[start:end]})
+                    if end - start > HEAVY_RANGE:
+                        nodes.append((child, start, end))
+                start = end
+        return self
+
+    def store(self, ref, title, slug, score):
+        slot = self.free.pop() if self.free else len(self.texts)
+        if slot == len(self.texts):
+            self.texts.append('')
+            self.refs.append(0)
+            self.scores.append(0)
+        self.texts[slot] = f'{normalize(title)}\t{title}\t{slug or ""}'
+        self.refs[slot] = ref
+        self.scores[slot] = score
+        self.slots[ref] = slot
+        return slot
+
+    def best(self, slots, limit=TOP_K):
+        return tuple(heapq.nlargest(limit, slots, key=self.scores.__getitem__))
+
+    def scan(self, prefix):
+        slots = set()
+        for position in range(bisect_left(self.entries, prefix, key=self.suffix), len(self.entries)):
+            entry = self.entries[position]
+            if not self.suffix(entry).startswith(prefix):
+                break
+            slots.add(entry >> 8)
+        return slots
+
+    # Yozuv tegishli bo'lgan, top-k tayyorlangan prefikslar (qisqasidan uzuniga)
+    def top_prefixes(self, suffix):
+        for length in range(1, len(suffix) + 1):
+            if suffix[:length] not in self.top:
+                break
+            yield suffix[:length]
+
+    def add(self, ref, title, slug, score):
+        with self.lock:
+            self.discard(ref)
+            slot = self.store(ref, title, slug, score)
+            for offset in self.offsets(slot):
+                entry = slot << 8 | offset
+                suffix = self.suffix(entry)
+                self.entries.insert(bisect_left(self.entries, suffix, key=self.suffix), entry)
+                for prefix in list(self.top_prefixes(suffix)):
+                    self.top[prefix] = self.best(set(self.top[prefix]) | {slot})
+
+    def remove(self, ref):
+        with self.lock:
+            self.discard(ref)
+
+    def discard(self, ref):
+        slot = self.slots.pop(ref, None)
+        if slot is None:
+            return
+        prefixes = set()
+        for offset in self.offsets(slot):
+            entry = slot << 8 | offset
+            suffix = self.suffix(entry)
+            position = bisect_left(self.entries, suffix, key=self.suffix)
+            while self.entries[position] != entry:
+                position += 1
+            del self.entries[position]
+            prefixes.update(self.top_prefixes(suffix))
+        self.texts[slot] = ''
+        self.free.append(slot)
+        for prefix in prefixes:  # bo'shagan o'rin diapazondagi keyingi eng yaxshisi bilan to'ldiriladi
+            if slot in self.top[prefix]:
+                slots = self.scan(prefix)
+                if slots:
+                    self.top[prefix] = self.best(slots)
+                else:
+                    del self.top[prefix]
+
+    def lookup(self, query, limit=TOP_K):
+        prefix = normalize(query or '')
+        if not prefix:
+            return []
+        with self.lock:
+            if prefix in self.top:
+                slots = self.top[prefix][:limit]
+            else:
+                slots = self.best(self.scan(prefix), limit)
+            return [self.get_item(slot) for slot in slots]
+
+    def get_item(self, slot):
+        title, _, slug = self.texts[slot].partition('\t')[2].rpartition('\t')
+        if self.refs[slot] % 2 == CATEGORY:
+            return {'type': 'category', 'title': title, 'url': reverse('category_detail', kwargs={'slug': slug})}
+        return {'type': 'product', 'title': title, 'url': reverse('product_detail', kwargs={'slug': slug})}
+
+
+# Reyting: kategoriyalar (ildizga yaqinlari) oldin, keyin omborda bor va yangiroq produktlar
+def product_item(pk, title, slug, quantity):
+    return pk * 2 + PRODUCT, title, slug, (quantity > 0) << 40 | pk
+
+
+def category_item(pk, title, slug, depth):
+    return pk * 2 + CATEGORY, title, slug, (4 << 40) - depth
+
+
+def get_items():
+    for row in Category.objects.values_list('pk', 'title', 'slug', 'depth').iterator():
+        yield category_item(*row)
+    for row in Product.objects.values_list('pk', 'title', 'slug', 'quantity').iterator():
+        yield product_item(*row)
+
+
+# O'zgarishlar cache dagi jurnalga yoziladi, har bir worker keyingi so'rovda ularni o'zi qo'llaydi
+def record(change):
+    if cache.add(POSITION_KEY, 1, None):
+        position = 1
+    else:
+        try:
+            position = cache.incr(POSITION_KEY)
+        except ValueError:
+            cache.set(POSITION_KEY, 1, None)
+            position = 1
+    cache.set(LOG_KEY.format(position=position), change, settings.CATALOG_CACHE_TIMEOUT)
+
+
+# Ombordagi son queryset.update() bilan o'zgaradi (stock.py), post_save bo'lmaydi. Reytingdagi "omborda bor"
+# biti faqat son 0 ga tushganda yoki 0 dan chiqqanda o'zgaradi, ya'ni yangi son o'zgarish miqdoridan
+# oshmasa: faqat shular jurnalga yoziladi
+def record_stock(quantities):
+    with pin_primary():
+        products = list(Product.objects.filter(pk__in=list(quantities)).values_list('pk', 'title', 'slug', 'quantity'))
+    for pk, title, slug, quantity in products:
+        if quantity <= quantities[pk]:
+            record(('add', *product_item(pk, title, slug, quantity)))
+
+
+# Jurnal pozitsiyasi ko'pi bilan SUGGEST_SYNC_SECONDS da bir marta o'qiladi (db cache da bu so'rov)
+def sync(index):
+    now = time.monotonic()
+    if now - index.synced_at < settings.SUGGEST_SYNC_SECONDS:
+        return index
+    index.synced_at = now
+    position = cache.get(POSITION_KEY, 0)
+    if position == index.position:
+        return index
+    if position < index.position or position - index.position > LOG_SIZE:
+        return None  # cache tozalangan yoki juda orqada qolgan: qaytadan qurish kerak
+    with _lock:
+        keys = [LOG_KEY.format(position=number) for number in range(index.position + 1, position + 1)]
+        changes = cache.get_many(keys)
+        for key in keys:
+            if key not in changes:  # boshqa worker hali yozib ulgurmagan, keyingi safar
+                break
+            action, *args = changes[key]
+            getattr(index, action)(*args)
+            index.position += 1
+    return index
+
+
+def get_index():
+    global _index
+    index = _index
+    if index is not None:
+        index = sync(index)
+    if index is None:
+        with _lock:
+            index = _index
+            if index is not None:
+                index = sync(index)
+            if index is None:
+                with pin_primary():  # jurnal pozitsiyasigacha bo'lgan hamma o'zgarishlar kerak
+                    index = _index = SuggestIndex(cache.get(POSITION_KEY, 0)).build(get_items())
+    return index
+
+
+# Indeks har bir process da birinchi so'rov kelganda fonda quriladi. wsgi.py import paytida emas:
+# gunicorn --preload da master fork qilinadi, thread esa bola processga o'tmaydi
+@receiver(request_started)
+def warm_up(**kwargs):
+    global _warmed_pid
+    if settings.SUGGEST_WARM_UP and _warmed_pid != os.getpid():
+        _warmed_pid = os.getpid()
+        threading.Thread(target=get_index, daemon=True).start()
+
+
+def reset():
+    global _index
+    _index = None
+
+
+# Fork dan keyin ota process dagi indeks va (boshqa thread ushlab turgan bo'lishi mumkin) lock
+# bola processda ishlatilmaydi: indeks o'zining birinchi so'rovida qaytadan quriladi
+def reset_after_fork():
+    global _lock, _warmed_pid
+    reset()
+    _lock = threading.RLock()
+    _warmed_pid = None
+
+
+os.register_at_fork(after_in_child=reset_after_fork)
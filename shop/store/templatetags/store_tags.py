@@ -1,58 +1,84 @@
-from django import template
-from store.models import *
-
-register = template.Library()
-
-
-# Otasi bor kategoriyalarni chiqarib beradi !
-@register.simple_tag()
-def get_categories():
-    return Category.objects.filter(parent=True)
-
-
-# Otasi yogini olib chiqadi !
-@register.simple_tag()
-def get_categories_gl():
-    return Category.objects.filter(parent=None)
-
-
-# Glavniy kategoriyaga tegishli kategoriyani olib beradi (subcategories)
-@register.simple_tag()
-def get_subcategories(category):
-    return Category.objects.filter(parent=category)
-
-
-@register.simple_tag()
-def get_sorted():
-    sorters = [
-        {
-            'title': 'Price',
-            'sorters': [
-                ('price', 'Cheap'),
-                ('-price', 'Expensive'),
-            ]
-        },
-        {
-            'title': 'Color',
-            'sorters': [
-                ('color', 'A - Z'),
-                ('-color', 'Z - A'),
-            ]
-        },
-        {
-            'title': 'Size',
-            'sorters': [
-                ('size', 'Small'),
-                ('-size', 'Large'),
-            ]
-        }
-    ]
-    return sorters
-
-
-# like bosilgan produktlani ajratish
-@register.simple_tag()
-def get_favourite_products(user):
-    fav = FavouriteProducts.objects.filter(user=user)
-    products = [i.product for i in fav]
-    return products
+from django import template
+from django.utils.safestring import mark_safe
+from store.models import *
+from store.catalog import SORTERS
+from store.category_tree import get_tree
+from store.cache import get_or_build
+from store.cards import render_cards
+from django.template.loader import render_to_string
+
+register = template.Library()
+
+
+# Foydalanuvchiga bog'liq bo'lmagan shablon bo'lagi (menu, karusel): katalog versiyasi
+# bilan cache ga yoziladi va Category o'zgargunicha qayta render qilinmaydi
+@register.simple_tag()
+def cached_include(template_name, name):
+    return get_or_build(f'fragment:{name}', lambda: mark_safe(render_to_string(template_name)))
+
+
+# Otasi bor kategoriyalarni chiqarib beradi ! (daraxt nusxasidan, bazaga bormaydi)
+@register.simple_tag()
+def get_categories():
+    tree = get_tree()
+    return [category for category in tree.by_id.values() if category.parent_id]
+
+
+# Otasi yogini olib chiqadi !
+@register.simple_tag()
+def get_categories_gl():
+    return get_tree().roots
+
+
+# Glavniy kategoriyaga tegishli kategoriyani olib beradi (subcategories)
+@register.simple_tag()
+def get_subcategories(category):
+    return get_tree().get_children(category.pk)
+
+
+# Breadcrumbs: ildizdan shu kategoriyagacha
+@register.simple_tag()
+def get_breadcrumbs(category):
+    return get_tree().get_ancestors(category.pk)
+
+
+@register.simple_tag()
+def get_sorted():
+    return SORTERS
+
+
+# Joriy GET parametrlarini saqlab, bittasini almashtirilgan havola (?sort=...&color=...)
+@register.simple_tag(takes_context=True)
+def url_replace(context, field, value):
+    query = context['request'].GET.copy()
+    query.pop('cursor', None)
+    query.pop('page', None)
+    query[field] = value
+    return '?' + query.urlencode()
+
+
+# Ko'p tanlovli filtr (rang): qiymat bor bolsa olib tashlaydi, bolmasa qo'shadi
+@register.simple_tag(takes_context=True)
+def url_toggle(context, field, value):
+    query = context['request'].GET.copy()
+    query.pop('cursor', None)
+    query.pop('page', None)
+    values = query.getlist(field)
+    if value in values:
+        values.remove(value)
+    else:
+        values.append(value)
+    query.setlist(field, values)
+    return '?' + query.urlencode()
+
+
+# <picture>: WebP va JPEG srcset (kesilgan nusxalar tayyor bo'lsa), bo'lmasa asl rasm yoki fallback
+@register.inclusion_tag('store/components/_picture.html')
+def picture(image, sizes='100vw', alt='', css_class='', fallback='', width=''):
+    return {'image': image, 'sizes': sizes, 'alt': alt, 'css_class': css_class, 'fallback': fallback, 'width': width}
+
+
+# Produkt kartochkalari ro'yxati: har biri cache dan (store.cards), like holati har foydalanuvchiga alohida
+@register.simple_tag(takes_context=True)
+def product_cards(context, products):
+    return render_cards(products, context.get('favourite_ids', ()))
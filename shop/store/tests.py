@@ -1,3 +1,1151 @@
-from django.test import TestCase
-
-# Create your tests here.
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO, BytesIO
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import call_command
+from django.contrib.auth.models import User, AnonymousUser
+from django.db import connection, OperationalError
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import Sum
+from django.db.models.signals import post_save
+from django.template import Template, Context
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.connection import ConnectionDoesNotExist
+
+from PIL import Image
+
+from . import stock, payments, category_tree, search, suggest, thumbnails, cards
+from . import cache as store_cache
+from .page_cache import PageCacheMiddleware
+from .pagination import encode_cursor
+from .utils import get_favourite_ids, get_related_products
+from .signals import catalog_changed, image_changing, product_moving
+from .routers import ReplicaRouter, ReplicaPinMiddleware, PIN_COOKIE, pin_primary
+from .stripe_fake import FakeStripeServer, sign_payload, make_checkout_completed_event
+from .models import Category, Product, Gallery, FavouriteProducts, Customer, Order, OrderProduct, \
+    PaymentEvent, Review
+
+
+# Testlar paytida yaratilgan placeholder va kesilgan rasmlar vaqtinchalik papkaga yoziladi.
+# Cache xotirada: so'rovlar sonini tekshiradigan testlar faqat katalog so'rovlarini sanaydi.
+# Autocomplete indeksi fonda qurilmaydi, testlar uni o'zi quradi
+def setUpModule():
+    media = tempfile.mkdtemp()
+    # Cache sozlamalardagidek (db cache). Versiya va jurnal har safar o'qiladi: TestCase cache jadvalini
+    # ham orqaga qaytaradi, process da eslab qolingani boshqa testdan qolgan bo'ladi
+    overrides = override_settings(MEDIA_ROOT=media, SUGGEST_WARM_UP=False, CATALOG_VERSION_TTL=0,
+                                  SUGGEST_SYNC_SECONDS=0)
+    overrides.enable()
+    unittest.addModuleCleanup(shutil.rmtree, media)
+    unittest.addModuleCleanup(overrides.disable)
+
+
+# Db cache jadvalisiz: sovuq sahifa kartochkalarni bittalab (savepoint ichida) yozadi
+def count_catalog_queries(queries):
+    return sum('store_cache' not in query['sql'] and 'SAVEPOINT' not in query['sql']
+               for query in queries.captured_queries)
+
+
+def create_catalog(categories=1, subcategories=1, products=1, prefix='p'):
+    for i in range(categories):
+        parent = Category.objects.create(title=f'{prefix} cat {i}', slug=f'{prefix}-cat-{i}')
+        for j in range(subcategories):
+            sub = Category.objects.create(title=f'{prefix} sub {i} {j}', slug=f'{prefix}-sub-{i}-{j}', parent=parent)
+            for k in range(products):
+                product = Product.objects.create(title=f'{prefix} product {i} {j} {k}',
+                                                 slug=f'{prefix}-product-{i}-{j}-{k}',
+                                                 category=sub, price=10, quantity=5, size=40, color='black')
+                Gallery.objects.create(product=product, image=f'products/{prefix}-{i}-{j}-{k}.png')
+
+
+class ProductListQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+
+    def count_home_page_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product_list'))
+        self.assertEqual(response.status_code, 200)
+        return count_catalog_queries(queries)
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        create_catalog(prefix='small')
+        catalog_changed()  # TestCase da on_commit ishlamaydi
+        small = self.count_home_page_queries()
+
+        create_catalog(categories=3, subcategories=3, products=5, prefix='big')
+        catalog_changed()
+        self.assertEqual(self.count_home_page_queries(), small)
+
+    def test_query_count_does_not_grow_with_favourites(self):
+        self.client.force_login(self.user)
+        create_catalog(prefix='small')
+        catalog_changed()
+        small = self.count_home_page_queries()
+
+        create_catalog(categories=2, subcategories=2, products=4, prefix='big')
+        catalog_changed()
+        for product in Product.objects.all():
+            FavouriteProducts.objects.create(user=self.user, product=product)
+        self.assertEqual(self.count_home_page_queries(), small)
+
+    def test_warm_page_reads_all_cards_at_once(self):
+        self.client.force_login(self.user)
+        create_catalog(categories=2, subcategories=3, products=2)
+        self.client.get(reverse('product_list'))
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('product_list'))
+        self.assertEqual(sum(':store:card:' in query['sql'] for query in queries.captured_queries), 1)
+
+
+class FavouriteIdsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+        create_catalog(subcategories=2, products=4)
+        for product in Product.objects.all()[::2]:
+            FavouriteProducts.objects.create(user=self.user, product=product)
+        product = Product.objects.first()
+        self.urls = [reverse('product_list'), reverse('category_detail', kwargs={'slug': 'p-cat-0'}),
+                     reverse('product_detail', kwargs={'slug': product.slug})]
+
+    def count_favourite_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return sum('store_favouriteproducts' in query['sql'] for query in queries.captured_queries)
+
+    def test_one_query_per_request(self):
+        self.client.force_login(self.user)
+        for url in self.urls:  # header, kartochkalar va detal sahifa bitta to'plamni ishlatadi
+            self.assertEqual(self.count_favourite_queries(url), 1, url)
+
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertEqual(len(get_favourite_ids(request)), 4)
+            get_favourite_ids(request)
+
+    def test_anonymous_user_costs_no_queries(self):
+        for url in self.urls:
+            self.assertEqual(self.count_favourite_queries(url), 0, url)
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_favourite_ids(request), frozenset())
+
+
+class RelatedProductsTest(TestCase):
+    def setUp(self):
+        create_catalog(subcategories=2, products=3)
+
+    def test_never_current_product_and_no_duplicates(self):
+        for product in Product.objects.all():
+            for attempt in range(10):
+                related = [p.pk for p in get_related_products(product, count=2)]
+                self.assertNotIn(product.pk, related)
+                self.assertEqual(len(set(related)), 2)
+                self.assertEqual(set(Product.objects.filter(pk__in=related).values_list('category_id', flat=True)),
+                                 {product.category_id})
+
+    def test_small_category_falls_back_to_catalog(self):
+        product = Product.objects.first()
+        for attempt in range(10):
+            related = get_related_products(product, count=4)
+            self.assertEqual(len({p.pk for p in related}), 4)
+            self.assertNotIn(product, related)
+            self.assertEqual([p.category_id == product.category_id for p in related], [True, True, False, False])
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        product = Product.objects.first()
+
+        def max_queries():
+            counts = []
+            for attempt in range(10):
+                with CaptureQueriesContext(connection) as queries:
+                    self.assertEqual(len(get_related_products(product, count=2)), 2)
+                counts.append(len(queries))
+            return max(counts)
+
+        small = max_queries()
+        self.assertLessEqual(small, 2 + 2 * 2)  # chegaralar + har bir tanlovga ko'pi bilan 2 ta qidiruv
+        Product.objects.bulk_create([
+            Product(title=f'Big {i}', slug=f'big-{i}', category=product.category, price=10, quantity=5,
+                    size=40, color='black')
+            for i in range(300)
+        ])
+        create_catalog(categories=2, subcategories=2, products=10, prefix='big')
+        self.assertLessEqual(max_queries(), 2 + 2 * 2)
+
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class StockReservationStressTest(TransactionTestCase):
+    threads = 8
+    attempts_per_thread = 10
+
+    def setUp(self):
+        category = Category.objects.create(title='Watches', slug='watches')
+        self.product = Product.objects.create(title='Last watch', slug='last-watch', category=category,
+                                              price=100, quantity=5, size=40, color='gold')
+        self.orders = []
+        for i in range(self.threads):
+            user = User.objects.create_user(username=f'buyer{i}', password='secret-pass')
+            customer = Customer.objects.create(user=user, name=user.username)
+            self.orders.append(Order.objects.create(customer=customer))
+
+    def run_in_threads(self, target):
+        errors = []
+
+        def worker(order):
+            try:
+                for attempt in range(self.attempts_per_thread):
+                    while True:
+                        try:
+                            target(order)
+                            break
+                        except OperationalError:  # sqlite "database table is locked"
+                            time.sleep(0.001)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(order,)) for order in self.orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_reservations_never_oversell(self):
+        self.run_in_threads(lambda order: stock.reserve(order, self.product.pk))
+
+        self.product.refresh_from_db()
+        reserved = OrderProduct.objects.filter(product=self.product).aggregate(total=Sum('quantity'))['total']
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(reserved, 5)
+
+    def test_concurrent_add_and_release_keep_stock_consistent(self):
+        def add_then_release(order):
+            stock.reserve(order, self.product.pk, quantity=2)
+            stock.release(order, self.product.pk, quantity=3)
+
+        self.run_in_threads(add_then_release)
+
+        self.product.refresh_from_db()
+        reserved = OrderProduct.objects.filter(product=self.product).aggregate(total=Sum('quantity'))['total']
+        self.assertEqual(self.product.quantity + (reserved or 0), 5)
+        self.assertGreaterEqual(self.product.quantity, 0)
+        self.assertFalse(OrderProduct.objects.filter(quantity__lt=0).exists())
+
+    def test_paid_order_cannot_reserve(self):
+        Order.objects.filter(pk=self.orders[0].pk).update(is_paid=True)
+
+        self.assertFalse(stock.reserve(self.orders[0], self.product.pk))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+        self.assertFalse(OrderProduct.objects.exists())
+
+    def test_expired_reservations_return_to_stock(self):
+        stock.reserve(self.orders[0], self.product.pk, quantity=3)
+        later = timezone.now() + timedelta(minutes=settings.CART_RESERVATION_MINUTES + 1)
+
+        self.assertEqual(stock.release_expired(now=later), 3)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+    def test_expired_release_returns_only_what_is_left_in_cart(self):
+        stock.reserve(self.orders[0], self.product.pk, quantity=3)
+        stock.release(self.orders[0], self.product.pk, quantity=2)
+        later = timezone.now() + timedelta(minutes=settings.CART_RESERVATION_MINUTES + 1)
+
+        self.assertEqual(stock.release_expired(now=later), 1)
+        self.assertEqual(stock.release_expired(now=later), 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+
+class CartQueryCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+        self.client.force_login(self.user)
+        create_catalog(subcategories=2, products=5)
+        customer = Customer.objects.create(user=self.user, name='buyer')
+        self.order = Order.objects.create(customer=customer)
+
+    def count_cart_queries(self):
+        self.client.get(reverse('cart'))  # kategoriya daraxti nusxasini yuklab oladi
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('cart'))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_cart_totals(self):
+        for product in Product.objects.all()[:3]:
+            stock.reserve(self.order, product.pk, quantity=2)
+
+        response = self.client.get(reverse('cart'))
+        self.assertEqual(response.context['order'].get_cart_total_quantity, 6)
+        self.assertEqual(response.context['order'].get_cart_total_price, 60)
+
+    def test_query_count_does_not_grow_with_cart_lines(self):
+        stock.reserve(self.order, Product.objects.first().pk)
+        one_line = self.count_cart_queries()
+
+        for product in Product.objects.all()[1:]:
+            stock.reserve(self.order, product.pk)
+        self.assertEqual(self.count_cart_queries(), one_line)
+
+    def test_cart_summary_follows_mutations(self):
+        product = Product.objects.first()
+        stock.reserve(self.order, product.pk, quantity=3)
+        stock.release(self.order, product.pk)
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_quantity, 2)
+        self.assertEqual(self.order.total_price, 20)
+
+        Order.objects.filter(pk=self.order.pk).update(total_quantity=99)
+        call_command('rebuild_cart_summaries', stdout=StringIO())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_quantity, 2)
+
+    def test_finalize_order_keeps_history_and_opens_new_cart(self):
+        product = Product.objects.first()
+        stock.reserve(self.order, product.pk, quantity=2)
+
+        self.assertTrue(stock.finalize_order(self.order))
+        self.assertFalse(stock.finalize_order(self.order))
+        Product.objects.filter(pk=product.pk).update(price=500)
+
+        self.order.refresh_from_db()
+        line = self.order.orderproduct_set.get()
+        self.assertTrue(self.order.is_paid)
+        self.assertEqual(line.price, 10)
+        self.assertIsNone(line.reserved_at)
+        self.assertEqual(self.order.get_cart_total_price, 20)
+
+        response = self.client.get(reverse('cart'))
+        self.assertNotEqual(response.context['order'].pk, self.order.pk)
+        self.assertEqual(response.context['order'].get_cart_total_quantity, 0)
+
+    def test_clear_returns_stock(self):
+        products = list(Product.objects.all()[:2])
+        for product in products:
+            stock.reserve(self.order, product.pk, quantity=2)
+
+        stock.release_all(self.order)
+        self.assertFalse(self.order.orderproduct_set.exists())
+        self.assertEqual([p.quantity for p in Product.objects.filter(pk__in=[p.pk for p in products])], [5, 5])
+
+
+class CheckoutSessionTest(TestCase):
+    def setUp(self):
+        self.fake = FakeStripeServer().start()
+        self.addCleanup(self.fake.stop)
+        overrides = override_settings(STRIPE_API_BASE=self.fake.url, STRIPE_SECRET_KEY='sk_test_fake')
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        user = User.objects.create_user(username='buyer', password='secret-pass')
+        self.client.force_login(user)
+        create_catalog()
+        self.order = Order.objects.create(customer=Customer.objects.create(user=user, name='buyer'))
+        stock.reserve(self.order, Product.objects.get().pk, quantity=2)
+
+    def test_retries_reuse_one_session(self):
+        first = self.client.post(reverse('payment'))
+        second = self.client.post(reverse('payment'))
+
+        self.assertEqual(first.status_code, 303)
+        self.assertEqual(first['Location'], second['Location'])
+        self.assertEqual(len(self.fake.sessions), 1)
+        session = next(iter(self.fake.sessions.values()))
+        self.assertEqual(session['amount_total'], 2000)
+        self.assertEqual(session['client_reference_id'], str(self.order.pk))
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.checkout_session_id, self.order.checkout_amount), (session['id'], 20))
+
+    def test_changed_cart_gets_new_session(self):
+        self.client.post(reverse('payment'))
+        stock.reserve(self.order, Product.objects.get().pk)
+        self.client.post(reverse('payment'))
+        self.assertEqual(len(self.fake.sessions), 2)
+
+    async def test_async_view_under_asgi(self):
+        self.async_client.cookies = self.client.cookies
+        response = await self.async_client.post(reverse('payment'))
+        self.assertEqual(response.status_code, 303)
+        self.assertEqual(len(self.fake.sessions), 1)
+
+    @override_settings(DEBUG=True)
+    def test_middleware_chain_stays_async(self):
+        with self.assertNoLogs('django.request', 'DEBUG'):  # "... handler adapted for middleware" bo'lmasin
+            ASGIHandler()
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET='whsec_test')
+class StripeWebhookTest(TestCase):
+    def setUp(self):
+        create_catalog()
+        user = User.objects.create_user(username='buyer', password='secret-pass')
+        self.order = Order.objects.create(customer=Customer.objects.create(user=user, name='buyer'))
+        stock.reserve(self.order, Product.objects.get().pk)
+        payments.remember_checkout_session(self.order, {'id': 'cs_open', 'amount_total': 1000})
+
+    def send(self, payload, secret='whsec_test'):
+        return self.client.post(reverse('stripe_webhook'), payload, content_type='application/json',
+                                HTTP_STRIPE_SIGNATURE=sign_payload(payload, secret))
+
+    def test_signed_event_is_queued_once_and_finalizes_order(self):
+        payload = make_checkout_completed_event(self.order.pk, event_id='evt_1', amount_total=1000,
+                                                session_id='cs_open')
+        self.assertEqual(self.send(payload).status_code, 200)
+        self.assertEqual(self.send(payload).status_code, 200)
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.is_paid)
+
+        self.assertEqual(payments.process_payment_events(), 1)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.is_paid)
+        self.assertEqual(PaymentEvent.objects.get().status, PaymentEvent.DONE)
+
+    def test_price_change_after_checkout_still_finalizes(self):
+        Product.objects.update(price=15)  # admin sessiya yaratilgandan keyin narxni o'zgartirdi
+        self.send(make_checkout_completed_event(self.order.pk, amount_total=1000, session_id='cs_open'))
+
+        self.assertEqual(payments.process_payment_events(), 1)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.is_paid)
+        self.assertEqual(PaymentEvent.objects.get().status, PaymentEvent.DONE)
+
+    def test_stale_session_for_cheaper_cart_does_not_finalize(self):
+        stock.reserve(self.order, Product.objects.get().pk)  # to'lovdan keyin savatga yana qo'shilgan
+        payments.remember_checkout_session(self.order, {'id': 'cs_new', 'amount_total': 2000})
+        self.send(make_checkout_completed_event(self.order.pk, event_id='evt_cheap', amount_total=1000,
+                                                session_id='cs_open'))
+        self.send(make_checkout_completed_event(self.order.pk, event_id='evt_eur', amount_total=2000,
+                                                currency='eur', session_id='cs_new'))
+
+        self.assertEqual(payments.process_payment_events(), 2)
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.is_paid)
+        self.assertEqual(set(PaymentEvent.objects.values_list('status', flat=True)), {PaymentEvent.FAILED})
+        self.assertIn('PaymentMismatch', PaymentEvent.objects.get(event_id='evt_cheap').error)
+
+    def test_bad_signature_is_rejected(self):
+        payload = make_checkout_completed_event(self.order.pk)
+        self.assertEqual(self.send(payload, secret='whsec_wrong').status_code, 400)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_success_page_does_not_finalize(self):
+        self.client.force_login(self.order.customer.user)
+        self.client.get(reverse('success'))
+        self.order.refresh_from_db()
+        self.assertFalse(self.order.is_paid)
+
+
+class CategoryKeysetPaginationTest(TestCase):
+    def setUp(self):
+        create_catalog(subcategories=2, products=9)
+        Product.objects.filter(pk__in=Product.objects.values('pk')[:6]).update(price=25)  # bir xil narxlar
+
+    def walk(self, query):
+        url = reverse('category_detail', kwargs={'slug': 'p-cat-0'})
+        response = self.client.get(url, query)
+        pages = [[p.pk for p in response.context['products']]]
+        while response.context['next_page_url']:
+            response = self.client.get(url + response.context['next_page_url'])
+            pages.append([p.pk for p in response.context['products']])
+        return pages, response
+
+    def test_cursor_pages_cover_category_once_in_order(self):
+        pages, last = self.walk({'sort': '-price', 'per_page': 4})
+        seen = [pk for page in pages for pk in page]
+        expected = list(Product.objects.order_by('-price', '-pk').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual([len(page) for page in pages], [4, 4, 4, 4, 2])
+
+        previous = self.client.get(reverse('category_detail', kwargs={'slug': 'p-cat-0'})
+                                   + last.context['previous_page_url'])
+        self.assertEqual([p.pk for p in previous.context['products']], pages[-2])
+
+    def test_page_size_is_clamped(self):
+        pages, last = self.walk({'per_page': 1000})
+        self.assertEqual(len(pages[0]), 18)
+
+    def test_bad_cursor_serves_first_page(self):
+        url = reverse('category_detail', kwargs={'slug': 'p-cat-0'})
+        first = [p.pk for p in self.client.get(url, {'sort': '-price'}).context['products']]
+        for cursor in [encode_cursor(['abc', 5]), encode_cursor([25]), encode_cursor(['NaN', 5]),
+                       encode_cursor([[1], {'a': 1}]), encode_cursor([25, 5], 'sideways'), 'not-a-cursor!']:
+            response = self.client.get(url, {'sort': '-price', 'cursor': cursor})
+            self.assertEqual(response.status_code, 200, cursor)
+            self.assertEqual([p.pk for p in response.context['products']], first, cursor)
+
+        product = Product.objects.first()
+        response = self.client.get(reverse('product_reviews', kwargs={'product_id': product.pk}),
+                                    {'cursor': encode_cursor(['yesterday', 'x'])})
+        self.assertEqual(response.status_code, 200)
+
+
+class CategoryFilterTest(TestCase):
+    def setUp(self):
+        create_catalog(subcategories=2, products=4)
+        create_catalog(prefix='other')
+        for i, product in enumerate(Product.objects.filter(category__parent__slug='p-cat-0').order_by('pk')):
+            product.price = 10 * (i + 1)
+            product.color = ['black', 'gold', 'silver'][i % 3]
+            product.save()
+        self.url = reverse('category_detail', kwargs={'slug': 'p-cat-0'})
+
+    def test_unknown_sort_is_ignored(self):
+        response = self.client.get(self.url, {'sort': 'category__parent__title'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['products']), 8)
+
+    def test_type_outside_category_is_not_shown(self):
+        response = self.client.get(self.url, {'type': 'other-sub-0-0'})
+        self.assertEqual(list(response.context['products']), [])
+
+    def test_range_and_color_filters(self):
+        response = self.client.get(self.url + '?price_min=20&price_max=60&color=gold&color=silver&sort=price')
+        self.assertEqual([p.price for p in response.context['products']], [20, 30, 50, 60])
+
+        colors = {row['color']: row['count'] for row in response.context['facets']['colors']}
+        self.assertEqual(colors, {'black': 1, 'gold': 2, 'silver': 2})
+
+    def test_non_finite_numbers_are_ignored(self):
+        for value in ['nan', 'NaN', 'Infinity', '-inf', 'sNaN']:
+            response = self.client.get(self.url, {'price_min': value, 'size_max': value})
+            self.assertEqual(response.status_code, 200, value)
+            self.assertEqual(len(response.context['products']), 8, value)
+
+
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        self.root = Category.objects.create(title='Jewellery', slug='jewellery')
+        self.rings = Category.objects.create(title='Rings', slug='rings', parent=self.root)
+        self.gold = Category.objects.create(title='Gold rings', slug='gold-rings', parent=self.rings)
+        Product.objects.create(title='Deep ring', slug='deep-ring', category=self.gold,
+                               price=10, quantity=1, size=17, color='gold')
+
+    def test_paths_follow_moves(self):
+        other = Category.objects.create(title='Watches', slug='watches')
+        self.rings.parent = other
+        self.rings.save()
+
+        self.gold.refresh_from_db()
+        self.assertEqual(self.gold.path, f'{other.pk}/{self.rings.pk}/{self.gold.pk}/')
+        self.assertEqual(self.gold.depth, 2)
+        self.assertEqual(list(self.gold.get_ancestors()), [other, self.rings, self.gold])
+
+    def test_post_save_sees_path(self):
+        seen = []
+        receiver = lambda instance, **kwargs: seen.append((instance.path, instance.depth))
+        post_save.connect(receiver, sender=Category)
+        self.addCleanup(post_save.disconnect, receiver, sender=Category)
+
+        bags = Category.objects.create(title='Bags', slug='bags', parent=self.rings)
+        self.assertEqual(seen, [(f'{self.root.pk}/{self.rings.pk}/{bags.pk}/', 2)])
+        self.assertFalse(Category(title='Draft').get_descendant_products().exists())
+
+    def test_category_page_shows_products_from_any_depth(self):
+        response = self.client.get(reverse('category_detail', kwargs={'slug': 'jewellery'}))
+        self.assertEqual([p.slug for p in response.context['products']], ['deep-ring'])
+
+    @override_settings(CATALOG_VERSION_TTL=60)
+    def test_warm_navigation_menu_costs_no_queries(self):
+        category_tree.get_tree()
+        with self.assertNumQueries(0):
+            Template('{% load store_tags %}{% include "components/_header_nav-menu.html" %}').render(Context())
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(title='Bags', slug='bags')
+        self.assertIn('Bags', Template('{% include "components/_header_nav-menu.html" %}').render(Context()))
+
+    def test_catalog_version_changes_after_commit_and_never_goes_back(self):
+        version = store_cache.get_catalog_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(title='Bags', slug='bags')
+            self.assertEqual(store_cache.get_catalog_version(), version)
+        bumped = store_cache.get_catalog_version()
+        self.assertGreater(bumped, version)
+
+        cache.delete(store_cache.VERSION_KEY)  # db cache MAX_ENTRIES da kalitni o'chirib yuborgan
+        self.assertGreater(store_cache.get_catalog_version(), bumped)
+
+    @override_settings(CACHE_STATS_FLUSH_SECONDS=3600)
+    def test_counters_are_written_in_batches(self):
+        key = store_cache.STATS_KEY.format(name='batch', event='hit')
+        store_cache.flush_stats()
+        cache.delete(key)
+        for i in range(100):
+            store_cache.count('batch', 'hit')
+        self.assertIsNone(cache.get(key))  # hit larda cache ga yozuv yo'q
+        self.assertEqual(store_cache.get_stats()['batch'], {'hit': 100, 'miss': 0})
+
+    @override_settings(CATALOG_VERSION_TTL=60)
+    def test_menu_fragment_is_cached_until_category_changes(self):
+        navbar = Template('{% include "components/_navbar.html" %}')
+        navbar.render(Context())
+        before = store_cache.get_stats()['fragment:nav_menu']
+        with self.assertNumQueries(0):
+            navbar.render(Context())
+        self.assertEqual(store_cache.get_stats()['fragment:nav_menu']['hit'], before['hit'] + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(title='Bags', slug='bags')
+        self.assertIn('Bags', navbar.render(Context()))
+
+
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class ProductSearchTest(TestCase):
+    def setUp(self):
+        watches = Category.objects.create(title='Watches', slug='watches')
+        rings = Category.objects.create(title='Rings', slug='rings')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diver = Product.objects.create(title='Rolex diver', slug='rolex-diver', category=watches,
+                                                price=10, quantity=1, size=40, color='black',
+                                                description='Steel case')
+            self.ring = Product.objects.create(title='Gold ring', slug='gold-ring', category=rings,
+                                               price=10, quantity=1, size=17, color='gold',
+                                               description='Fits a rolex strap')
+
+    def test_title_match_ranks_first_and_autocomplete_matches_prefix(self):
+        self.assertEqual(search.get_index().search('rolex'), [self.diver.pk, self.ring.pk])
+        self.assertEqual(search.get_index().search('watches'), [self.diver.pk])
+        self.assertEqual(search.get_index().search('watch'), [])
+        self.assertEqual(search.get_index().autocomplete('ro'), [{'id': self.diver.pk, 'title': 'Rolex diver'}])
+
+    def test_index_follows_product_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diver.title = 'Omega diver'
+            self.diver.save()
+            self.ring.delete()
+        self.assertEqual(search.get_index().search('rolex'), [])
+        self.assertEqual(search.get_index().search('omega'), [self.diver.pk])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('search'), {'q': 'gold "ring"'})
+        self.assertEqual(list(response.context['products']), [self.ring])
+
+
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class SuggestTest(TestCase):
+    def setUp(self):
+        suggest.reset()
+        self.watches = Category.objects.create(title='Watches', slug='watches')
+        self.diver = Product.objects.create(title='Rolex Diver', slug='rolex-diver', category=self.watches,
+                                            price=10, quantity=1, size=40, color='black')
+        Product.objects.create(title='Rolex Oyster', slug='rolex-oyster', category=self.watches,
+                               price=10, quantity=0, size=40, color='gold')
+
+    def titles(self, query):
+        return [item['title'] for item in suggest.get_index().lookup(query)]
+
+    @override_settings(SUGGEST_SYNC_SECONDS=60)
+    def test_prefix_of_any_word_without_queries(self):
+        suggest.get_index()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.titles('ro'), ['Rolex Diver', 'Rolex Oyster'])  # omborda bori oldin
+            self.assertEqual(self.titles('DIV'), ['Rolex Diver'])
+            self.assertEqual(self.titles('rolex oys'), ['Rolex Oyster'])
+            self.assertEqual(self.titles('wa'), ['Watches'])
+
+    def test_index_follows_stock_changes(self):
+        suggest.get_index()
+        order = Order.objects.create()
+        with self.captureOnCommitCallbacks(execute=True):
+            stock.reserve(order, self.diver.pk)  # oxirgisi savatga tushdi
+        self.assertEqual(self.titles('ro'), ['Rolex Oyster', 'Rolex Diver'])  # ikkalasi ham yo'q, yangisi oldin
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stock.release_all(order)
+        self.assertEqual(self.titles('ro'), ['Rolex Diver', 'Rolex Oyster'])
+
+    def test_index_follows_saves_and_deletes(self):
+        suggest.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diver.title = 'Omega Seamaster'
+            self.diver.save()
+            Product.objects.create(title='Rolex Daytona', slug='rolex-daytona', category=self.watches,
+                                   price=10, quantity=1, size=40, color='gold')
+            Category.objects.create(title='Rings', slug='rings').delete()
+        self.assertEqual(self.titles('ro'), ['Rolex Daytona', 'Rolex Oyster'])
+        self.assertEqual(self.titles('seam'), ['Omega Seamaster'])
+        self.assertEqual(self.titles('ri'), [])
+
+    def test_change_log_keeps_advancing_after_rebuild(self):
+        inherited = suggest.get_index()
+        suggest.reset_after_fork()  # bola process: ota processdan kelgan indeks ishlatilmaydi
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(title='Rolex Daytona', slug='rolex-daytona', category=self.watches,
+                                   price=10, quantity=1, size=40, color='gold')
+        self.assertIsNot(suggest.get_index(), inherited)
+        self.assertEqual(self.titles('rolex d'), ['Rolex Daytona', 'Rolex Diver'])
+
+        for title in ['Rolex Submariner', 'Rolex Sky-Dweller']:
+            with self.captureOnCommitCallbacks(execute=True):
+                Product.objects.create(title=title, slug=title.lower().replace(' ', '-'), category=self.watches,
+                                       price=10, quantity=1, size=40, color='gold')
+            self.assertEqual(suggest.get_index().position, cache.get(suggest.POSITION_KEY))
+        self.assertEqual(self.titles('rolex s'), ['Rolex Sky-Dweller', 'Rolex Submariner'])
+
+    def test_json_view(self):
+        response = self.client.get(reverse('search_suggestions'), {'q': 'watch'})
+        self.assertEqual(response.json(), {'suggestions': [
+            {'type': 'category', 'title': 'Watches', 'url': reverse('category_detail', kwargs={'slug': 'watches'})}
+        ]})
+
+
+class ThumbnailTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media)
+        overrides = override_settings(MEDIA_ROOT=self.media, THUMBNAIL_WIDTHS=(160, 1280))
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        category = Category.objects.create(title='Watches', slug='watches')
+        self.product = Product.objects.create(title='Diver', slug='diver', category=category,
+                                              price=10, quantity=1, size=40, color='black')
+
+    def upload(self, name, color='red'):
+        buffer = BytesIO()
+        Image.new('RGBA', (800, 600), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def test_thumbnails_are_generated_after_commit_in_background(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            image = Gallery.objects.create(product=self.product, image=self.upload('diver.png'))
+        self.assertEqual(len(callbacks), 2)  # so'rov ichida kesilmaydi (ikkinchisi sahifa cache i uchun)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.get_first_photo(), image.image.url)
+
+        thumbnails.update_thumbnails('store.Gallery', image.pk)
+        image.refresh_from_db()
+        self.assertEqual(len(image.image_hash), 40)
+        self.assertEqual(image.preview_color, '#ff0000')
+        with Image.open(os.path.join(self.media, 'thumbs', image.image_hash[:2], f'{image.image_hash}-160.webp')) as small:
+            self.assertEqual(small.size, (160, 120))
+        with Image.open(os.path.join(self.media, 'thumbs', image.image_hash[:2], f'{image.image_hash}-1280.jpeg')) as big:
+            self.assertEqual(big.size, (800, 600))  # kattalashtirilmaydi
+        self.assertIn(f'/media/thumbs/{image.image_hash[:2]}/{image.image_hash}-160.webp 160w', image.webp_srcset)
+
+        image.image = self.upload('other.png', 'blue')
+        image.save()
+        self.assertEqual(image.image_hash, '')
+
+    def test_failed_background_job_is_logged(self):
+        with self.assertLogs('store.thumbnails', 'ERROR') as logs:
+            thumbnails.get_executor().submit(thumbnails.run_job, 'store.Missing', 1).result()
+        self.assertIn('Thumbnail generation failed for store.Missing 1', logs.output[0])
+
+    def test_backfill_command_uses_content_addressed_names(self):
+        first = Gallery.objects.create(product=self.product, image=self.upload('a.png'))
+        second = Gallery.objects.create(product=self.product, image=self.upload('b.png'))
+        out = StringIO()
+        call_command('generate_thumbnails', workers=2, stdout=out)
+        self.assertIn('Thumbnails ready for 2 images, 0 failed', out.getvalue())
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_hash, second.image_hash)  # bir xil mazmun, bitta nusxa
+        self.assertEqual(len(os.listdir(os.path.join(self.media, 'thumbs', first.image_hash[:2]))), 4)
+
+
+class PrimaryImageTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(title='Watches', slug='watches')
+        self.product = Product.objects.create(title='Diver', slug='diver', category=self.category,
+                                              price=10, quantity=1, size=40, color='black')
+
+    def primary(self):
+        self.product.refresh_from_db()
+        return self.product.primary_image
+
+    def test_primary_image_follows_position_and_deletes(self):
+        back = Gallery.objects.create(product=self.product, image='products/back.png', position=2)
+        self.assertEqual(self.primary(), back)
+        front = Gallery.objects.create(product=self.product, image='products/front.png', position=1)
+        self.assertEqual(self.primary(), front)
+
+        back.position = 0
+        back.save()
+        self.assertEqual(self.primary(), back)
+        back.delete()
+        self.assertEqual(self.primary(), front)
+
+        other = Product.objects.create(title='Chrono', slug='chrono', category=self.category,
+                                       price=10, quantity=1, size=40, color='black')
+        front.product = other
+        front.save()
+        self.assertIsNone(self.primary())
+        other.refresh_from_db()
+        self.assertEqual(other.primary_image, front)
+
+    def test_admin_changelist_queries_do_not_grow_with_rows(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'secret-pass')
+        self.client.force_login(admin_user)
+        Gallery.objects.create(product=self.product, image='products/diver.png')
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.client.get(reverse('admin:store_product_changelist')).status_code, 200)
+            return len(queries)
+
+        small = count_queries()
+        create_catalog(products=5)
+        self.assertEqual(count_queries(), small)
+
+
+class PlaceholderTest(TestCase):
+    def test_products_without_photos_use_local_category_placeholder(self):
+        jewellery = Category.objects.create(title='Jewellery', slug='jewellery', placeholder_color='#AA0000')
+        rings = Category.objects.create(title='Rings', slug='rings', parent=jewellery)
+        ring = Product.objects.create(title='Ring', slug='ring', category=rings,
+                                      price=10, quantity=1, size=17, color='gold')
+
+        url = ring.get_first_photo()
+        self.assertEqual(url, '/media/placeholders/aa0000-320x320.svg')
+        with open(os.path.join(settings.MEDIA_ROOT, 'placeholders', 'aa0000-320x320.svg')) as file:
+            self.assertIn('fill="#aa0000"', file.read())
+        self.assertEqual(rings.get_image(),
+                         '/media/placeholders/aa0000-640x400.svg')
+        self.assertNotIn('ozone', self.client.get(reverse('category_detail', kwargs={'slug': 'rings'})).content.decode())
+
+
+class ProductCardCacheTest(TestCase):
+    def setUp(self):
+        store_cache.flush_stats()  # oldingi testlarning yozilmagan hisobi tozalanadigan cache ga tushsin
+        cache.clear()
+        create_catalog(products=2)
+        self.product = Product.objects.first()
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+        FavouriteProducts.objects.create(user=self.user, product=self.product)
+
+    def get_home_page(self):
+        return self.client.get(reverse('product_list')).content.decode()
+
+    def test_cards_are_cached_and_favourites_are_per_user(self):
+        anonymous = self.get_home_page()
+        self.assertEqual(store_cache.get_stats()['product_card'], {'hit': 0, 'miss': 2})
+        self.assertNotIn('fill="#000000"', anonymous)
+        self.assertNotIn(cards.FAVOURITE_MARK, anonymous)
+
+        self.client.force_login(self.user)
+        page = self.get_home_page()
+        self.assertEqual(store_cache.get_stats()['product_card'], {'hit': 2, 'miss': 2})
+        self.assertEqual(page.count('fill="#000000"'), 1)
+
+    def test_stock_change_invalidates_card(self):
+        self.assertNotIn('Sold', self.get_home_page())
+        customer = Customer.objects.create(user=self.user, name=self.user.username)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(stock.reserve(Order.objects.create(customer=customer), self.product.pk, 5))
+
+        self.assertEqual(self.get_home_page().count('Sold'), 1)
+        self.assertEqual(store_cache.get_stats()['product_card'], {'hit': 1, 'miss': 3})
+
+
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class PageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        watches = Category.objects.create(title='Watches', slug='watches')
+        rings = Category.objects.create(title='Rings', slug='rings')
+        self.diver = Product.objects.create(title='Diver', slug='diver', category=watches,
+                                            price=10, quantity=1, size=40, color='black')
+        self.ring = Product.objects.create(title='Ring', slug='ring', category=rings,
+                                           price=10, quantity=1, size=17, color='gold')
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+
+    def get(self, slug, **extra):
+        return self.client.get(reverse('product_detail', kwargs={'slug': slug}), **extra)
+
+    @override_settings(CATALOG_VERSION_TTL=60)
+    def test_anonymous_pages_are_cached_and_revalidated(self):
+        self.assertEqual(self.get('diver')['X-Page-Cache'], 'miss')
+        with self.assertNumQueries(2):  # db cache: sahifa va uning teglari
+            response = self.get('diver')
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertNotIn('csrfmiddlewaretoken', response.content.decode())
+        self.assertEqual(self.get('diver', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        self.assertFalse(self.client.get(reverse('category_detail', kwargs={'slug': 'watches'}),
+                                         {'color': 'black'}).has_header('X-Page-Cache'))
+        self.client.force_login(self.user)
+        self.assertFalse(self.get('diver').has_header('X-Page-Cache'))
+
+    def test_only_affected_pages_are_invalidated(self):
+        self.get('diver')
+        self.get('ring')
+        self.client.get(reverse('category_detail', kwargs={'slug': 'rings'}))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diver.price = 20
+            self.diver.save()
+        self.assertEqual(self.get('diver')['X-Page-Cache'], 'miss')
+        self.assertEqual(self.get('ring')['X-Page-Cache'], 'hit')
+        self.assertEqual(self.client.get(reverse('category_detail', kwargs={'slug': 'rings'}))['X-Page-Cache'], 'hit')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(product=self.ring, author=self.user, text='Nice')
+        self.assertEqual(self.get('ring')['X-Page-Cache'], 'miss')
+
+    @override_settings(PAGE_CACHE_LOCK_WAIT=0)
+    def test_cold_key_is_built_by_one_worker(self):
+        self.get('diver')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.diver.save()
+        # Boshqa worker qulfni olgan: eski nusxa beriladi, nusxa yo'q bo'lsa cache ga yozmasdan render qilinadi
+        for slug in ('diver', 'ring'):
+            request = RequestFactory().get(reverse('product_detail', kwargs={'slug': slug}))
+            request.user = AnonymousUser()
+            cache.add(PageCacheMiddleware(None).get_key(request) + ':lock', 1)
+        self.assertEqual(self.get('diver')['X-Page-Cache'], 'stale')
+        self.assertFalse(self.get('ring').has_header('X-Page-Cache'))
+
+
+class ReviewFeedTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(title='Watches', slug='watches')
+        self.product = Product.objects.create(title='Diver', slug='diver', category=category,
+                                              price=10, quantity=1, size=40, color='black')
+        self.users = [User.objects.create_user(username=f'buyer{i}', password='secret-pass') for i in range(3)]
+
+    def test_reviews_are_counted_and_paginated(self):
+        for i in range(20):
+            self.client.force_login(self.users[i % 3])
+            self.client.post(reverse('save_review', kwargs={'product_id': self.product.pk}), {'text': f'Review {i}'})
+        self.client.logout()
+        self.client.post(reverse('save_review', kwargs={'product_id': self.product.pk}), {'text': 'Anonymous'})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 20)
+        self.assertIsNotNone(self.product.last_review_at)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('product_detail', kwargs={'slug': 'diver'}))
+        self.assertEqual(len([query for query in queries if 'store_review' in query['sql']]), 1)
+        self.assertEqual(response.context['reviews'][0].text, 'Review 19')
+        texts = [review.text for review in response.context['reviews']]
+        url = response.context['reviews_next_url']
+        while url:
+            data = self.client.get(url).json()
+            texts += [text.strip() for text in data['html'].split('customer_reviews-desc">')[1:]]
+            url = data['next_url']
+        self.assertEqual([text.split('<')[0] for text in texts], [f'Review {i}' for i in range(19, -1, -1)])
+
+        Review.objects.filter(text='Review 19').delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 19)
+
+    def test_reviews_with_equal_timestamps_are_not_skipped(self):
+        Review.objects.bulk_create([Review(product=self.product, author=self.users[0], text=f'Review {i}')
+                                    for i in range(20)])
+        Review.objects.update(created_at=timezone.now().replace(microsecond=123456))
+
+        response = self.client.get(reverse('product_detail', kwargs={'slug': 'diver'}))
+        texts = [review.text for review in response.context['reviews']]
+        url = response.context['reviews_next_url']
+        while url:
+            data = self.client.get(url).json()
+            texts += re.findall(r'customer_reviews-desc">([^<]*)<', data['html'])
+            url = data['next_url']
+        self.assertEqual(texts, [f'Review {i}' for i in range(19, -1, -1)])  # bir xil vaqtda -pk bo'yicha
+
+
+class FavouriteToggleTest(TestCase):
+    def setUp(self):
+        category = Category.objects.create(title='Watches', slug='watches')
+        self.product = Product.objects.create(title='Diver', slug='diver', category=category,
+                                              price=10, quantity=1, size=40, color='black')
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+        self.url = reverse('toggle_favourite', kwargs={'product_slug': 'diver'})
+
+    def test_toggle_returns_new_state(self):
+        self.assertEqual(self.client.post(self.url).status_code, 401)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.post(self.url).json(), {'favourite': True})
+        self.assertEqual(self.client.post(self.url).json(), {'favourite': False})
+        self.assertEqual(self.client.post(reverse('toggle_favourite', kwargs={'product_slug': 'none'})).status_code, 404)
+
+        with self.assertNumQueries(2):  # DELETE (hech narsa o'chmadi) + INSERT
+            self.assertTrue(FavouriteProducts.toggle(self.user, self.product.pk))
+        with self.assertNumQueries(1):
+            self.assertFalse(FavouriteProducts.toggle(self.user, self.product.pk))
+
+    def test_double_insert_keeps_one_row(self):
+        for i in range(2):
+            FavouriteProducts.objects.bulk_create([FavouriteProducts(user=self.user, product=self.product)],
+                                                  ignore_conflicts=True)
+        self.assertEqual(FavouriteProducts.objects.count(), 1)
+        out = StringIO()
+        call_command('dedupe_favourites', dry_run=True, stdout=out)
+        self.assertIn('0 duplicate favourites found', out.getvalue())
+
+
+# Takroriy qatorlar faqat unique cheklovdan (0017) oldingi bazada bo'ladi: test bazani 0016 ga qaytaradi
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class FavouriteDuplicatesTest(TransactionTestCase):
+    before_unique = [('store', '0016_review_stats')]
+
+    def setUp(self):
+        category = Category.objects.create(title='Watches', slug='watches')
+        user = User.objects.create_user(username='buyer', password='secret-pass')
+        products = [Product.objects.create(title=slug, slug=slug, category=category, price=10, quantity=1,
+                                           size=40, color='black') for slug in ('diver', 'oyster')]
+
+        executor = MigrationExecutor(connection)
+        self.latest = executor.loader.graph.leaf_nodes('store')
+        executor.migrate(self.before_unique)
+        self.addCleanup(self.migrate, self.latest)
+
+        Favourite = executor.loader.project_state(self.before_unique).apps.get_model('store', 'FavouriteProducts')
+        self.kept = []
+        for product in products:
+            likes = Favourite.objects.bulk_create([Favourite(user_id=user.pk, product_id=product.pk)
+                                                   for i in range(3)])
+            self.kept.append(likes[0].pk)
+
+    def migrate(self, targets):
+        MigrationExecutor(connection).migrate(targets)
+
+    def test_migration_keeps_first_like(self):
+        self.migrate(self.latest)
+        self.assertEqual(sorted(FavouriteProducts.objects.values_list('pk', flat=True)), self.kept)
+
+    def test_command_keeps_first_like(self):
+        out = StringIO()
+        call_command('dedupe_favourites', dry_run=True, stdout=out)
+        self.assertIn('4 duplicate favourites found', out.getvalue())
+
+        call_command('dedupe_favourites', stdout=out)
+        self.assertIn('Deleted 4 duplicate favourites', out.getvalue())
+        self.assertEqual(sorted(FavouriteProducts.objects.values_list('pk', flat=True)), self.kept)
+
+
+class FavouritesPageTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='buyer', password='secret-pass')
+        self.client.force_login(self.user)
+
+    def like(self, products):
+        for product in products:
+            FavouriteProducts.objects.create(user=self.user, product=product)
+
+    def get_page(self, url=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url or reverse('my_favourite'))
+        self.assertEqual(response.status_code, 200)
+        return response, count_catalog_queries(queries)
+
+    def test_query_count_does_not_grow_with_favourites(self):
+        create_catalog(products=2, prefix='small')
+        self.like(Product.objects.all())
+        response, small = self.get_page()
+        self.assertEqual(len(response.context['products']), 2)
+
+        create_catalog(categories=2, subcategories=3, products=5, prefix='big')
+        self.like(Product.objects.filter(slug__startswith='big'))
+        response, big = self.get_page()
+        self.assertEqual(big, small)
+
+        # Oxirgi like birinchi, keyingi sahifa kursor bilan
+        titles = [product.title for product in response.context['products']]
+        self.assertEqual(len(titles), 12)
+        self.assertEqual(titles[0], 'big product 1 2 4')
+        response, queries = self.get_page(reverse('my_favourite') + response.context['next_page_url'])
+        titles += [product.title for product in response.context['products']]
+        self.assertEqual(len(set(titles)), 24)
+        self.assertTrue(response.context['next_page_url'])
+        self.assertEqual(queries, small)
+
+    def test_favourites_with_one_timestamp_are_not_skipped(self):
+        create_catalog(subcategories=2, products=10)  # migratsiyadan keyin hammasida bitta added_at
+        self.like(Product.objects.all())
+        FavouriteProducts.objects.update(added_at=timezone.now().replace(microsecond=123456))
+
+        response, queries = self.get_page()
+        pages = [[product.pk for product in response.context['products']]]
+        while response.context['next_page_url']:
+            response, queries = self.get_page(reverse('my_favourite') + response.context['next_page_url'])
+            pages.append([product.pk for product in response.context['products']])
+        self.assertEqual([len(page) for page in pages], [12, 8])
+        self.assertEqual(sum(pages, []), list(Product.objects.order_by('-pk').values_list('pk', flat=True)))
+
+
+class SqliteProfileTest(TestCase):
+    def test_pragmas_and_transaction_mode_are_applied(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+            self.assertEqual(cursor.execute('PRAGMA synchronous').fetchone()[0], 1)  # NORMAL
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+# So'rovdan tashqarida (komanda, admin action) eski qatorlar ham asosiy bazadan o'qilishi kerak:
+# replika sozlangan, lekin ulanishi yo'q, undan o'qilsa xato chiqadi
+@override_settings(SEARCH_INDEX_PATH=':memory:')
+class PrimaryReadsTest(TransactionTestCase):
+    def setUp(self):
+        self.root = Category.objects.create(title='Jewellery', slug='jewellery')
+        self.rings = Category.objects.create(title='Rings', slug='rings', parent=self.root, image_hash='ab' * 20)
+        self.ring = Product.objects.create(title='Ring', slug='ring', category=self.rings,
+                                           price=10, quantity=1, size=17, color='gold')
+
+    @override_settings(DATABASE_REPLICAS={'replica1': 1})
+    def test_old_rows_are_read_from_primary(self):
+        with self.assertRaises(ConnectionDoesNotExist):
+            Category.objects.count()
+        self.rings.update_path()
+        image_changing(Category, self.rings, using='default')
+        product_moving(Product, self.ring, using='default')
+        self.assertEqual(self.ring.old_category_id, self.rings.pk)
+
+
+@override_settings(DATABASE_REPLICAS={'replica1': 3, 'replica2': 1})
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def reads(self, request):
+        before = self.router.db_for_read(Product)
+        if request.method == 'POST':
+            self.router.db_for_write(FavouriteProducts)
+        return JsonResponse({'before': before, 'after': self.router.db_for_read(Product)})
+
+    def test_catalog_reads_go_to_weighted_replicas(self):
+        self.router.db_for_write(Product)  # so'rovdan tashqarida: o'qishlar asosiy bazaga bog'lanmaydi
+        random.seed(1)
+        reads = [self.router.db_for_read(Product) for i in range(400)]
+        self.assertEqual(set(reads), {'replica1', 'replica2'})
+        self.assertGreater(reads.count('replica1'), reads.count('replica2') * 2)
+        self.assertEqual(self.router.db_for_read(Order), 'default')
+        self.assertEqual(self.router.db_for_read(FavouriteProducts), 'default')
+        with pin_primary():
+            self.assertEqual(self.router.db_for_read(Review), 'default')
+
+    def test_writes_pin_reads_to_primary(self):
+        middleware = ReplicaPinMiddleware(self.reads)
+        response = middleware(RequestFactory().post('/'))
+        self.assertNotEqual(json.loads(response.content)['before'], 'default')
+        self.assertEqual(json.loads(response.content)['after'], 'default')
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertEqual(json.loads(middleware(request).content)['before'], 'default')
+        self.assertNotEqual(json.loads(middleware(RequestFactory().get('/')).content)['before'], 'default')
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.signals import setting_changed
+from django.db import connections
+from django.db.models import F
+from django.dispatch import receiver
+from PIL import Image, ImageOps
+
+# Pillow dagi format nomi va MIME turi
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+# Kesilgan rasmlar asl faylning mazmuni (sha1) bo'yicha nomlanadi: thumbs/ab/ab12...-320.webp.
+# Fayl nomi hech qachon o'zgarmaydi, shuning uchun uni cache da cheksiz saqlash mumkin,
+# bir xil rasm ikki marta yuklansa ham kesilgan nusxalar bitta bo'ladi
+def get_thumbnail_name(image_hash, width, extension):
+    return f'{settings.THUMBNAIL_DIRECTORY}/{image_hash[:2]}/{image_hash}-{width}.{extension}'
+
+
+def get_srcset(image_hash, extension):
+    return ', '.join(f'{default_storage.url(get_thumbnail_name(image_hash, width, extension))} {width}w'
+                     for width in settings.THUMBNAIL_WIDTHS)
+
+
+# Asl rasmdan hamma o'lcham va formatlarni yaratadi (bor bo'lsa qayta yozmaydi),
+# hash va o'rtacha rangni qaytaradi
+def create_thumbnails(name):
+    with default_storage.open(name, 'rb') as file:
+        content = file.read()
+    image_hash = hashlib.sha1(content).hexdigest()
+    original = ImageOps.exif_transpose(Image.open(BytesIO(content)))
+    preview = original if original.mode == 'RGB' else flatten(original)
+    preview_color = '#%02x%02x%02x' % preview.resize((1, 1), Image.BOX).getpixel((0, 0))[:3]
+
+    for width in settings.THUMBNAIL_WIDTHS:
+        resized = None
+        for extension, (image_format, content_type) in FORMATS.items():
+            thumbnail_name = get_thumbnail_name(image_hash, width, extension)
+            if default_storage.exists(thumbnail_name):
+                continue
+            if resized is None:  # kattalashtirilmaydi: kichik rasm o'z o'lchamida qoladi
+                resized = original.copy()
+                resized.thumbnail((width, width * 4), Image.LANCZOS)
+            image = resized if image_format == 'WEBP' or resized.mode == 'RGB' else flatten(resized)
+            buffer = BytesIO()
+            image.save(buffer, image_format, quality=settings.THUMBNAIL_QUALITY, optimize=True)
+            saved_name = default_storage.save(thumbnail_name, ContentFile(buffer.getvalue()))
+            if saved_name != thumbnail_name:  # boshqa worker shu rasmni oldinroq yozib ulgurgan
+                default_storage.delete(saved_name)
+    return image_hash, preview_color
+
+
+# JPEG da shaffoflik yo'q: oq fon ustiga qo'yiladi
+def flatten(image):
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, (255, 255, 255))
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+# Model obyekti uchun kesilgan rasmlarni yaratib, image_hash ni yozadi. Rasm shu orada
+# almashtirilgan bo'lsa (image boshqa) yozilmaydi, yangi rasm o'z navbatida ishlanadi
+def update_thumbnails(model_label, pk):
+    from .routers import pin_primary
+    model = apps.get_model(model_label)
+    with pin_primary():  # fon threadi: hozirgina saqlangan rasm replikada hali bo'lmasligi mumkin
+        name = model.objects.filter(pk=pk).values_list('image', flat=True).first()
+    if name:
+        save_hash(model, pk, name, *create_thumbnails(name))
+
+
+def save_hash(model, pk, name, image_hash, preview_color):
+    model.objects.filter(pk=pk, image=name).update(image_hash=image_hash, preview_color=preview_color)
+    if model._meta.model_name == 'category':  # menu/karusel bo'laklari va daraxt nusxasi yangilanadi
+        from .cache import bump_catalog_version
+        bump_catalog_version()
+    else:  # asosiy rasmi shu bo'lgan produkt kartochkasi va sahifalari srcset bilan qayta render qilinadi
+        from .models import Product
+        from .page_cache import invalidate_products
+        Product.objects.filter(primary_image_id=pk).update(version=F('version') + 1)
+        invalidate_products(model.objects.filter(pk=pk).values('product_id'))
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix='thumbnails')
+    return _executor
+
+
+@receiver(setting_changed)
+def reset_executor(setting, **kwargs):
+    global _executor
+    if setting == 'THUMBNAIL_WORKERS' and _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+
+
+# Pool threadidagi bitta ish: Future natijasini hech kim kutmaydi, shuning uchun xato log ga
+# yoziladi. Baza ulanishi har ishdan keyin yopiladi, aks holda har bir thread o'zinikini ochiq qoldiradi
+def run_job(model_label, pk):
+    try:
+        update_thumbnails(model_label, pk)
+    except Exception:
+        logger.exception('Thumbnail generation failed for %s %s', model_label, pk)
+    finally:
+        connections.close_all()
+
+
+# Admin so'rovi kutmaydi: rasm fon threadlarida kesiladi
+def schedule(instance):
+    return get_executor().submit(run_job, instance._meta.label, instance.pk)
@@ -1,20 +1,26 @@
-from django.urls import path
-from .views import *
-
-urlpatterns = [
-    path('', ProductList.as_view(), name='product_list'),
-    path('category/<slug:slug>/', CategoryView.as_view(), name='category_detail'),
-    path('product/<slug:slug>/', ProductDetail.as_view(), name='product_detail'),
-    path('save_review/<int:product_id>/', save_review, name='save_review'),
-    path('login_registration/', login_registration, name='login_registration'),
-    path('login/', user_login, name='login'),
-    path('logout/', user_logout, name='logout'),
-    path('register/', register, name='register'),
-    path('add_favourite/<slug:product_slug>/', save_favourite_product, name='add_favourite'),
-    path('my_favourite/', FavouriteProductsView.as_view(), name='my_favourite'),
-    path('cart/', cart, name='cart'),
-    path('to_cart/<int:product_id>/<str:action>/', to_cart, name='to_cart'),
-    path('checkout/', check_out, name='checkout'),
-    path('payment/', create_checkout_session, name='payment'),
-    path('success', successPayment, name='success'),
-]
+from django.urls import path
+from .views import *
+
+urlpatterns = [
+    path('', ProductList.as_view(), name='product_list'),
+    path('category/<slug:slug>/', CategoryView.as_view(), name='category_detail'),
+    path('product/<slug:slug>/', ProductDetail.as_view(), name='product_detail'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('search/suggest/', search_suggestions, name='search_suggestions'),
+    path('save_review/<int:product_id>/', save_review, name='save_review'),
+    path('reviews/<int:product_id>/', product_reviews, name='product_reviews'),
+    path('login_registration/', login_registration, name='login_registration'),
+    path('login/', user_login, name='login'),
+    path('logout/', user_logout, name='logout'),
+    path('register/', register, name='register'),
+    path('add_favourite/<slug:product_slug>/', save_favourite_product, name='add_favourite'),
+    path('favourite/<slug:product_slug>/toggle/', toggle_favourite, name='toggle_favourite'),
+    path('my_favourite/', FavouriteProductsView.as_view(), name='my_favourite'),
+    path('cart/', cart, name='cart'),
+    path('to_cart/<int:product_id>/<str:action>/', to_cart, name='to_cart'),
+    path('checkout/', check_out, name='checkout'),
+    path('payment/', create_checkout_session, name='payment'),
+    path('success', successPayment, name='success'),
+    path('stripe/webhook/', stripe_webhook, name='stripe_webhook'),
+    path('cache-stats/', cache_stats, name='cache_stats'),
+]
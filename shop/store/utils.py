@@ -1,67 +1,138 @@
-from .models import Product, OrderProduct, Order, Customer
-
-
-# Savatga qoshish va udalit qilish uchun javob beradigan class
-
-class CartForAuthenticatedUser:
-    def __init__(self, request, product_id=None, action=None):
-        self.user = request.user
-
-        if product_id and action:
-            self.add_or_delete(product_id, action)
-
-    # Savatdagi malumotlarni qaytaradi
-    def get_cart_info(self):
-        customer, created = Customer.objects.get_or_create(
-            user=self.user
-        )
-        order, created = Order.objects.get_or_create(
-            customer=customer)  # Oldin registerdan otkan bolsa savatini olib beradi! Bomasa yaratadi!
-        order_products = order.orderproduct_set.all()  # Zakaz qilingan produktlani ovoladi hamasini
-
-        cart_total_quantity = order.get_cart_total_quantity  # Hamma produktlani sonini oladi
-        cart_total_price = order.get_cart_total_price  # Hamma produktlani summasini yigadi!
-
-        return {
-            'cart_total_quantity': cart_total_quantity,
-            'cart_total_price': cart_total_price,
-            'order': order,
-            'products': order_products
-        }
-
-    def add_or_delete(self, product_id, action):
-        order = self.get_cart_info()['order']
-        product = Product.objects.get(pk=product_id)
-        order_product, created = OrderProduct.objects.get_or_create(order=order, product=product)
-
-        if action == 'add' and product.quantity > 0:
-            order_product.quantity += 1
-            product.quantity -= 1
-        else:
-            order_product.quantity -= 1
-            product.quantity += 1
-
-        product.save()
-        order_product.save()
-
-        if order_product.quantity <= 0:  # Agar 0 dan tushib ketsa savat tozalanib qoladi !
-            order_product.delete()
-
-    def clear(self):
-        order = self.get_cart_info()['order']
-        order_products = order.orderproduct_set.all()
-        for product in order_products:
-            product.delete()
-        order.delete()
-
-
-def get_cart_data(request):
-    cart = CartForAuthenticatedUser(request)
-    cart_info = cart.get_cart_info()
-
-    return {
-        'cart_total_quantity': cart_info['cart_total_quantity'],
-        'cart_total_price': cart_info['cart_total_price'],
-        'order': cart_info['order'],
-        'products': cart_info['products']
-    }
+import random
+from django.db.models import Prefetch
+from .models import Product, OrderProduct, Order, Customer, Category, FavouriteProducts
+from . import stock
+
+
+# Savatga qoshish va udalit qilish uchun javob beradigan class
+
+class CartForAuthenticatedUser:
+    def __init__(self, request, product_id=None, action=None, quantity=1):
+        self.user = request.user
+        self.changed = False
+
+        if product_id and action:
+            self.changed = self.add_or_delete(product_id, action, quantity)
+
+    # Foydalanuvchining ochiq savatini (zakazini) qaytaradi
+    def get_order(self):
+        customer, created = Customer.objects.get_or_create(
+            user=self.user
+        )
+        order, created = Order.objects.get_or_create(
+            customer=customer, is_paid=False)  # Oldin registerdan otkan bolsa savatini olib beradi! Bomasa yaratadi!
+        return order
+
+    # Savatdagi malumotlarni qaytaradi
+    def get_cart_info(self):
+        order = self.get_order()
+        order_products = order.orderproduct_set.select_related(
+            'product__primary_image')  # Zakaz qilingan produktlani rasmlari bilan birga ovoladi
+
+        cart_total_quantity = order.get_cart_total_quantity  # Hamma produktlani sonini oladi
+        cart_total_price = order.get_cart_total_price  # Hamma produktlani summasini yigadi!
+
+        return {
+            'cart_total_quantity': cart_total_quantity,
+            'cart_total_price': cart_total_price,
+            'order': order,
+            'products': order_products
+        }
+
+    def add_or_delete(self, product_id, action, quantity=1):
+        order = self.get_order()
+
+        if action == 'add':
+            return stock.reserve(order, product_id, quantity)
+        return stock.release(order, product_id, quantity) > 0
+
+    # Savatni tozalaydi, produktlar omborga qaytadi
+    def clear(self):
+        order = self.get_order()
+        stock.release_all(order)
+
+    # Tolovdan keyin savat zakaz tarixiga otadi, keyingi safar yangi savat ochiladi
+    def finalize(self):
+        order = self.get_order()
+        return stock.finalize_order(order)
+
+
+# Savatning saqlangan xulosasi, get_or_create va qatorlarni o'qimaydi
+def get_cart_summary(user):
+    summary = None
+    if user.is_authenticated:
+        summary = Order.objects.filter(customer__user=user, is_paid=False).values(
+            'total_quantity', 'total_price', 'updated_at'
+        ).first()
+    return summary or {'total_quantity': 0, 'total_price': 0, 'updated_at': None}
+
+
+def get_cart_data(request):
+    cart = CartForAuthenticatedUser(request)
+    cart_info = cart.get_cart_info()
+
+    return {
+        'cart_total_quantity': cart_info['cart_total_quantity'],
+        'cart_total_price': cart_info['cart_total_price'],
+        'order': cart_info['order'],
+        'products': cart_info['products']
+    }
+
+
+# Bosh sahifa uchun kategoriya -> subkategoriya -> produkt -> rasm daraxtini
+# oldindan yuklaydi, katalog qancha katta bolmasin so'rovlar soni o'zgarmaydi
+def get_home_page_categories():
+    products = Product.objects.select_related('primary_image')
+    subcategories = Category.objects.prefetch_related(Prefetch('products', queryset=products))
+    categories = Category.objects.filter(parent=None).prefetch_related(
+        Prefetch('subcategories', queryset=subcategories)
+    )
+
+    return categories
+
+
+# Foydalanuvchi like bosgan produktlarning id lari, bitta request uchun bir marta yuklanadi
+def get_favourite_ids(request):
+    if not hasattr(request, '_favourite_ids'):
+        favourite_ids = frozenset()
+        if request.user.is_authenticated:
+            favourite_ids = frozenset(
+                FavouriteProducts.objects.filter(user=request.user).values_list('product_id', flat=True)
+            )
+        request._favourite_ids = favourite_ids
+    return request._favourite_ids
+
+
+
+# Tasodifiy produktlarni tanlaydi: butun jadvalni yuklamaydi, har bir tanlov
+# pk indeksi boyicha bitta qidiruv (random offset), shuning uchun katalog
+# hajmiga bog'liq emas
+def get_related_products(product, count=4, same_category=True, exclude=()):
+    products = Product.objects.all()
+    if same_category:
+        products = products.filter(category_id=product.category_id)
+
+    # Chegaralar indeksning ikki uchidan, istisnolarsiz: NOT IN bilan MIN/MAX butun jadvalni o'qiydi
+    low = products.order_by('pk').values_list('pk', flat=True).first()
+    high = products.order_by('-pk').values_list('pk', flat=True).first()
+    if low is None:
+        return []
+
+    skip = {product.pk, *exclude}
+    chosen = []
+    for attempt in range(count * 3):
+        if len(chosen) >= count:
+            break
+        pivot = random.randint(low, high)
+        candidates = products.exclude(pk__in=skip | {p.pk for p in chosen}).select_related('primary_image')
+        item = candidates.filter(pk__gte=pivot).order_by('pk').first()
+        if item is None:
+            item = candidates.filter(pk__lt=pivot).order_by('-pk').first()
+        if item is None:  # boshqa produkt qolmadi
+            break
+        chosen.append(item)
+
+    if same_category and len(chosen) < count:  # kategoriyada kam bo'lsa butun katalogdan, takrorlanmasdan
+        chosen += get_related_products(product, count - len(chosen), same_category=False,
+                                       exclude=[p.pk for p in chosen])
+    return chosen
@@ -1,226 +1,368 @@
-from random import randint
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import render, redirect
-from .forms import *
-from .models import *
-from django.views.generic import ListView, DetailView
-from django.contrib.auth import login, logout
-from django.contrib import messages
-from .utils import CartForAuthenticatedUser, get_cart_data
-import stripe
-from shop import settings
-
-
-class ProductList(ListView):
-    model = Product
-    context_object_name = 'categories'
-    extra_context = {
-        'title': 'Home'
-    }
-    template_name = 'store/product_list.html'
-
-    def get_queryset(self):
-        categories = Category.objects.filter(parent=None)
-        return categories
-
-
-class CategoryView(ListView):
-    model = Product
-    context_object_name = 'products'
-    template_name = 'store/category_page.html'
-    paginate_by = 2
-
-    def get_context_data(self, *, object_list=None, **kwargs):
-        context = super().get_context_data()
-        main_category = Category.objects.get(slug=self.kwargs['slug'])
-        context['category'] = main_category
-        context['title'] = f'{main_category.title}'
-        return context
-
-    def get_queryset(self):
-        sort_field = self.request.GET.get('sort')
-        type_field = self.request.GET.get('type')
-
-        if type_field:
-            products = Product.objects.filter(category__slug=type_field)
-            return products
-        main_category = Category.objects.get(slug=self.kwargs['slug'])
-        subcategories = main_category.subcategories.all()
-        products = Product.objects.filter(category__in=subcategories)
-
-        if sort_field:
-            products = products.order_by(sort_field)
-        return products
-
-
-class ProductDetail(DetailView):  # Bu klass produktlani detalni korish uchun
-    model = Product
-    context_object_name = 'product'
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data()
-        product = Product.objects.get(slug=self.kwargs['slug'])
-        context['title'] = f'{product.title}'
-
-        products = Product.objects.all()
-        data = []
-        for i in range(4):
-            random_index = randint(0, len(products) - 1)
-            p = products[random_index]
-            if p not in data:
-                data.append(p)
-        context['products'] = data
-
-        context['reviews'] = Review.objects.filter(product=product)
-
-        if self.request.user.is_authenticated:
-            context['review_form'] = ReviewForm()
-
-        return context
-
-
-def save_review(request, product_id):
-    form = ReviewForm(data=request.POST)
-    if form.is_valid():
-        review = form.save(commit=False)
-        review.author = request.user
-        product = Product.objects.get(pk=product_id)
-        review.product = product
-        review.save()
-    else:
-        pass
-    return redirect('product_detail', product.slug)
-
-
-def login_registration(request):
-    context = {
-        'title': 'Login and Registration',
-        'login_form': LoginForm(),
-        'register_form': RegistrationForm()
-    }
-
-    return render(request, 'store/login_register.html', context)
-
-
-def user_login(request):
-    form = LoginForm(data=request.POST)
-    if form.is_valid():
-        user = form.get_user()
-        login(request, user)
-        messages.success(request, 'You are now logged in!')
-        return redirect('product_list')
-    else:
-        messages.error(request, 'Please correct the error below.')
-        return redirect('login_registration')
-
-
-def user_logout(request):
-    logout(request)
-    messages.warning(request, 'You are now logged out!')
-    return redirect('login_registration')
-
-
-def register(request):
-    form = RegistrationForm(data=request.POST)
-    if form.is_valid():
-        form.save()
-        messages.success(request, 'You have successfully registered!')
-        return redirect('product_list')
-    else:
-        messages.error(request, 'Please correct the error below.')
-        return redirect('login_register')
-
-
-def save_favourite_product(request, product_slug):
-    user = request.user if request.user.is_authenticated else None
-    product = Product.objects.get(slug=product_slug)
-    favourite_products = FavouriteProducts.objects.filter(user=user)
-    if user:
-        if product in [i.product for i in favourite_products]:
-            fav_product = FavouriteProducts.objects.get(user=user, product=product)
-            fav_product.delete()
-        else:
-            FavouriteProducts.objects.create(user=user, product=product)
-    next_page = request.META.get('HTTP_REFERER', 'product_list')
-    return redirect(next_page)
-
-
-class FavouriteProductsView(LoginRequiredMixin, ListView):
-    model = FavouriteProducts
-    context_object_name = 'products'
-    template_name = 'store/favourite_products.html'
-    login_url = 'login_registration'
-
-    def get_queryset(self):
-        user = self.request.user
-        favs = FavouriteProducts.objects.filter(user=user)
-        products = [i.product for i in favs]
-        return products
-
-
-def cart(request):
-    cart_info = get_cart_data(request)
-
-    context = {
-        'cart_total_quantity': cart_info['cart_total_quantity'],
-        'order': cart_info['order'],
-        'products': cart_info['products'],
-    }
-
-    return render(request, 'store/cart.html', context)
-
-
-def to_cart(request, product_id, action):
-    if request.user.is_authenticated:
-        CartForAuthenticatedUser(request, product_id, action)
-        return redirect('cart')
-    else:
-        messages.error(request, 'You are not logged in!')
-        return redirect('login_registration')
-
-
-def check_out(request):
-    cart_info = get_cart_data(request)
-
-    context = {
-        'cart_total_quantity': cart_info['cart_total_quantity'],
-        'order': cart_info['order'],
-        'products': cart_info['products'],
-        'title': 'Checkout of product',
-        'customer_form': CustomerForm(),
-        'shipping_form': ShippingForm()
-    }
-
-    return render(request, 'store/checkout.html', context)
-
-
-def create_checkout_session(request):
-    stripe.api_key = settings.STRIPE_SECRET_KEY
-    if request.method == 'POST':
-        user_cart = CartForAuthenticatedUser(request)
-        cart_info = user_cart.get_cart_info()
-
-        total_price = cart_info['cart_total_price']
-        session = stripe.checkout.Session.create(
-            line_items=[{
-                'price_data': {
-                    'currency': 'USD',
-                    'product_data': {
-                        'name': 'PRODUCT in TOTEMBO'
-                    },
-                    'unit_amount': int(total_price)
-                },
-                'quantity': 1,
-            }],
-            mode='payment',
-            success_url=request.build_absolute_uri(reverse('product_list')),
-            cancel_url=request.build_absolute_uri(reverse('checkout'))
-        )
-
-        return redirect(session.url, 303)
-
-def successPayment(request):
-    user_cart = CartForAuthenticatedUser(request)
-    user_cart.clear()
-    messages.success(request, 'You have successfully paid')
-    return redirect('product_list')
+import asyncio
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.shortcuts import render, redirect, get_object_or_404
+from .forms import *
+from .models import *
+from django.views.generic import ListView, DetailView
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.contrib.auth import login, logout
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .pagination import paginate_keyset, get_page_size, get_cursor_url, KeysetPage
+from . import catalog, search, suggest, page_cache
+from . import cache as store_cache
+from .utils import CartForAuthenticatedUser, get_cart_data, get_home_page_categories, \
+    get_related_products, get_favourite_ids
+from .cards import render_card_lists
+from . import payments
+import stripe
+from shop import settings
+
+REVIEW_ORDERING = ['-created_at', '-pk']
+REVIEWS_PER_PAGE = 8
+FAVOURITE_ORDERING = ['-favourited_at', '-pk']
+
+
+class ProductList(ListView):
+    model = Product
+    context_object_name = 'categories'
+    extra_context = {
+        'title': 'Home'
+    }
+    template_name = 'store/product_list.html'
+
+    def get_queryset(self):
+        page_cache.add_tags(self.request, 'home')
+        return get_home_page_categories()
+
+    # Hamma bo'limlarning kartochkalari bitta get_many bilan (har bir bo'limga alohida emas)
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        subcategories = [sub for category in context['categories'] for sub in category.subcategories.all()]
+        cards = render_card_lists([sub.products.all() for sub in subcategories], get_favourite_ids(self.request))
+        for sub, html in zip(subcategories, cards):
+            sub.cards = html
+        return context
+
+
+class CategoryView(ListView):
+    model = Product
+    context_object_name = 'products'
+    template_name = 'store/category_page.html'
+
+    # ?page= bilan kelgan eski havolalar uchun OFFSET rejimi, qolgan hammasi kursor bilan
+    def get_paginate_by(self, queryset):
+        if 'page' in self.request.GET:
+            return get_page_size(self.request.GET.get('per_page'))
+        return None
+
+    def get_ordering(self):
+        return catalog.get_ordering(self.request.GET.get('sort'))
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data()
+        main_category = self.main_category
+        context['category'] = main_category
+        context['title'] = f'{main_category.title}'
+        context['facets'] = catalog.get_facets(self.category_products, self.request.GET)
+
+        if context['paginator'] is None:
+            page = paginate_keyset(self.object_list, self.get_ordering(),
+                                   cursor=self.request.GET.get('cursor'),
+                                   per_page=get_page_size(self.request.GET.get('per_page')),
+                                   with_count='count' in self.request.GET)
+            context['products'] = context['object_list'] = page.object_list
+            context['cursor_page'] = page
+            context['next_page_url'] = get_cursor_url(self.request, page.next_cursor)
+            context['previous_page_url'] = get_cursor_url(self.request, page.previous_cursor)
+        return context
+
+    def get_queryset(self):
+        type_field = self.request.GET.get('type')
+        self.main_category = Category.objects.get(slug=self.kwargs['slug'])
+        page_cache.add_tags(self.request, f'category:{self.main_category.pk}')
+
+        self.category_products = self.main_category.get_descendant_products()  # hamma darajadagi avlodlar
+
+        products = self.category_products
+        if type_field:  # faqat shu kategoriyaning subkategoriyasi bo'lsa
+            products = products.filter(category__slug=type_field)
+        products = catalog.filter_products(products, self.request.GET)
+
+        return products.select_related('primary_image').order_by(*self.get_ordering())
+
+
+class SearchView(ListView):
+    model = Product
+    context_object_name = 'products'
+    template_name = 'store/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        self.per_page = get_page_size(self.request.GET.get('per_page'))
+        try:
+            self.page_number = max(int(self.request.GET.get('page', 1)), 1)
+        except ValueError:
+            self.page_number = 1
+
+        ids = search.get_index().search(self.query, limit=self.per_page + 1,
+                                        offset=(self.page_number - 1) * self.per_page)
+        self.has_next = len(ids) > self.per_page
+        ids = ids[:self.per_page]
+        products = Product.objects.select_related('primary_image').in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]  # indeks tartibi (BM25) saqlanadi
+
+    def get_page_url(self, number):
+        query = self.request.GET.copy()
+        query['page'] = number
+        return '?' + query.urlencode()
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data()
+        context['title'] = f'Search: {self.query}'
+        context['query'] = self.query
+        context['cursor_page'] = KeysetPage(self.object_list, [], self.has_next, self.page_number > 1)
+        if self.has_next:
+            context['next_page_url'] = self.get_page_url(self.page_number + 1)
+        if self.page_number > 1:
+            context['previous_page_url'] = self.get_page_url(self.page_number - 1)
+        return context
+
+
+# Yozish davomidagi takliflar: xotiradagi prefiks indeksidan, bazaga so'rovsiz
+def search_suggestions(request):
+    return JsonResponse({'suggestions': suggest.get_index().lookup(request.GET.get('q', ''))})
+
+
+class ProductDetail(DetailView):  # Bu klass produktlani detalni korish uchun
+    model = Product
+    context_object_name = 'product'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data()
+        product = self.object
+        context['title'] = f'{product.title}'
+        page_cache.add_tags(self.request, f'product:{product.pk}', f'category:{product.category_id}')
+
+        context['products'] = get_related_products(product, count=4)
+
+        context['reviews'], context['reviews_next_url'] = get_review_page(product.pk)
+
+        if self.request.user.is_authenticated:
+            context['review_form'] = ReviewForm()
+
+        return context
+
+
+# Sharhlar yangisidan eskisiga, kursor bilan: (product, created_at) indeksi bo'yicha bitta so'rov
+def get_review_page(product_id, cursor=None):
+    reviews = Review.objects.filter(product_id=product_id).select_related('author')
+    page = paginate_keyset(reviews, REVIEW_ORDERING, cursor=cursor, per_page=REVIEWS_PER_PAGE)
+    next_url = None
+    if page.next_cursor:
+        next_url = f"{reverse('product_reviews', kwargs={'product_id': product_id})}?cursor={page.next_cursor}"
+    return page.object_list, next_url
+
+
+# "Load more" tugmasi uchun keyingi sharhlar (anonimlar uchun sahifa cache idan, store.page_cache)
+def product_reviews(request, product_id):
+    page_cache.add_tags(request, f'product:{product_id}')
+    reviews, next_url = get_review_page(product_id, request.GET.get('cursor'))
+    html = render_to_string('store/components/_review_items.html', {'reviews': reviews})
+    return JsonResponse({'html': html, 'next_url': next_url})
+
+
+# Sharh va produktdagi hisoblagich bitta tranzaksiyada yoziladi
+@require_POST
+def save_review(request, product_id):
+    product = get_object_or_404(Product.objects.only('pk', 'slug'), pk=product_id)
+    form = ReviewForm(data=request.POST)
+    if request.user.is_authenticated and form.is_valid():
+        with transaction.atomic():
+            review = form.save(commit=False)
+            review.author = request.user
+            review.product = product
+            review.save()
+            Product.objects.filter(pk=product.pk).update(review_count=F('review_count') + 1,
+                                                         last_review_at=review.created_at)
+    return redirect('product_detail', product.slug)
+
+
+def login_registration(request):
+    context = {
+        'title': 'Login and Registration',
+        'login_form': LoginForm(),
+        'register_form': RegistrationForm()
+    }
+
+    return render(request, 'store/login_register.html', context)
+
+
+def user_login(request):
+    form = LoginForm(data=request.POST)
+    if form.is_valid():
+        user = form.get_user()
+        login(request, user)
+        messages.success(request, 'You are now logged in!')
+        return redirect('product_list')
+    else:
+        messages.error(request, 'Please correct the error below.')
+        return redirect('login_registration')
+
+
+def user_logout(request):
+    logout(request)
+    messages.warning(request, 'You are now logged out!')
+    return redirect('login_registration')
+
+
+def register(request):
+    form = RegistrationForm(data=request.POST)
+    if form.is_valid():
+        form.save()
+        messages.success(request, 'You have successfully registered!')
+        return redirect('product_list')
+    else:
+        messages.error(request, 'Please correct the error below.')
+        return redirect('login_register')
+
+
+def save_favourite_product(request, product_slug):
+    if request.user.is_authenticated:
+        product_id = Product.objects.filter(slug=product_slug).values_list('pk', flat=True).get()
+        FavouriteProducts.toggle(request.user, product_id)
+    next_page = request.META.get('HTTP_REFERER', 'product_list')
+    return redirect(next_page)
+
+
+# Kartochkadagi yurak uchun: sahifaga qaytmasdan yangi holatni JSON da beradi
+@require_POST
+def toggle_favourite(request, product_slug):
+    if not request.user.is_authenticated:
+        return JsonResponse({'login_url': reverse('login_registration')}, status=401)
+    product_id = Product.objects.filter(slug=product_slug).values_list('pk', flat=True).first()
+    if product_id is None:
+        return JsonResponse({'error': 'Product not found'}, status=404)
+    return JsonResponse({'favourite': FavouriteProducts.toggle(request.user, product_id)})
+
+
+# Sevimlilar: bitta JOIN li so'rov (produkt, like vaqti, asosiy rasm), oxirgi like dan boshlab kursor bilan
+class FavouriteProductsView(LoginRequiredMixin, ListView):
+    model = Product
+    context_object_name = 'products'
+    template_name = 'store/favourite_products.html'
+    login_url = 'login_registration'
+    extra_context = {
+        'title': 'Favourites'
+    }
+
+    def get_queryset(self):
+        return Product.objects.filter(favouriteproducts__user=self.request.user).annotate(
+            favourited_at=F('favouriteproducts__added_at')
+        ).select_related('primary_image')
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        context = super().get_context_data()
+        page = paginate_keyset(self.object_list, FAVOURITE_ORDERING, cursor=self.request.GET.get('cursor'),
+                               per_page=get_page_size(self.request.GET.get('per_page')))
+        context['products'] = context['object_list'] = page.object_list
+        context['favourite_ids'] = frozenset(product.pk for product in page.object_list)  # hammasi like bosilgan
+        context['cursor_page'] = page
+        context['next_page_url'] = get_cursor_url(self.request, page.next_cursor)
+        context['previous_page_url'] = get_cursor_url(self.request, page.previous_cursor)
+        return context
+
+
+def cart(request):
+    cart_info = get_cart_data(request)
+
+    context = {
+        'cart_total_quantity': cart_info['cart_total_quantity'],
+        'order': cart_info['order'],
+        'products': cart_info['products'],
+    }
+
+    return render(request, 'store/cart.html', context)
+
+
+def to_cart(request, product_id, action):
+    if request.user.is_authenticated:
+        try:
+            quantity = max(int(request.GET.get('quantity', 1)), 1)
+        except ValueError:
+            quantity = 1
+        user_cart = CartForAuthenticatedUser(request, product_id, action, quantity)
+        if action == 'add' and not user_cart.changed:
+            messages.error(request, 'Not enough products in stock!')
+        return redirect('cart')
+    else:
+        messages.error(request, 'You are not logged in!')
+        return redirect('login_registration')
+
+
+def check_out(request):
+    cart_info = get_cart_data(request)
+
+    context = {
+        'cart_total_quantity': cart_info['cart_total_quantity'],
+        'order': cart_info['order'],
+        'products': cart_info['products'],
+        'title': 'Checkout of product',
+        'customer_form': CustomerForm(),
+        'shipping_form': ShippingForm()
+    }
+
+    return render(request, 'store/checkout.html', context)
+
+
+# Async view: ASGI da Stripe ni kutish workerni band qilmaydi (middleware lar ham async)
+async def create_checkout_session(request):
+    if request.method != 'POST':
+        return redirect('checkout')
+
+    order = await sync_to_async(lambda: CartForAuthenticatedUser(request).get_order())()
+    try:
+        session = await payments.acreate_checkout_session(
+            order,
+            success_url=request.build_absolute_uri(reverse('success')),
+            cancel_url=request.build_absolute_uri(reverse('checkout'))
+        )
+    except (asyncio.TimeoutError, stripe.error.StripeError):
+        messages.error(request, 'Payment service is not available, please try again!')
+        return redirect('checkout')
+    await sync_to_async(payments.remember_checkout_session)(order, session)
+
+    response = redirect(session.url)
+    response.status_code = 303  # POST dan keyin Stripe sahifasiga GET bilan o'tadi
+    return response
+
+
+# Stripe shu yerga qaytaradi, lekin zakaz faqat imzolangan webhook orqali yopiladi
+def successPayment(request):
+    messages.success(request, 'Thank you! Your payment is being confirmed')
+    return redirect('product_list')
+
+
+@csrf_exempt
+@require_POST
+def stripe_webhook(request):
+    event_id = payments.receive_webhook(request.body, request.META.get('HTTP_STRIPE_SIGNATURE', ''))
+    if event_id is None:
+        return HttpResponse(status=400)
+    return HttpResponse(status=200)
+
+
+# Cache hit/miss hisoblagichlari (faqat xodimlar uchun)
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse({
+        'catalog_version': store_cache.get_catalog_version(),
+        'stats': store_cache.get_stats()
+    })